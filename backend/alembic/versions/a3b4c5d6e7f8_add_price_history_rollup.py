@@ -0,0 +1,56 @@
+"""add price_history_rollup for downsampled price history
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a3b4c5d6e7f8"
+down_revision: Union[str, Sequence[str], None] = "f2a3b4c5d6e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("price_history_rollup"):
+        return
+    op.create_table(
+        "price_history_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("game_id", sa.Integer(), sa.ForeignKey("games.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("granularity", sa.String(), nullable=False),
+        sa.Column("period_start", sa.String(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("loose_min", sa.Float(), nullable=True),
+        sa.Column("loose_max", sa.Float(), nullable=True),
+        sa.Column("loose_last", sa.Float(), nullable=True),
+        sa.Column("complete_min", sa.Float(), nullable=True),
+        sa.Column("complete_max", sa.Float(), nullable=True),
+        sa.Column("complete_last", sa.Float(), nullable=True),
+        sa.Column("new_min", sa.Float(), nullable=True),
+        sa.Column("new_max", sa.Float(), nullable=True),
+        sa.Column("new_last", sa.Float(), nullable=True),
+        sa.Column("eur_rate", sa.Float(), nullable=True),
+        sa.Column("pricecharting_id", sa.String(), nullable=True),
+        sa.Column("first_fetched_at", sa.String(), nullable=True),
+        sa.Column("last_fetched_at", sa.String(), nullable=True),
+        sa.UniqueConstraint("game_id", "source", "granularity", "period_start", name="uq_price_history_rollup_period"),
+    )
+
+
+def downgrade() -> None:
+    if _table_exists("price_history_rollup"):
+        op.drop_table("price_history_rollup")
@@ -0,0 +1,69 @@
+"""add game_catalog_match links
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, Sequence[str], None] = "f6a7b8c9d0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _index_exists(table: str, index_name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return index_name in {idx["name"] for idx in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    if not _table_exists("game_catalog_match"):
+        op.create_table(
+            "game_catalog_match",
+            sa.Column("game_id", sa.Integer(), sa.ForeignKey("games.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("catalog_id", sa.Integer(), sa.ForeignKey("price_catalog.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("score", sa.Float(), nullable=True),
+            sa.Column("matched_at", sa.String(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+            sa.Column("matcher_version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+    if not _index_exists("game_catalog_match", "idx_game_catalog_match_catalog_id"):
+        op.create_index("idx_game_catalog_match_catalog_id", "game_catalog_match", ["catalog_id"])
+
+    # SQLite foreign keys are not enforced on our connections, so cascade by trigger.
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS game_catalog_match_catalog_ad AFTER DELETE ON price_catalog BEGIN
+            DELETE FROM game_catalog_match WHERE catalog_id = old.id;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS game_catalog_match_game_ad AFTER DELETE ON games BEGIN
+            DELETE FROM game_catalog_match WHERE game_id = old.id;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS game_catalog_match_game_ad")
+    op.execute("DROP TRIGGER IF EXISTS game_catalog_match_catalog_ad")
+    if _table_exists("game_catalog_match"):
+        if _index_exists("game_catalog_match", "idx_game_catalog_match_catalog_id"):
+            op.drop_index("idx_game_catalog_match_catalog_id", table_name="game_catalog_match")
+        op.drop_table("game_catalog_match")
@@ -0,0 +1,44 @@
+"""drop unused price_catalog norm indexes
+
+Revision f6a7b8c9d0e1 used to create (norm_platform, norm_title) and
+(norm_platform, clean_title) indexes that no query uses; drop them where
+they were already created.
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a9b0c1d2e3f4"
+down_revision: Union[str, Sequence[str], None] = "f8a9b0c1d2e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_INDEXES = ["idx_price_catalog_norm_platform_title", "idx_price_catalog_norm_platform_clean"]
+
+
+def _index_exists(name: str) -> bool:
+    conn = op.get_bind()
+    result = conn.execute(
+        sa.text("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name=:name"),
+        {"name": name},
+    )
+    return result.scalar() > 0
+
+
+def upgrade() -> None:
+    for index_name in _INDEXES:
+        if _index_exists(index_name):
+            op.drop_index(index_name, table_name="price_catalog")
+
+
+def downgrade() -> None:
+    # f6a7b8c9d0e1 no longer creates these indexes, so there is nothing to restore.
+    pass
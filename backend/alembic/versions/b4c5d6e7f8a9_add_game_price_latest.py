@@ -0,0 +1,76 @@
+"""add game_price_latest and a (game_id, fetched_at) index on price_history
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b4c5d6e7f8a9"
+down_revision: Union[str, Sequence[str], None] = "a3b4c5d6e7f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _index_exists(name: str) -> bool:
+    conn = op.get_bind()
+    result = conn.execute(
+        sa.text("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name=:name"),
+        {"name": name},
+    )
+    return result.scalar() > 0
+
+
+def upgrade() -> None:
+    if _table_exists("price_history") and not _index_exists("idx_price_history_game_fetched"):
+        op.create_index("idx_price_history_game_fetched", "price_history", ["game_id", "fetched_at"])
+
+    if _table_exists("game_price_latest"):
+        return
+    op.create_table(
+        "game_price_latest",
+        sa.Column("game_id", sa.Integer(), sa.ForeignKey("games.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("price_history_id", sa.Integer(), nullable=False),
+        sa.Column("loose_price", sa.Float(), nullable=True),
+        sa.Column("complete_price", sa.Float(), nullable=True),
+        sa.Column("new_price", sa.Float(), nullable=True),
+        sa.Column("eur_rate", sa.Float(), nullable=True),
+        sa.Column("pricecharting_id", sa.String(), nullable=True),
+        sa.Column("fetched_at", sa.String(), nullable=True),
+        sa.Column("last_confirmed_at", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("game_id", "source"),
+    )
+    if _table_exists("price_history"):
+        op.execute(
+            """
+            INSERT INTO game_price_latest
+                (game_id, source, price_history_id, loose_price, complete_price, new_price,
+                 eur_rate, pricecharting_id, fetched_at, last_confirmed_at)
+            SELECT game_id, source, id, loose_price, complete_price, new_price,
+                   eur_rate, pricecharting_id, fetched_at, last_confirmed_at
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY game_id, source ORDER BY fetched_at DESC, id DESC) AS rn
+                FROM price_history WHERE source IS NOT NULL
+            )
+            WHERE rn = 1
+            """
+        )
+
+
+def downgrade() -> None:
+    if _table_exists("game_price_latest"):
+        op.drop_table("game_price_latest")
+    if _index_exists("idx_price_history_game_fetched"):
+        op.drop_index("idx_price_history_game_fetched", table_name="price_history")
@@ -0,0 +1,51 @@
+"""add catalog_crawl_state checkpoints
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, Sequence[str], None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("catalog_crawl_state"):
+        return
+    op.create_table(
+        "catalog_crawl_state",
+        sa.Column("platform_slug", sa.String(), primary_key=True),
+        sa.Column("platform_label", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="running"),
+        sa.Column("pages_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("entries_scraped", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_url", sa.String(), nullable=True),
+        sa.Column("next_method", sa.String(), nullable=True),
+        sa.Column("next_params", sa.Text(), nullable=True),
+        sa.Column("seen_cursors", sa.Text(), nullable=True),
+        sa.Column("last_signature", sa.Text(), nullable=True),
+        sa.Column("page_size_hint", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.String(), nullable=True, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("updated_at", sa.String(), nullable=True, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("finished_at", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    if _table_exists("catalog_crawl_state"):
+        op.drop_table("catalog_crawl_state")
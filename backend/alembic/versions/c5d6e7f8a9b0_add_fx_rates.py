@@ -0,0 +1,42 @@
+"""add fx_rates for persisted daily exchange rates
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c5d6e7f8a9b0"
+down_revision: Union[str, Sequence[str], None] = "b4c5d6e7f8a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("fx_rates"):
+        return
+    op.create_table(
+        "fx_rates",
+        sa.Column("base", sa.String(), nullable=False),
+        sa.Column("quote", sa.String(), nullable=False),
+        sa.Column("rate_date", sa.String(), nullable=False),
+        sa.Column("rate", sa.Float(), nullable=False),
+        sa.Column("fetched_at", sa.String(), nullable=True, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.PrimaryKeyConstraint("base", "quote", "rate_date"),
+    )
+
+
+def downgrade() -> None:
+    if _table_exists("fx_rates"):
+        op.drop_table("fx_rates")
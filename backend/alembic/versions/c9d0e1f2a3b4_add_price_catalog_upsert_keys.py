@@ -0,0 +1,84 @@
+"""add price_catalog upsert keys
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, Sequence[str], None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _index_exists(name: str) -> bool:
+    conn = op.get_bind()
+    result = conn.execute(
+        sa.text("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name=:name"),
+        {"name": name},
+    )
+    return result.scalar() > 0
+
+
+def upgrade() -> None:
+    if not _table_exists("price_catalog"):
+        return
+
+    if not _index_exists("uq_price_catalog_platform_pcid"):
+        # Keep the newest row per (platform, pricecharting_id), as the old per-row upsert did.
+        older_duplicates = """
+            SELECT id FROM price_catalog
+            WHERE pricecharting_id <> ''
+              AND id NOT IN (
+                  SELECT MAX(id) FROM price_catalog WHERE pricecharting_id <> '' GROUP BY platform, pricecharting_id
+              )
+        """
+        if _table_exists("game_catalog_match"):
+            # Move matches to the surviving row first; deleting a catalog row cascades to its matches.
+            op.execute(
+                f"""
+                UPDATE game_catalog_match SET catalog_id = (
+                    SELECT MAX(keep.id) FROM price_catalog AS dup
+                    JOIN price_catalog AS keep
+                      ON keep.platform = dup.platform AND keep.pricecharting_id = dup.pricecharting_id
+                    WHERE dup.id = game_catalog_match.catalog_id
+                )
+                WHERE catalog_id IN ({older_duplicates})
+                """
+            )
+        op.execute(f"DELETE FROM price_catalog WHERE id IN ({older_duplicates})")
+        op.create_index(
+            "uq_price_catalog_platform_pcid",
+            "price_catalog",
+            ["platform", "pricecharting_id"],
+            unique=True,
+            sqlite_where=sa.text("pricecharting_id <> ''"),
+        )
+
+    if not _index_exists("idx_price_catalog_platform_lower_title"):
+        op.create_index(
+            "idx_price_catalog_platform_lower_title",
+            "price_catalog",
+            ["platform", sa.text("lower(title)")],
+        )
+
+
+def downgrade() -> None:
+    if not _table_exists("price_catalog"):
+        return
+
+    for index_name in ["idx_price_catalog_platform_lower_title", "uq_price_catalog_platform_pcid"]:
+        if _index_exists(index_name):
+            op.drop_index(index_name, table_name="price_catalog")
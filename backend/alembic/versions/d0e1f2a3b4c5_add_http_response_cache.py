@@ -0,0 +1,45 @@
+"""add http_response_cache
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d0e1f2a3b4c5"
+down_revision: Union[str, Sequence[str], None] = "c9d0e1f2a3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("http_response_cache"):
+        return
+    op.create_table(
+        "http_response_cache",
+        sa.Column("cache_key", sa.String(), primary_key=True),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("fetched_at", sa.Float(), nullable=False),
+        sa.Column("expires_at", sa.Float(), nullable=False),
+    )
+    op.create_index("idx_http_response_cache_expires_at", "http_response_cache", ["expires_at"])
+
+
+def downgrade() -> None:
+    if _table_exists("http_response_cache"):
+        op.drop_index("idx_http_response_cache_expires_at", table_name="http_response_cache")
+        op.drop_table("http_response_cache")
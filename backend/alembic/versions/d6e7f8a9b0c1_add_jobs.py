@@ -0,0 +1,59 @@
+"""add jobs table for the durable background job queue
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d6e7f8a9b0c1"
+down_revision: Union[str, Sequence[str], None] = "c5d6e7f8a9b0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("jobs"):
+        return
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("success", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("payload", sa.Text(), nullable=True),
+        sa.Column("checkpoint", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("lease_owner", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.Float(), nullable=True),
+        sa.Column("run_after", sa.Float(), nullable=True),
+        sa.Column("heartbeat_at", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=False),
+        sa.Column("started_at", sa.String(), nullable=True),
+        sa.Column("finished_at", sa.String(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index("idx_jobs_state_run_after", "jobs", ["state", "run_after"])
+    op.create_index("idx_jobs_finished_at", "jobs", ["finished_at"])
+
+
+def downgrade() -> None:
+    if _table_exists("jobs"):
+        op.drop_index("idx_jobs_finished_at", table_name="jobs")
+        op.drop_index("idx_jobs_state_run_after", table_name="jobs")
+        op.drop_table("jobs")
@@ -0,0 +1,47 @@
+"""add catalog_miss negative lookup cache
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, Sequence[str], None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if _table_exists("catalog_miss"):
+        return
+    op.create_table(
+        "catalog_miss",
+        sa.Column("norm_title", sa.String(), nullable=False),
+        sa.Column("norm_platform", sa.String(), nullable=False, server_default=""),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("platform", sa.String(), nullable=False, server_default=""),
+        sa.Column("miss_count", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("first_missed_at", sa.String(), nullable=True, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("last_missed_at", sa.String(), nullable=True, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("next_retry_at", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("norm_title", "norm_platform"),
+    )
+    op.create_index("idx_catalog_miss_next_retry_at", "catalog_miss", ["next_retry_at"])
+
+
+def downgrade() -> None:
+    if _table_exists("catalog_miss"):
+        op.drop_index("idx_catalog_miss_next_retry_at", table_name="catalog_miss")
+        op.drop_table("catalog_miss")
@@ -0,0 +1,92 @@
+"""add fts5 trigram search tables
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e5f6a7b8c9d0"
+down_revision: Union[str, Sequence[str], None] = "d4e5f6a7b8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (fts table, content table, indexed columns)
+_FTS_TABLES = [
+    ("price_catalog_fts", "price_catalog", ["title"]),
+    ("games_fts", "games", ["title", "publisher", "developer"]),
+]
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    result = conn.execute(
+        sa.text("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=:name"),
+        {"name": name},
+    )
+    return result.scalar() > 0
+
+
+def _trigram_supported() -> bool:
+    # The trigram tokenizer ships with SQLite >= 3.34; older builds just skip search tables.
+    conn = op.get_bind()
+    try:
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.exec_driver_sql("DROP TABLE temp._fts_probe")
+        return True
+    except Exception:
+        return False
+
+
+def upgrade() -> None:
+    if not _trigram_supported():
+        return
+
+    for fts, content, columns in _FTS_TABLES:
+        if not _table_exists(content) or _table_exists(fts):
+            continue
+
+        cols = ", ".join(columns)
+        new_values = ", ".join(f"new.{c}" for c in columns)
+        old_values = ", ".join(f"old.{c}" for c in columns)
+
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{content}', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {fts}_ai AFTER INSERT ON {content} BEGIN
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {fts}_ad AFTER DELETE ON {content} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {content} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+            END
+            """
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    for fts, _content, _columns in reversed(_FTS_TABLES):
+        for suffix in ("au", "ad", "ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        if _table_exists(fts):
+            op.execute(f"DROP TABLE {fts}")
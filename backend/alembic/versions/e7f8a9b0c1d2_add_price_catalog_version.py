@@ -0,0 +1,56 @@
+"""add price_catalog_version write counter
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e7f8a9b0c1d2"
+down_revision: Union[str, Sequence[str], None] = "d6e7f8a9b0c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRIGGERS = {
+    "price_catalog_version_ai": "AFTER INSERT ON price_catalog",
+    "price_catalog_version_ad": "AFTER DELETE ON price_catalog",
+    "price_catalog_version_au": "AFTER UPDATE OF title, platform, norm_title, norm_platform ON price_catalog",
+}
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not _table_exists("price_catalog_version"):
+        op.create_table(
+            "price_catalog_version",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+        )
+    op.execute("INSERT OR IGNORE INTO price_catalog_version (id, generation) VALUES (1, 0)")
+
+    # Bumped by every write that changes what the in-memory token index holds, from any process or tool.
+    for name, event in _TRIGGERS.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN
+                UPDATE price_catalog_version SET generation = generation + 1 WHERE id = 1;
+            END
+            """
+        )
+
+
+def downgrade() -> None:
+    for name in _TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    if _table_exists("price_catalog_version"):
+        op.drop_table("price_catalog_version")
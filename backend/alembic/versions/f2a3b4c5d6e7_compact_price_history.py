@@ -0,0 +1,108 @@
+"""add price_history.last_confirmed_at and compact repeated snapshots
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, Sequence[str], None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _column_exists(table: str, column: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return column in [c["name"] for c in inspector.get_columns(table)]
+
+
+def _index_exists(name: str) -> bool:
+    conn = op.get_bind()
+    result = conn.execute(
+        sa.text("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND name=:name"),
+        {"name": name},
+    )
+    return result.scalar() > 0
+
+
+def upgrade() -> None:
+    if not _table_exists("price_history"):
+        return
+
+    if not _column_exists("price_history", "last_confirmed_at"):
+        op.add_column("price_history", sa.Column("last_confirmed_at", sa.String(), nullable=True))
+        op.execute("UPDATE price_history SET last_confirmed_at = fetched_at WHERE source <> 'manual'")
+
+    if not _index_exists("idx_price_history_game_source_fetched"):
+        op.create_index("idx_price_history_game_source_fetched", "price_history", ["game_id", "source", "fetched_at"])
+
+    # Collapse each run of identical consecutive automatic snapshots (per game and
+    # source) into its first row, which keeps the run's last fetch as last_confirmed_at.
+    op.execute(
+        """
+        CREATE TEMP TABLE price_history_runs AS
+        SELECT id, game_id, source, fetched_at, is_new,
+               SUM(is_new) OVER (PARTITION BY game_id, source ORDER BY fetched_at, id) AS run_id
+        FROM (
+            SELECT id, game_id, source, fetched_at,
+                   CASE WHEN LAG(id) OVER w IS NOT NULL
+                         AND LAG(loose_price) OVER w IS loose_price
+                         AND LAG(complete_price) OVER w IS complete_price
+                         AND LAG(new_price) OVER w IS new_price
+                        THEN 0 ELSE 1 END AS is_new
+            FROM price_history
+            WHERE source <> 'manual'
+            WINDOW w AS (PARTITION BY game_id, source ORDER BY fetched_at, id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TEMP TABLE price_history_heads AS
+        SELECT game_id, source, run_id, MAX(CASE WHEN is_new = 1 THEN id END) AS head_id, MAX(fetched_at) AS confirmed_at
+        FROM price_history_runs
+        GROUP BY game_id, source, run_id
+        HAVING COUNT(*) > 1
+        """
+    )
+    op.execute(
+        """
+        UPDATE price_history
+        SET last_confirmed_at = (SELECT confirmed_at FROM price_history_heads h WHERE h.head_id = price_history.id)
+        WHERE id IN (SELECT head_id FROM price_history_heads)
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM price_history WHERE id IN (
+            SELECT r.id FROM price_history_runs r
+            JOIN price_history_heads h ON h.game_id = r.game_id AND h.source = r.source AND h.run_id = r.run_id
+            WHERE r.id <> h.head_id
+        )
+        """
+    )
+    op.execute("DROP TABLE price_history_heads")
+    op.execute("DROP TABLE price_history_runs")
+
+
+def downgrade() -> None:
+    # Compacted snapshots are not restored.
+    if not _table_exists("price_history"):
+        return
+    if _index_exists("idx_price_history_game_source_fetched"):
+        op.drop_index("idx_price_history_game_source_fetched", table_name="price_history")
+    if _column_exists("price_history", "last_confirmed_at"):
+        op.drop_column("price_history", "last_confirmed_at")
@@ -0,0 +1,108 @@
+"""add precomputed normalized columns to price_catalog
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17
+
+"""
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f6a7b8c9d0e1"
+down_revision: Union[str, Sequence[str], None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_COLUMNS = ["norm_title", "clean_title", "norm_platform"]
+_BACKFILL_BATCH = 5000
+
+# Frozen copy of the app's normalization (backend.services.price.utils) as of this revision,
+# so the backfill does not change when the app code does.
+_TITLE_NOISE_TOKENS = {
+    "console", "bundle", "edition", "model", "system", "with", "and", "the", "for", "new", "used",
+}
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    text = str(value).lower().strip()
+    text = text.replace("&", " and ")
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _clean_catalog_title(norm_title: str, norm_platform: str) -> str:
+    platform_tokens = set(norm_platform.split())
+    cleaned = []
+    for token in norm_title.split():
+        if token in platform_tokens or token in _TITLE_NOISE_TOKENS:
+            continue
+        if re.fullmatch(r"\d{2,4}(gb|tb)", token) or token in {"gb", "tb"}:
+            continue
+        cleaned.append(token)
+    return " ".join(cleaned)
+
+
+def _catalog_norm_fields(title: Optional[str], platform: Optional[str]) -> tuple:
+    norm_title = _normalize_text(title)
+    norm_platform = _normalize_text(platform)
+    return norm_title, _clean_catalog_title(norm_title, norm_platform), norm_platform
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _column_exists(table: str, column: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return column in {c["name"] for c in inspector.get_columns(table)}
+
+
+def _backfill() -> None:
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, title, platform FROM price_catalog WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": _BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            norm_title, clean_title, norm_platform = _catalog_norm_fields(row.title, row.platform)
+            updates.append({"id": row.id, "nt": norm_title, "ct": clean_title, "np": norm_platform})
+        conn.execute(
+            sa.text("UPDATE price_catalog SET norm_title = :nt, clean_title = :ct, norm_platform = :np WHERE id = :id"),
+            updates,
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    if not _table_exists("price_catalog"):
+        return
+
+    for column_name in _COLUMNS:
+        if not _column_exists("price_catalog", column_name):
+            op.add_column("price_catalog", sa.Column(column_name, sa.String(), nullable=True))
+
+    _backfill()
+
+
+def downgrade() -> None:
+    if not _table_exists("price_catalog"):
+        return
+
+    for column_name in reversed(_COLUMNS):
+        if _column_exists("price_catalog", column_name):
+            op.drop_column("price_catalog", column_name)
@@ -0,0 +1,39 @@
+"""add a result column to jobs
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f8a9b0c1d2e3"
+down_revision: Union[str, Sequence[str], None] = "e7f8a9b0c1d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _table_exists(name: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return name in inspector.get_table_names()
+
+
+def _column_exists(table: str, column: str) -> bool:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    return column in {c["name"] for c in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    if _table_exists("jobs") and not _column_exists("jobs", "result"):
+        op.add_column("jobs", sa.Column("result", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    if _table_exists("jobs") and _column_exists("jobs", "result"):
+        op.drop_column("jobs", "result")
@@ -5,11 +5,22 @@ from fastapi import APIRouter
 
 from ..errors import conflict, not_found
 from ..schemas import GameCreate, GameUpdate, PlatformCreate
-from ...database import dict_from_row, get_db
+from ...database import dict_from_row, fts_phrase, get_db, table_exists
 from ...services.lookup_service import cache_remote_cover
+from ...services.price.catalog import invalidate_catalog_link
 
 router = APIRouter()
 
+# Newest price of any source, from the materialized game_price_latest table.
+_MARKET_PRICE_COLUMNS = """,
+    lp.source AS market_source, lp.loose_price AS market_loose_price,
+    lp.complete_price AS market_complete_price, lp.new_price AS market_new_price,
+    lp.fetched_at AS market_price_at"""
+_MARKET_PRICE_JOIN = """
+    LEFT JOIN game_price_latest lp ON lp.game_id = g.id AND lp.source = (
+        SELECT source FROM game_price_latest WHERE game_id = g.id ORDER BY fetched_at DESC, price_history_id DESC LIMIT 1
+    )"""
+
 
 @router.get("/api/games")
 async def list_games(
@@ -17,14 +28,19 @@ async def list_games(
     wishlist: Optional[bool] = None,
     search: Optional[str] = None,
 ):
+    phrase = fts_phrase(search)
+    use_fts = phrase is not None and table_exists("games_fts")
+
     with get_db() as db:
-        query = """
-            SELECT g.*, p.name as platform_name
+        query = f"""
+            SELECT g.*, p.name as platform_name{_MARKET_PRICE_COLUMNS}
             FROM games g
-            LEFT JOIN platforms p ON g.platform_id = p.id
-            WHERE 1=1
+            LEFT JOIN platforms p ON g.platform_id = p.id{_MARKET_PRICE_JOIN}
         """
         params = []
+        if use_fts:
+            query += " JOIN games_fts ON games_fts.rowid = g.id"
+        query += " WHERE 1=1"
 
         if platform:
             query += " AND g.platform_id = ?"
@@ -32,12 +48,18 @@ async def list_games(
         if wishlist is not None:
             query += " AND g.is_wishlist = ?"
             params.append(1 if wishlist else 0)
-        if search:
+        if use_fts:
+            query += " AND games_fts MATCH ?"
+            params.append(phrase)
+        elif search:
             query += " AND (g.title LIKE ? OR g.publisher LIKE ? OR g.developer LIKE ?)"
             search_param = f"%{search}%"
             params.extend([search_param, search_param, search_param])
 
-        query += " ORDER BY g.updated_at DESC"
+        if use_fts:
+            query += " ORDER BY bm25(games_fts), g.updated_at DESC"
+        else:
+            query += " ORDER BY g.updated_at DESC"
         cursor = db.execute(query, params)
         return [dict_from_row(row) for row in cursor.fetchall()]
 
@@ -109,10 +131,10 @@ async def create_game(game: GameCreate, force: bool = False):
 async def get_game(game_id: int):
     with get_db() as db:
         cursor = db.execute(
-            """
-            SELECT g.*, p.name as platform_name
+            f"""
+            SELECT g.*, p.name as platform_name{_MARKET_PRICE_COLUMNS}
             FROM games g
-            LEFT JOIN platforms p ON g.platform_id = p.id
+            LEFT JOIN platforms p ON g.platform_id = p.id{_MARKET_PRICE_JOIN}
             WHERE g.id = ?
             """,
             (game_id,),
@@ -120,6 +142,15 @@ async def get_game(game_id: int):
         game = dict_from_row(cursor.fetchone())
         if not game:
             raise not_found("Game not found")
+        latest = db.execute(
+            """
+            SELECT source, loose_price, complete_price, new_price, pricecharting_id, fetched_at, last_confirmed_at
+            FROM game_price_latest WHERE game_id = ?
+            ORDER BY fetched_at DESC, price_history_id DESC
+            """,
+            (game_id,),
+        ).fetchall()
+        game["latest_prices"] = [dict_from_row(row) for row in latest]
         return game
 
 
@@ -222,6 +253,8 @@ async def update_game(game_id: int, game: GameUpdate):
                 game_id,
             ),
         )
+        if merged["title"] != existing_data["title"] or merged["platform_id"] != existing_data["platform_id"]:
+            invalidate_catalog_link(db, game_id)
         db.commit()
         return {"id": game_id, "message": "Game updated successfully"}
 
@@ -233,6 +266,8 @@ async def delete_game(game_id: int):
         if not existing:
             raise not_found("Game not found")
         db.execute("DELETE FROM games WHERE id = ?", (game_id,))
+        # Ids can be reused; a stale latest price would show up on the next game that gets this id.
+        db.execute("DELETE FROM game_price_latest WHERE game_id = ?", (game_id,))
         db.commit()
         return {"message": "Game deleted successfully"}
 
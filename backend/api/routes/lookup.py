@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import quote
 
-from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi import APIRouter, Depends
 
 from ..errors import bad_request, not_found
 from ..security import require_admin_access
@@ -297,12 +297,12 @@ async def set_console_placeholder_cover(game_id: int):
 
 @router.post("/api/enrich/all")
 async def enrich_all_covers(
-    background_tasks: BackgroundTasks,
     limit: int = 20,
     _admin: None = Depends(require_admin_access),
 ):
     """Kick off a background job to enrich covers for up to `limit` items.
-    Returns immediately with a job_id. Poll /api/jobs/{job_id} for progress.
+    Returns immediately with a job_id. Follow /api/jobs/{job_id}/events (or poll
+    /api/jobs/{job_id}) for progress.
     """
     with get_db() as db:
         rows = db.execute(
@@ -316,16 +316,16 @@ async def enrich_all_covers(
         ).fetchall()
         items = [dict_from_row(row) for row in rows]
 
-    job_id = jobs.start("bulk_enrich", total=len(items))
-    background_tasks.add_task(_run_enrich_all_covers, job_id, items)
-    return {"job_id": job_id, "total": len(items), "state": "running"}
+    job_id = jobs.enqueue("bulk_enrich", {"items": items}, total=len(items))
+    return {"job_id": job_id, "total": len(items), "state": "queued"}
 
 
-async def _run_enrich_all_covers(job_id: str, items: list) -> None:
-    success = 0
-    failed = 0
-    for i, item in enumerate(items):
-        jobs.update(job_id, progress=i + 1)
+async def _run_enrich_all_covers(job_id: str, payload: dict, checkpoint: dict) -> None:
+    items = payload["items"]
+    start = checkpoint.get("next", 0)
+    success = checkpoint.get("success", 0)
+    failed = checkpoint.get("failed", 0)
+    for i, item in enumerate(items[start:], start):
         cover_url = None
         if _should_use_console_placeholder(item):
             cover_url = get_console_image(_placeholder_query(item))
@@ -355,6 +355,7 @@ async def _run_enrich_all_covers(job_id: str, items: list) -> None:
             success += 1
         else:
             failed += 1
+        jobs.checkpoint(job_id, {"next": i + 1, "success": success, "failed": failed}, progress=i + 1, success=success, failed=failed)
 
     finished_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
     set_app_meta("last_bulk_enrich_at", finished_at)
@@ -362,3 +363,6 @@ async def _run_enrich_all_covers(job_id: str, items: list) -> None:
     set_app_meta("last_bulk_enrich_failed", str(failed))
     set_app_meta("last_bulk_enrich_total", str(len(items)))
     jobs.finish(job_id, success=success, failed=failed)
+
+
+jobs.register("bulk_enrich", _run_enrich_all_covers)
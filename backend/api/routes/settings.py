@@ -1,11 +1,16 @@
 import os
 from pathlib import Path
 import re
+from typing import Optional
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
 from ...database import get_app_meta_many, get_db, set_app_meta
+from ...services.http_client import http_client_metrics
+from ...services.price.fx import eur_rate_on, fx_rate_status, refresh_fx_rates
+from ...services.price.pricecharting_cache import clear_pricecharting_cache, pricecharting_cache_stats
+from ...services.price.providers.pricecharting import search_variant_stats
 from ...version import APP_VERSION
 from ..security import admin_protection_status, require_admin_access
 
@@ -180,6 +185,11 @@ async def settings_info():
             "last_catalog_scrape_at",
             "last_catalog_scrape_platforms",
             "last_catalog_scrape_total",
+            "last_catalog_dedupe_at",
+            "last_catalog_dedupe_removed",
+            "last_price_history_compact_at",
+            "last_price_history_compact_removed",
+            "last_price_history_compact_bytes",
             "apscheduler_interval",
         ]
     )
@@ -242,11 +252,56 @@ async def settings_info():
         "last_catalog_scrape_at": _meta_value("last_catalog_scrape_at"),
         "last_catalog_scrape_platforms": _meta_value("last_catalog_scrape_platforms", ""),
         "last_catalog_scrape_total": int(_meta_value("last_catalog_scrape_total", 0) or 0),
+        "last_catalog_dedupe_at": _meta_value("last_catalog_dedupe_at"),
+        "last_catalog_dedupe_removed": int(_meta_value("last_catalog_dedupe_removed", 0) or 0),
+        "last_price_history_compact_at": _meta_value("last_price_history_compact_at"),
+        "last_price_history_compact_removed": int(_meta_value("last_price_history_compact_removed", 0) or 0),
+        "last_price_history_compact_bytes": int(_meta_value("last_price_history_compact_bytes", 0) or 0),
         **admin_status,
         **scheduler,
     }
 
 
+@router.get("/api/settings/http-clients")
+async def http_clients_info():
+    """Pool settings and per-host request / connection reuse counters for outbound HTTP."""
+    return http_client_metrics()
+
+
+@router.get("/api/settings/pricecharting-search")
+async def pricecharting_search_info():
+    """Per-variant hit rates of the PriceCharting search fallback, to tune the attempt order."""
+    return search_variant_stats()
+
+
+@router.get("/api/settings/pricecharting-cache")
+async def pricecharting_cache_info():
+    """Hit / revalidation counters and size of the PriceCharting response cache."""
+    return pricecharting_cache_stats()
+
+
+@router.delete("/api/settings/pricecharting-cache")
+async def clear_pricecharting_cache_entries(_admin: None = Depends(require_admin_access)):
+    clear_pricecharting_cache()
+    return {"ok": True}
+
+
+@router.get("/api/settings/fx-rate")
+async def fx_rate_info(day: Optional[str] = None):
+    """The cached USD -> EUR rate and its age; with `day` (YYYY-MM-DD) also the rate stored for that day."""
+    info = fx_rate_status()
+    if day:
+        info["day"] = day
+        info["day_rate"] = eur_rate_on(day)
+    return info
+
+
+@router.post("/api/settings/fx-rate/refresh")
+async def refresh_fx_rate(_admin: None = Depends(require_admin_access)):
+    rate = await refresh_fx_rates()
+    return {"ok": rate is not None, **fx_rate_status()}
+
+
 @router.post("/api/settings/secrets")
 async def update_secrets(payload: SecretsUpdate, _admin: None = Depends(require_admin_access)):
     updated = []
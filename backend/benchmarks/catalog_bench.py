@@ -0,0 +1,389 @@
+"""
+Catalog matching benchmark.
+
+Builds a synthetic price_catalog in a scratch SQLite database (migrated with
+alembic) and grows it through each requested size. At every size it measures:
+
+- _lookup_local_catalog_price: cold index build, lookups/sec, p50/p99 latency
+- match_catalog_batch: games/sec for the same query set
+- search_catalog: searches/sec, p50/p99 latency
+- _upsert_catalog_entries: rows/sec for a mixed update/insert batch
+- peak RSS of the process
+
+Results are written as JSON so runs can be diffed between commits:
+
+    python -m backend.benchmarks.catalog_bench --sizes 10000 100000 500000 --out bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform as _platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_WORDS = (
+    "dragon shadow legend star knight dark soul blood iron storm fire ice crystal dream quest "
+    "world kingdom empire war battle racer rally street fighter ninja samurai pirate space galaxy "
+    "planet robot mech zombie ghost spirit hunter sniper soldier commando tactics command hero "
+    "heroes saga chronicles tales odyssey journey adventure island city tower castle dungeon "
+    "master super mega ultra hyper turbo neon cyber pixel retro rogue wild lost forgotten eternal "
+    "final last first infinite silent crimson golden silver black white red blue green thunder "
+    "lightning wind ocean desert jungle mountain river valley forest frontier horizon edge rush "
+    "drift speed velocity nitro burnout kart party sports soccer football basketball hockey golf "
+    "tennis boxing wrestling skate surf snow extreme arena league champions cup pro tour manager "
+    "tycoon farm sim life story tale chronicle legacy origins rising fall return revenge redemption "
+    "awakening reborn unleashed forces strike force squad unit zero alpha omega prime nova "
+    "vortex phantom spectre wraith titan colossus giant dwarf elf orc wizard mage witch sorcerer "
+    "magic mystic arcane rune sword blade axe arrow bow shield crown throne realm"
+).split()
+_SUBTITLES = (
+    "the lost kingdom", "rise of the machines", "shadow of the past", "beyond the stars",
+    "the final chapter", "dark descent", "origins", "reloaded", "remastered", "definitive",
+)
+_EDITIONS = (
+    "Collector's Edition", "Limited Edition", "Game of the Year Edition", "Deluxe Edition",
+    "Greatest Hits", "Platinum", "Player's Choice", "Special Edition",
+)
+_ROMAN = ("II", "III", "IV", "V")
+_HARDWARE = ("Console", "Console Bundle", "System", "Slim Console", "Pro Console")
+_STORAGE = ("500GB", "1TB", "2TB", "32GB", "64GB", "825GB")
+# Rough share of real catalog rows per platform.
+_PLATFORM_WEIGHTS = {
+    "playstation 2": 10, "playstation": 7, "playstation 3": 7, "playstation 4": 7, "playstation 5": 3,
+    "nintendo switch": 7, "wii": 6, "nes": 5, "snes": 5, "gamecube": 4, "nintendo ds": 6,
+    "nintendo 3ds": 4, "game boy advance": 4, "game boy": 3, "game boy color": 3, "nintendo 64": 3,
+    "xbox 360": 6, "xbox": 4, "xbox one": 4, "psp": 3,
+}
+
+
+def _slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+class CatalogGenerator:
+    """Deterministic generator for realistic-looking price_catalog rows."""
+
+    def __init__(self, seed: int, platform_slugs: dict):
+        self.rng = random.Random(seed)
+        self.platforms = list(platform_slugs)
+        self.weights = [_PLATFORM_WEIGHTS.get(p, 1) for p in self.platforms]
+        self.slugs = platform_slugs
+        self.seen = set()
+        self.next_pc_id = 1
+
+    def title(self, platform: str) -> str:
+        rng = self.rng
+        if rng.random() < 0.02:
+            parts = [platform.title(), rng.choice(_HARDWARE)]
+            if rng.random() < 0.7: parts.append(rng.choice(_STORAGE))
+            if rng.random() < 0.3: parts.append("with " + " ".join(rng.sample(_WORDS, 2)).title())
+            return " ".join(parts)
+
+        title = " ".join(rng.sample(_WORDS, rng.choice((1, 2, 2, 3, 3, 4)))).title()
+        roll = rng.random()
+        if roll < 0.15: title += f" {rng.randint(2, 5)}"
+        elif roll < 0.22: title += f" {rng.choice(_ROMAN)}"
+        if rng.random() < 0.2: title += f": {rng.choice(_SUBTITLES).title()}"
+        if rng.random() < 0.08: title += f" [{rng.choice(_EDITIONS)}]"
+        if rng.random() < 0.04: title = title.replace(" And ", " & ")
+        return title
+
+    def entry(self) -> dict:
+        while True:
+            platform = self.rng.choices(self.platforms, self.weights)[0]
+            title = self.title(platform)
+            key = (platform, title.lower())
+            if key not in self.seen:
+                self.seen.add(key)
+                break
+        pc_id = str(self.next_pc_id)
+        self.next_pc_id += 1
+        loose = round(self.rng.lognormvariate(2.6, 0.9), 2)
+        return {
+            "pricecharting_id": pc_id,
+            "title": title,
+            "platform": platform,
+            "loose_usd": loose,
+            "cib_usd": round(loose * self.rng.uniform(1.2, 2.5), 2) if self.rng.random() < 0.8 else None,
+            "new_usd": round(loose * self.rng.uniform(2.0, 6.0), 2) if self.rng.random() < 0.5 else None,
+            "page_url": f"https://www.pricecharting.com/game/{self.slugs[platform]}/{_slugify(title)}",
+        }
+
+    def query_variant(self, title: str, platform: str) -> tuple:
+        """A (title, platform_name) a user might have typed for this catalog row."""
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.25:
+            variant = title
+        elif roll < 0.4:
+            variant = re.sub(r"\s*\[[^\]]*\]", "", title)
+        elif roll < 0.55:
+            variant = title.split(":")[0]
+        elif roll < 0.7:
+            variant = f"{title} {platform.title()}"
+        elif roll < 0.8:
+            variant = title.replace("&", "and").lower()
+        else:
+            chars = list(title)
+            pos = rng.randrange(len(chars))
+            chars[pos] = rng.choice("aeiourstn")
+            variant = "".join(chars)
+        return variant, platform.title()
+
+    def miss(self) -> tuple:
+        return " ".join(f"{w}x{self.rng.randint(10, 99)}" for w in self.rng.sample(_WORDS, 2)), "Nintendo Switch"
+
+
+def _populate(db_path: Path, gen: CatalogGenerator, count: int, eur_rate: float) -> None:
+    """Bulk insert rows directly; this is setup, not part of the measurement."""
+    from backend.services.price.utils import _catalog_norm_fields, _to_eur
+
+    con = sqlite3.connect(db_path)
+    try:
+        batch = []
+        for _ in range(count):
+            e = gen.entry()
+            batch.append((
+                e["pricecharting_id"], e["title"], e["platform"],
+                e["loose_usd"], e["cib_usd"], e["new_usd"],
+                _to_eur(e["loose_usd"], eur_rate), _to_eur(e["cib_usd"], eur_rate), _to_eur(e["new_usd"], eur_rate),
+                e["page_url"], *_catalog_norm_fields(e["title"], e["platform"]),
+            ))
+            if len(batch) >= 5000:
+                _insert_rows(con, batch)
+                batch = []
+        _insert_rows(con, batch)
+        con.commit()
+    finally:
+        con.close()
+
+
+def _insert_rows(con, rows: list) -> None:
+    con.executemany(
+        "INSERT INTO price_catalog (pricecharting_id, title, platform, loose_usd, cib_usd, new_usd, loose_eur, cib_eur, new_eur, page_url, norm_title, clean_title, norm_platform, scraped_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+        rows,
+    )
+
+
+def _sample_rows(db_path: Path, n: int, seed: int) -> list:
+    con = sqlite3.connect(db_path)
+    try:
+        max_id = con.execute("SELECT MAX(id) FROM price_catalog").fetchone()[0] or 0
+        rng = random.Random(seed)
+        ids = rng.sample(range(1, max_id + 1), min(n, max_id))
+        rows = []
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            rows.extend(con.execute(
+                f"SELECT pricecharting_id, title, platform, loose_usd, cib_usd, new_usd, page_url FROM price_catalog WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall())
+        return rows
+    finally:
+        con.close()
+
+
+def _latency_stats(samples: list) -> dict:
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "per_sec": round(len(samples) / total, 1) if total else None,
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3) if samples else None,
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3) if samples else None,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else None,
+    }
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _bench_size(db_path: Path, gen: CatalogGenerator, size: int, args, eur_rate: float) -> dict:
+    from backend.price_tracker import search_catalog
+    from backend.services.price.catalog import (
+        _lookup_local_catalog_price,
+        _upsert_catalog_entries,
+        match_catalog_batch,
+    )
+    from backend.services.price.catalog_index import invalidate_catalog_index
+
+    sampled = _sample_rows(db_path, args.queries, args.seed + size)
+    queries = [gen.query_variant(row[1], row[2]) for row in sampled]
+    queries += [gen.miss() for _ in range(max(1, args.queries // 10))]
+
+    invalidate_catalog_index()
+    started = time.perf_counter()
+    _lookup_local_catalog_price(*queries[0])
+    cold_build = time.perf_counter() - started
+
+    timings, hits = [], 0
+    for title, platform_name in queries:
+        started = time.perf_counter()
+        match = _lookup_local_catalog_price(title, platform_name)
+        timings.append(time.perf_counter() - started)
+        hits += 1 if match else 0
+    lookup = _latency_stats(timings)
+    lookup["hit_rate"] = round(hits / len(queries), 3)
+    lookup["cold_index_build_ms"] = round(cold_build * 1000, 1)
+
+    games = [{"id": i, "title": t, "platform_name": p} for i, (t, p) in enumerate(queries)]
+    started = time.perf_counter()
+    batch_matches = match_catalog_batch(games)
+    batch_seconds = time.perf_counter() - started
+
+    terms = [row[1].split(":")[0].split()[0] for row in sampled[:args.searches]]
+    search_timings = []
+    for term in terms:
+        started = time.perf_counter()
+        asyncio.run(search_catalog(search=term, limit=50))
+        search_timings.append(time.perf_counter() - started)
+
+    # Half refreshed rows with moved prices, half new rows, like a platform re-scrape.
+    half = args.upsert_batch // 2
+    upsert_entries = []
+    for row in _sample_rows(db_path, half, args.seed + size + 1):
+        pc_id, title, platform, loose, cib, new, page_url = row
+        upsert_entries.append({
+            "pricecharting_id": pc_id, "title": title, "platform": platform,
+            "loose_usd": round((loose or 0) * 1.05, 2), "cib_usd": cib, "new_usd": new, "page_url": page_url,
+        })
+    upsert_entries += [gen.entry() for _ in range(args.upsert_batch - len(upsert_entries))]
+    started = time.perf_counter()
+    upsert_stats = _upsert_catalog_entries(upsert_entries, eur_rate)
+    upsert_seconds = time.perf_counter() - started
+
+    con = sqlite3.connect(db_path)
+    rows = con.execute("SELECT COUNT(*) FROM price_catalog").fetchone()[0]
+    con.close()
+
+    return {
+        "size": size,
+        "rows": rows,
+        "lookup": lookup,
+        "batch_match": {
+            "games": len(games),
+            "games_per_sec": round(len(games) / batch_seconds, 1) if batch_seconds else None,
+            "seconds": round(batch_seconds, 3),
+            "hit_rate": round(len(batch_matches) / len(games), 3),
+        },
+        "search": _latency_stats(search_timings),
+        "upsert": {
+            "rows": len(upsert_entries),
+            "rows_per_sec": round(len(upsert_entries) / upsert_seconds, 1) if upsert_seconds else None,
+            "seconds": round(upsert_seconds, 3),
+            "stats": upsert_stats,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="collectabase_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "bench.db"
+    if db_path.exists():
+        db_path.unlink()
+
+    # Must be set before anything imports backend.db.session.
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+    if args.scorer:
+        os.environ["CATALOG_MATCH_SCORER"] = args.scorer
+
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
+
+    from backend.services.price.scoring import get_catalog_scorer
+    from backend.services.price.utils import PLATFORM_SLUGS
+
+    eur_rate = 0.92
+    gen = CatalogGenerator(args.seed, PLATFORM_SLUGS)
+    results = []
+    current = 0
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        _populate(db_path, gen, max(0, size - current), eur_rate)
+        populate_seconds = time.perf_counter() - started
+
+        result = _bench_size(db_path, gen, size, args, eur_rate)
+        result["populate_seconds"] = round(populate_seconds, 2)
+        results.append(result)
+        current = result["rows"]
+        print(
+            f"{size:>8} rows: lookup {result['lookup']['per_sec']}/s p50={result['lookup']['p50_ms']}ms "
+            f"p99={result['lookup']['p99_ms']}ms | batch {result['batch_match']['games_per_sec']}/s | "
+            f"search p50={result['search']['p50_ms']}ms | upsert {result['upsert']['rows_per_sec']} rows/s | "
+            f"rss {result['peak_rss_mb']}MB",
+            file=sys.stderr,
+        )
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            "python": _platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "scorer": get_catalog_scorer().name,
+            "seed": args.seed,
+            "queries": args.queries,
+            "searches": args.searches,
+            "upsert_batch": args.upsert_batch,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark catalog matching against a synthetic price_catalog.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--queries", type=int, default=2000, help="lookups per size (plus 10%% misses)")
+    parser.add_argument("--searches", type=int, default=200, help="search_catalog calls per size")
+    parser.add_argument("--upsert-batch", type=int, default=2000, help="entries per upsert run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scorer", choices=["reference", "tfidf"], help="override CATALOG_MATCH_SCORER")
+    parser.add_argument("--workdir", help="directory for the scratch database (default: temp dir)")
+    parser.add_argument("--out", help="write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -46,6 +46,7 @@ class CursorWrapper:
     def __init__(self, result):
         self.result = result
         self.lastrowid = getattr(result, "lastrowid", None)
+        self.rowcount = getattr(result, "rowcount", -1)
 
     def fetchone(self):
         row = self.result.fetchone()
@@ -66,10 +67,19 @@ class LegacyDBWrapper:
     def execute(self, statement: str, parameters=None):
         if parameters is None:
             parameters = ()
+        elif isinstance(parameters, list):
+            parameters = tuple(parameters)
         # exec_driver_sql passes raw SQL containing "?" directly to sqlite3
         result = self.conn.exec_driver_sql(statement, parameters)
         return CursorWrapper(result)
 
+    def executemany(self, statement: str, seq_of_parameters):
+        rows = [tuple(p) if isinstance(p, list) else p for p in seq_of_parameters]
+        if not rows:
+            return None
+        result = self.conn.exec_driver_sql(statement, rows)
+        return CursorWrapper(result)
+
     def commit(self):
         self.session.commit()
         
@@ -123,6 +133,22 @@ def set_app_meta(key: str, value: str):
         )
         db.commit()
 
+def table_exists(name: str) -> bool:
+    with get_db() as db:
+        row = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+        return row is not None
+
+def fts_phrase(text: Optional[str]) -> Optional[str]:
+    """Quote user input as an FTS5 phrase for the trigram tables.
+
+    Trigram phrases behave like LIKE '%text%', but need at least three characters;
+    callers fall back to LIKE when this returns None.
+    """
+    cleaned = " ".join(str(text or "").split())
+    if len(cleaned) < 3:
+        return None
+    return '"' + cleaned.replace('"', '""') + '"'
+
 # Database initialization logic is now handled by Alembic schema migrations.
 def init_db():
     pass
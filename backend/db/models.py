@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, LargeBinary, Text, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 
@@ -89,9 +89,56 @@ class PriceHistory(Base):
     eur_rate = Column(Float)
     pricecharting_id = Column(String)
     fetched_at = Column(String, server_default=func.current_timestamp())
+    last_confirmed_at = Column(String)
 
     game = relationship("Game", back_populates="price_history")
 
+    __table_args__ = (
+        Index("idx_price_history_game_source_fetched", game_id, source, fetched_at),
+        Index("idx_price_history_game_fetched", game_id, fetched_at),
+    )
+
+class GamePriceLatest(Base):
+    __tablename__ = "game_price_latest"
+
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
+    source = Column(String, primary_key=True)
+    price_history_id = Column(Integer, nullable=False)
+    loose_price = Column(Float)
+    complete_price = Column(Float)
+    new_price = Column(Float)
+    eur_rate = Column(Float)
+    pricecharting_id = Column(String)
+    fetched_at = Column(String)
+    last_confirmed_at = Column(String)
+
+class PriceHistoryRollup(Base):
+    __tablename__ = "price_history_rollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)
+    granularity = Column(String, nullable=False)
+    period_start = Column(String, nullable=False)
+    samples = Column(Integer, nullable=False, server_default="0")
+    loose_min = Column(Float)
+    loose_max = Column(Float)
+    loose_last = Column(Float)
+    complete_min = Column(Float)
+    complete_max = Column(Float)
+    complete_last = Column(Float)
+    new_min = Column(Float)
+    new_max = Column(Float)
+    new_last = Column(Float)
+    eur_rate = Column(Float)
+    pricecharting_id = Column(String)
+    first_fetched_at = Column(String)
+    last_fetched_at = Column(String)
+
+    __table_args__ = (
+        UniqueConstraint("game_id", "source", "granularity", "period_start", name="uq_price_history_rollup_period"),
+    )
+
 class PriceCatalog(Base):
     __tablename__ = "price_catalog"
 
@@ -108,12 +155,125 @@ class PriceCatalog(Base):
     page_url = Column(String)
     scraped_at = Column(String, server_default=func.current_timestamp())
     changed_at = Column(String)
+    norm_title = Column(String)
+    clean_title = Column(String)
+    norm_platform = Column(String)
 
     __table_args__ = (
         Index('idx_price_catalog_title', title, sqlite_where=None),
         Index('idx_price_catalog_platform', platform),
         Index('idx_price_catalog_platform_title', platform, title, sqlite_where=None),
         Index('idx_price_catalog_platform_pcid', platform, pricecharting_id),
+        Index('uq_price_catalog_platform_pcid', platform, pricecharting_id, unique=True, sqlite_where=pricecharting_id != ''),
+        Index('idx_price_catalog_platform_lower_title', platform, func.lower(title)),
+    )
+
+class PriceCatalogVersion(Base):
+    """Single row; triggers on price_catalog bump generation on every index-relevant write."""
+    __tablename__ = "price_catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, server_default="0", nullable=False)
+
+class GameCatalogMatch(Base):
+    __tablename__ = "game_catalog_match"
+
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
+    catalog_id = Column(Integer, ForeignKey("price_catalog.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float)
+    matched_at = Column(String, server_default=func.current_timestamp(), nullable=False)
+    matcher_version = Column(Integer, server_default="1", nullable=False)
+
+    __table_args__ = (
+        Index("idx_game_catalog_match_catalog_id", catalog_id),
+    )
+
+class CatalogCrawlState(Base):
+    __tablename__ = "catalog_crawl_state"
+
+    platform_slug = Column(String, primary_key=True)
+    platform_label = Column(String, nullable=False)
+    status = Column(String, nullable=False, server_default="running")
+    pages_done = Column(Integer, nullable=False, server_default="0")
+    entries_scraped = Column(Integer, nullable=False, server_default="0")
+    next_url = Column(String)
+    next_method = Column(String)
+    next_params = Column(Text)
+    seen_cursors = Column(Text)
+    last_signature = Column(Text)
+    page_size_hint = Column(Integer)
+    last_error = Column(Text)
+    started_at = Column(String, server_default=func.current_timestamp())
+    updated_at = Column(String, server_default=func.current_timestamp())
+    finished_at = Column(String)
+
+class HttpResponseCache(Base):
+    __tablename__ = "http_response_cache"
+
+    cache_key = Column(String, primary_key=True)
+    url = Column(String, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    etag = Column(String)
+    last_modified = Column(String)
+    fetched_at = Column(Float, nullable=False)
+    expires_at = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("idx_http_response_cache_expires_at", expires_at),
+    )
+
+class CatalogMiss(Base):
+    __tablename__ = "catalog_miss"
+
+    norm_title = Column(String, primary_key=True)
+    norm_platform = Column(String, primary_key=True, server_default="")
+    title = Column(String, nullable=False)
+    platform = Column(String, nullable=False, server_default="")
+    miss_count = Column(Integer, nullable=False, server_default="1")
+    first_missed_at = Column(String, server_default=func.current_timestamp())
+    last_missed_at = Column(String, server_default=func.current_timestamp())
+    next_retry_at = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("idx_catalog_miss_next_retry_at", next_retry_at),
+    )
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+
+    base = Column(String, primary_key=True)
+    quote = Column(String, primary_key=True)
+    rate_date = Column(String, primary_key=True)
+    rate = Column(Float, nullable=False)
+    fetched_at = Column(String, server_default=func.current_timestamp())
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    state = Column(String, nullable=False)
+    progress = Column(Integer, nullable=False, server_default="0")
+    total = Column(Integer, nullable=False, server_default="0")
+    success = Column(Integer, nullable=False, server_default="0")
+    failed = Column(Integer, nullable=False, server_default="0")
+    payload = Column(Text)
+    checkpoint = Column(Text)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="1")
+    lease_owner = Column(String)
+    lease_expires_at = Column(Float)
+    run_after = Column(Float)
+    heartbeat_at = Column(String)
+    created_at = Column(String, nullable=False)
+    started_at = Column(String)
+    finished_at = Column(String)
+    error = Column(Text)
+    result = Column(Text)
+
+    __table_args__ = (
+        Index("idx_jobs_state_run_after", state, run_after),
+        Index("idx_jobs_finished_at", finished_at),
     )
 
 class AppMeta(Base):
@@ -3,6 +3,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 def get_database_url() -> str:
+    # An explicit DATABASE_URL always wins (tests, benchmarks, custom deployments).
+    if os.getenv("DATABASE_URL"):
+        return os.environ["DATABASE_URL"]
+
     # Inside Docker, /app always exists – use the environment variable or a safe default.
     # SQLite absolute path on Linux needs 4 slashes: sqlite:////absolute/path
     if os.path.exists("/app"):
@@ -1,85 +1,518 @@
 """
-Lightweight in-memory job tracker for long-running background operations.
+Durable job queue for long-running background operations, backed by the jobs table.
 
 Usage:
-    job_id = jobs.start("bulk_price_update")
-    jobs.update(job_id, progress=5, total=100)
-    jobs.finish(job_id, success=5, failed=0)
+    jobs.register("bulk_price_update", handler)       # async handler(job_id, payload, checkpoint)
+    job_id = jobs.enqueue("bulk_price_update", {"games": [...]}, total=100)
+
+    # Inside the handler:
+    jobs.update(job_id, progress=5, success=4, failed=1)
+    jobs.checkpoint(job_id, {"done": [...]}, progress=5)   # persisted, handed back on resume
+    jobs.finish(job_id, success=5, failed=0, result={"skipped": 2})   # result is optional
 
     # In an API endpoint:
     status = jobs.get(job_id)   # {"id", "name", "state", "progress", "total", ...}
+
+    # Following a job as it runs:
+    with jobs.subscribe(job_id) as events:
+        delta = await events.get(timeout=15)   # {"id", ...changed fields}, None when idle
+
+Every process runs a worker loop (start_worker / stop_worker, from the app
+startup and shutdown hooks) that claims queued jobs with a lease. The lease is
+renewed by a heartbeat while the handler runs; a job whose lease runs out (the
+process died or was restarted) is claimed again and its handler gets the last
+checkpoint so it can skip finished items. A handler that raises is retried with
+exponential backoff up to max_attempts. Because state lives in SQLite, every
+uvicorn worker sees the same jobs.
+
+Every state change and progress update is also published in-process to
+subscribe() listeners (the SSE endpoints under /api/jobs). Each subscriber has a bounded
+buffer that coalesces deltas per job, so a slow client gets the latest state
+of each job rather than a growing backlog.
 """
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
 import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Awaitable, Callable, Dict, Literal, Optional, Set
+
+from .database import dict_from_row, get_db
+
+logger = logging.getLogger("collectabase.jobs")
+
+JobState = Literal["queued", "running", "done", "error"]
+Handler = Callable[[str, dict, dict], Awaitable[None]]
+
+LEASE_SECONDS = 60
+HEARTBEAT_SECONDS = 15
+POLL_SECONDS = 2.0
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 15 * 60
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_CONCURRENCY = 2
+# Progress-only updates are written at most this often per job; checkpoints and state changes always are.
+PROGRESS_WRITE_INTERVAL = 0.5
+# Keep only the last N completed jobs.
+_MAX_COMPLETED = 200
+# Jobs with undelivered deltas a subscriber may hold before the oldest is dropped.
+SUBSCRIBER_BUFFER = 64
+
+_PUBLIC_COLUMNS = (
+    "id", "name", "state", "progress", "total", "success", "failed",
+    "attempts", "max_attempts", "started_at", "finished_at", "error", "result",
+)
 
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
 
-JobState = Literal["running", "done", "error"]
+_handlers: Dict[str, Handler] = {}
+_last_progress_write: Dict[str, float] = {}
+_worker_task: Optional[asyncio.Task] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+_running: Dict[str, asyncio.Task] = {}
+_leases: Dict[str, str] = {}
+# The lease token of the claim a handler runs under; every task the handler starts inherits it.
+_current_lease: ContextVar[Optional[str]] = ContextVar("collectabase_job_lease", default=None)
+_subscribers: Set["Subscription"] = set()
 
-_store: Dict[str, Dict[str, Any]] = {}
-# Keep only the last N completed jobs to avoid unbounded memory growth
-_MAX_COMPLETED = 20
 
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
-def start(name: str, total: int = 0) -> str:
+
+def _concurrency() -> int:
+    try:
+        return max(1, int(os.getenv("JOB_WORKER_CONCURRENCY", "") or DEFAULT_CONCURRENCY))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+def register(name: str, handler: Handler) -> None:
+    _handlers[name] = handler
+
+
+def enqueue(name: str, payload: Optional[dict] = None, total: int = 0, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> str:
+    """Queue a job for the worker loop; `name` must have a registered handler."""
+    if name not in _handlers:
+        raise ValueError(f"No job handler registered for {name!r}")
     job_id = uuid.uuid4().hex
-    _store[job_id] = {
-        "id": job_id,
-        "name": name,
-        "state": "running",
-        "progress": 0,
-        "total": total,
-        "success": 0,
-        "failed": 0,
-        "started_at": datetime.now(timezone.utc).isoformat(),
-        "finished_at": None,
-        "error": None,
-    }
+    max_attempts = max(1, max_attempts)
+    with get_db() as db:
+        db.execute(
+            """
+            INSERT INTO jobs
+                (id, name, state, progress, total, success, failed, payload, attempts, max_attempts,
+                 run_after, created_at)
+            VALUES (?, ?, 'queued', 0, ?, 0, 0, ?, 0, ?, ?, ?)
+            """,
+            (job_id, name, total, json.dumps(payload or {}), max_attempts, time.time(), _now_iso()),
+        )
+        db.commit()
+    _publish({
+        "id": job_id, "name": name, "state": "queued", "progress": 0, "total": total, "success": 0, "failed": 0,
+        "attempts": 0, "max_attempts": max_attempts,
+    })
+    _wake()
     return job_id
 
 
-def update(job_id: str, *, progress: int, total: Optional[int] = None) -> None:
-    job = _store.get(job_id)
-    if not job:
+def update(
+    job_id: str,
+    *,
+    progress: int,
+    total: Optional[int] = None,
+    success: Optional[int] = None,
+    failed: Optional[int] = None,
+) -> None:
+    _publish(_progress_delta(job_id, progress, total, success, failed))
+    now = time.time()
+    if total is None and now - _last_progress_write.get(job_id, 0.0) < PROGRESS_WRITE_INTERVAL:
         return
-    job["progress"] = progress
-    if total is not None:
-        job["total"] = total
+    _last_progress_write[job_id] = now
+    _write_progress(job_id, progress, total, success, failed, None)
 
 
-def finish(job_id: str, *, success: int, failed: int) -> None:
-    job = _store.get(job_id)
-    if not job:
-        return
-    job["state"] = "done"
-    job["success"] = success
-    job["failed"] = failed
-    job["progress"] = job.get("total", 0)
-    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+def checkpoint(
+    job_id: str,
+    data: dict,
+    *,
+    progress: Optional[int] = None,
+    success: Optional[int] = None,
+    failed: Optional[int] = None,
+) -> None:
+    """Persist handler state (JSON-serializable) that a resumed run receives as `checkpoint`."""
+    _publish(_progress_delta(job_id, progress, None, success, failed))
+    _write_progress(job_id, progress, None, success, failed, json.dumps(data))
+
+
+def _progress_delta(job_id, progress, total, success, failed) -> dict:
+    delta = {"progress": progress, "total": total, "success": success, "failed": failed}
+    return {"id": job_id, **{key: value for key, value in delta.items() if value is not None}}
+
+
+# A job is only written by the run holding its current claim, so a run that lost its lease
+# (or a stale duplicate) cannot overwrite the run that claimed the job after it.
+_OWNED_BY_CALLER = "lease_owner = ?"
+
+
+def _write_progress(job_id, progress, total, success, failed, checkpoint_json) -> None:
+    with get_db() as db:
+        db.execute(
+            f"""
+            UPDATE jobs SET
+                progress = COALESCE(?, progress), total = COALESCE(?, total),
+                success = COALESCE(?, success), failed = COALESCE(?, failed),
+                checkpoint = COALESCE(?, checkpoint),
+                heartbeat_at = ?, lease_expires_at = ?
+            WHERE id = ? AND state = 'running' AND {_OWNED_BY_CALLER}
+            """,
+            (progress, total, success, failed, checkpoint_json, _now_iso(), time.time() + LEASE_SECONDS, job_id,
+             _current_lease.get()),
+        )
+        db.commit()
+
+
+def finish(job_id: str, *, success: int, failed: int, result: Optional[dict] = None) -> None:
+    """Mark the job done; `result` (JSON-serializable) is the handler's summary, returned by get()."""
+    _last_progress_write.pop(job_id, None)
+    with get_db() as db:
+        row = db.execute(
+            f"""
+            UPDATE jobs SET state = 'done', success = ?, failed = ?, progress = total, finished_at = ?,
+                lease_owner = NULL, lease_expires_at = NULL, error = NULL, result = ?
+            WHERE id = ? AND {_OWNED_BY_CALLER}
+            RETURNING progress, finished_at
+            """,
+            (success, failed, _now_iso(), json.dumps(result) if result is not None else None, job_id,
+             _current_lease.get()),
+        ).fetchone()
+        db.commit()
+    if row:
+        _publish({
+            "id": job_id, "state": "done", "progress": row["progress"], "success": success, "failed": failed,
+            "finished_at": row["finished_at"], "error": None, "result": result,
+        })
     _prune()
 
 
 def fail(job_id: str, *, message: str) -> None:
-    job = _store.get(job_id)
-    if not job:
-        return
-    job["state"] = "error"
-    job["error"] = message
-    job["finished_at"] = datetime.now(timezone.utc).isoformat()
+    _last_progress_write.pop(job_id, None)
+    finished_at = _now_iso()
+    with get_db() as db:
+        failed = db.execute(
+            f"""
+            UPDATE jobs SET state = 'error', error = ?, finished_at = ?, lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND {_OWNED_BY_CALLER}
+            """,
+            (message, finished_at, job_id, _current_lease.get()),
+        ).rowcount
+        db.commit()
+    if failed:
+        _publish({"id": job_id, "state": "error", "error": message, "finished_at": finished_at})
     _prune()
 
 
 def get(job_id: str) -> Optional[Dict[str, Any]]:
-    return _store.get(job_id)
+    with get_db() as db:
+        row = db.execute(f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _public(row) if row else None
 
 
 def list_active() -> list:
-    return [j for j in _store.values() if j["state"] == "running"]
+    with get_db() as db:
+        rows = db.execute(
+            f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs WHERE state IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+    return [_public(row) for row in rows]
+
+
+def _public(row) -> Dict[str, Any]:
+    job = dict_from_row(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
 
 
 def _prune() -> None:
-    """Remove oldest completed jobs when we exceed the limit."""
-    completed = [j for j in _store.values() if j["state"] != "running"]
-    completed.sort(key=lambda j: j.get("finished_at") or "", reverse=True)
-    for job in completed[_MAX_COMPLETED:]:
-        _store.pop(job["id"], None)
+    """Remove the oldest completed jobs beyond the limit."""
+    with get_db() as db:
+        db.execute(
+            """
+            DELETE FROM jobs WHERE state IN ('done', 'error') AND id NOT IN (
+                SELECT id FROM jobs WHERE state IN ('done', 'error') ORDER BY finished_at DESC LIMIT ?
+            )
+            """,
+            (_MAX_COMPLETED,),
+        )
+        db.commit()
+
+
+# ---------------------------------------------------------------------------
+# Event stream
+# ---------------------------------------------------------------------------
+
+class Subscription:
+    """Buffered deltas for one listener; use as a context manager around get()."""
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.loop = asyncio.get_running_loop()
+        self.pending: "OrderedDict[str, dict]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, delta: dict) -> None:
+        # Deltas for a job that is still waiting are merged into one, so the buffer grows with
+        # the number of jobs, not the number of updates; past the limit the stalest job is dropped.
+        merged = self.pending.pop(delta["id"], {})
+        merged.update(delta)
+        self.pending[delta["id"]] = merged
+        while len(self.pending) > SUBSCRIBER_BUFFER:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.ready.set()
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """The next delta ({"id", ...changed fields}), or None after `timeout` seconds without one."""
+        if not self.pending:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        _, delta = self.pending.popitem(last=False)
+        return delta
+
+    def close(self) -> None:
+        _subscribers.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def subscribe(job_id: Optional[str] = None) -> Subscription:
+    """
+    Listen to deltas published by this process, for one job or, without `job_id`,
+    for all of them. Must be called from a running event loop; publishers on other
+    threads hand their deltas over to it.
+    """
+    subscription = Subscription(job_id)
+    _subscribers.add(subscription)
+    return subscription
+
+
+def _publish(delta: dict) -> None:
+    if not _subscribers:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    for subscription in list(_subscribers):
+        if subscription.job_id is not None and subscription.job_id != delta["id"]:
+            continue
+        if subscription.loop is running:
+            subscription.push(dict(delta))
+        elif not subscription.loop.is_closed():
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, dict(delta))
+            except RuntimeError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# Worker loop
+# ---------------------------------------------------------------------------
+
+def _claim() -> Optional[dict]:
+    """
+    Atomically take the oldest runnable job: queued and due, or running with an expired lease.
+    Jobs this process is still running are skipped even if their lease expired (a handler that
+    blocked the loop past its heartbeat), so one process never runs two copies of a job.
+    """
+    now = time.time()
+    lease = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+    running_ids = list(_running)
+    with get_db() as db:
+        row = db.execute(
+            f"""
+            UPDATE jobs SET state = 'running', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1,
+                started_at = COALESCE(started_at, ?), heartbeat_at = ?
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE ((state = 'queued' AND run_after <= ?) OR (state = 'running' AND lease_expires_at < ?))
+                  AND id NOT IN ({",".join("?" * len(running_ids))})
+                ORDER BY created_at LIMIT 1
+            )
+            RETURNING id, name, payload, checkpoint, attempts, max_attempts, started_at, lease_owner AS lease
+            """,
+            (lease, now + LEASE_SECONDS, _now_iso(), _now_iso(), now, now, *running_ids),
+        ).fetchone()
+        db.commit()
+    if not row:
+        return None
+    job = dict_from_row(row)
+    _publish({
+        "id": job["id"], "name": job["name"], "state": "running",
+        "attempts": job["attempts"], "started_at": job["started_at"],
+    })
+    return job
+
+
+def _renew_lease(job_id: str, lease: str) -> bool:
+    with get_db() as db:
+        renewed = db.execute(
+            "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ? WHERE id = ? AND lease_owner = ? AND state = 'running'",
+            (time.time() + LEASE_SECONDS, _now_iso(), job_id, lease),
+        ).rowcount
+        db.commit()
+    return renewed > 0
+
+
+def _retry_or_fail(job: dict, message: str) -> None:
+    if job["attempts"] >= job["max_attempts"]:
+        fail(job["id"], message=message)
+        return
+    delay = min(RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), RETRY_MAX_SECONDS)
+    with get_db() as db:
+        requeued = db.execute(
+            """
+            UPDATE jobs SET state = 'queued', error = ?, run_after = ?, lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ?
+            """,
+            (message, time.time() + delay, job["id"], job["lease"]),
+        ).rowcount
+        db.commit()
+    if not requeued:
+        return
+    _publish({"id": job["id"], "state": "queued", "error": message})
+    logger.warning(f"Job {job['name']} {job['id']} failed (attempt {job['attempts']}), retrying in {delay}s: {message}")
+
+
+def _release(job_id: str, lease: str) -> None:
+    """Hand a job interrupted by shutdown back to the queue without using up an attempt."""
+    with get_db() as db:
+        released = db.execute(
+            """
+            UPDATE jobs SET state = 'queued', run_after = ?, attempts = MAX(attempts - 1, 0),
+                lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ? AND state = 'running'
+            """,
+            (time.time(), job_id, lease),
+        ).rowcount
+        db.commit()
+    if not released:
+        return
+    _publish({"id": job_id, "state": "queued"})
+
+
+async def _run(job: dict) -> None:
+    job_id = job["id"]
+    _current_lease.set(job["lease"])
+    handler = _handlers.get(job["name"])
+    if handler is None:
+        fail(job_id, message=f"No job handler registered for {job['name']!r}")
+        return
+
+    payload = json.loads(job["payload"]) if job["payload"] else {}
+    checkpoint_data = json.loads(job["checkpoint"]) if job["checkpoint"] else {}
+    task = asyncio.create_task(handler(job_id, payload, checkpoint_data))
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            if not _renew_lease(job_id, job["lease"]):
+                logger.warning(f"Job {job_id} lost its lease, stopping it here")
+                task.cancel()
+                return
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        await task
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            task.cancel()
+        raise
+    except Exception as e:
+        logger.error(f"Job {job['name']} {job_id} raised: {e}", exc_info=True)
+        _retry_or_fail(job, str(e) or type(e).__name__)
+    else:
+        current = get(job_id)
+        if current and current["state"] == "running":
+            finish(job_id, success=current["success"], failed=current["failed"])
+    finally:
+        beat.cancel()
+
+
+def _forget(job_id: str, task: asyncio.Task) -> None:
+    if _running.get(job_id) is task:
+        _running.pop(job_id, None)
+        _leases.pop(job_id, None)
+    _wake()
+
+
+def _wake() -> None:
+    if _wakeup is None or _worker_loop is None or _worker_loop.is_closed():
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _worker_loop:
+        _wakeup.set()
+    else:
+        _worker_loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def _worker() -> None:
+    while True:
+        try:
+            while len(_running) < _concurrency():
+                job = _claim()
+                if not job:
+                    break
+                logger.info(f"Job {job['name']} {job['id']} claimed (attempt {job['attempts']})")
+                task = asyncio.create_task(_run(job))
+                _running[job["id"]] = task
+                _leases[job["id"]] = job["lease"]
+                task.add_done_callback(lambda _t, job_id=job["id"]: _forget(job_id, _t))
+        except Exception as e:
+            logger.error(f"Job worker loop error: {e}", exc_info=True)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_worker() -> None:
+    global _worker_task, _worker_loop, _wakeup
+    if _worker_task is not None and not _worker_task.done():
+        return
+    _worker_loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    _worker_task = _worker_loop.create_task(_worker())
+    logger.info(f"Job worker {WORKER_ID} started (concurrency {_concurrency()})")
+
+
+async def stop_worker() -> None:
+    global _worker_task
+    if _worker_task is None:
+        return
+    _worker_task.cancel()
+    for job_id, task in list(_running.items()):
+        task.cancel()
+        _release(job_id, _leases[job_id])
+    await asyncio.gather(_worker_task, *_running.values(), return_exceptions=True)
+    _running.clear()
+    _leases.clear()
+    _worker_task = None
@@ -21,9 +21,11 @@ from .api.routes.lots import router as lots_router
 from .api.routes.settings import router as settings_router
 from .api.routes.stats import router as stats_router
 from .clz_import import router as clz_router
+from . import jobs
 from .database import init_db
 from .price_tracker import router as price_router
 from .scheduler import init_scheduler, shutdown_scheduler
+from .services.http_client import close_http_clients, init_http_clients
 
 
 app = FastAPI(title="Collectabase", version=APP_VERSION)
@@ -56,11 +58,15 @@ app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    init_http_clients()
     init_scheduler()
+    jobs.start_worker()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await jobs.stop_worker()
     shutdown_scheduler()
+    await close_http_clients()
 
 
 @app.get("/api/health")
@@ -1,22 +1,35 @@
 import asyncio
+import json
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from .api.security import require_admin_access
-from .database import dict_from_row, get_db, set_app_meta
+from .database import dict_from_row, fts_phrase, get_db, set_app_meta, table_exists
 from . import jobs
 
 from .services.price.utils import (
-    PLATFORM_SLUGS, _to_eur, get_eur_rate, _normalize_text
+    PLATFORM_SLUGS, _env_any, _to_eur, _normalize_text
 )
 from .services.price.catalog import (
-    _lookup_local_catalog_price, scrape_platform_catalog,
+    match_catalog_batch, resolve_catalog_prices, save_catalog_links, scrape_catalog_platforms,
     _upsert_catalog_entries, _derive_platform_label
 )
+from .services.price.catalog_index import invalidate_catalog_index
+from .services.price.catalog_maintenance import dedupe_price_catalog
+from .services.price.catalog_misses import (
+    clear_catalog_misses, list_catalog_misses, miss_key, pending_catalog_misses
+)
+from .services.price.crawl_state import list_crawl_states
+from .services.price.freshness import plan_catalog_refresh
+from .services.price.fx import get_eur_rate
+from .services.price.history_retention import compact_price_history, price_history_entries
+from .services.price.latest_prices import refresh_latest_prices
+from .services.price.price_writer import PriceWriter
 from .services.price.providers.ebay import fetch_ebay_market_price, _ebay_credentials
 from .services.price.providers.rawg import fetch_rawg_reference, _rawg_key
 from .services.price.providers.pricecharting import (
@@ -27,6 +40,12 @@ router = APIRouter()
 
 logger = logging.getLogger("collectabase.price_tracker")
 
+# Concurrent PriceCharting lookups in a bulk price update (BULK_PRICE_WORKERS);
+# they all share the pricecharting.com request budget.
+DEFAULT_BULK_PRICE_WORKERS = 3
+# Bulk price updates persist a resume checkpoint after this many looked-up games.
+CHECKPOINT_EVERY = 25
+
 def _get_game_for_price_lookup(game_id: int):
     with get_db() as db:
         row = db.execute(
@@ -58,16 +77,8 @@ async def fetch_market_price(game_id: int, source: Optional[str] = None):
             return {"error": "eBay is not configured in Settings."}
         ebay = await fetch_ebay_market_price(game["title"], game.get("platform_name") or "", item_type)
         if ebay:
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate)
-                    VALUES (?, 'ebay', ?, NULL, NULL, 1.0)
-                    """,
-                    (game_id, ebay["market_price"]),
-                )
-                db.commit()
+            with PriceWriter() as writer:
+                writer.add(game_id, "ebay", ebay["market_price"], None, None)
             return {
                 "market_price": ebay["market_price"],
                 "source": "ebay",
@@ -78,27 +89,14 @@ async def fetch_market_price(game_id: int, source: Optional[str] = None):
         return {"error": "No eBay listings found for this game."}
 
     if is_pc_supported:
-        catalog = _lookup_local_catalog_price(game["title"], game.get("platform_name") or "")
-        if not catalog:
-            # Retry without platform constraint for mismatched/legacy platform labels.
-            catalog = _lookup_local_catalog_price(game["title"], "")
+        # Stored match link first, then fuzzy match (retrying without the platform constraint).
+        catalog = resolve_catalog_prices([game]).get(game_id)
         if catalog:
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id)
-                    VALUES (?, 'pricecharting', ?, ?, ?, 1.0, ?)
-                    """,
-                    (
-                        game_id,
-                        catalog["loose_eur"],
-                        catalog["cib_eur"],
-                        catalog["new_eur"],
-                        catalog["pricecharting_id"] or None,
-                    ),
+            with PriceWriter() as writer:
+                writer.add(
+                    game_id, "pricecharting", catalog["loose_eur"], catalog["cib_eur"], catalog["new_eur"],
+                    pricecharting_id=catalog["pricecharting_id"] or None,
                 )
-                db.commit()
             return {
                 "market_price": catalog["loose_eur"],
                 "source": "pricecharting",
@@ -116,31 +114,15 @@ async def fetch_market_price(game_id: int, source: Optional[str] = None):
             loose_eur = _to_eur(pc["loose_usd"], eur_rate)
             cib_eur = _to_eur(pc["cib_usd"], eur_rate)
             new_eur = _to_eur(pc["new_usd"], eur_rate)
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id)
-                    VALUES (?, 'pricecharting', ?, ?, ?, ?, ?)
-                    """,
-                    (game_id, loose_eur, cib_eur, new_eur, eur_rate, pc["pricecharting_id"]),
-                )
-                db.commit()
+            with PriceWriter() as writer:
+                writer.add(game_id, "pricecharting", loose_eur, cib_eur, new_eur, eur_rate, pc["pricecharting_id"])
             return {"market_price": loose_eur, "source": "pricecharting", "condition": "loose"}
 
     if ebay_enabled:
         ebay = await fetch_ebay_market_price(game["title"], game.get("platform_name") or "", item_type)
         if ebay:
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate)
-                    VALUES (?, 'ebay', ?, NULL, NULL, 1.0)
-                    """,
-                    (game_id, ebay["market_price"]),
-                )
-                db.commit()
+            with PriceWriter() as writer:
+                writer.add(game_id, "ebay", ebay["market_price"], None, None)
             return {
                 "market_price": ebay["market_price"],
                 "source": "ebay",
@@ -169,19 +151,9 @@ async def check_price(game_id: int):
 
 
 @router.get("/api/games/{game_id}/price-history")
-async def get_price_history(game_id: int):
-    """Return the last 20 price snapshots for a game."""
-    with get_db() as db:
-        rows = db.execute(
-            """
-            SELECT * FROM price_history
-            WHERE game_id = ?
-            ORDER BY fetched_at DESC
-            LIMIT 20
-            """,
-            (game_id,),
-        ).fetchall()
-        return [dict_from_row(r) for r in rows]
+async def get_price_history(game_id: int, limit: int = 20):
+    """Return the newest price entries for a game: raw snapshots, then daily / weekly rollups of older ones."""
+    return price_history_entries(game_id, max(1, min(limit, 500)))
 
 
 @router.delete("/api/games/{game_id}/price-history/{entry_id}")
@@ -198,18 +170,19 @@ async def delete_price_history_entry(game_id: int, entry_id: int):
         if int(item["game_id"]) != int(game_id):
             raise HTTPException(status_code=404, detail="Price history entry not found for this game")
         db.execute("DELETE FROM price_history WHERE id = ?", (entry_id,))
+        refresh_latest_prices(db, [game_id])
         db.commit()
     return {"ok": True}
 
 
 @router.post("/api/prices/update-all")
 async def bulk_price_update(
-    background_tasks: BackgroundTasks,
     limit: int = 100,
     _admin: None = Depends(require_admin_access),
 ):
     """Kick off a background job to fetch prices for up to `limit` games.
-    Returns immediately with a job_id. Poll /api/jobs/{job_id} for progress.
+    Returns immediately with a job_id. Follow /api/jobs/{job_id}/events (or poll
+    /api/jobs/{job_id}) for progress.
     """
     with get_db() as db:
         try:
@@ -238,76 +211,134 @@ async def bulk_price_update(
             ).fetchall()
         game_list = [dict_from_row(r) for r in rows]
 
-    job_id = jobs.start("bulk_price_update", total=len(game_list))
-    background_tasks.add_task(_run_bulk_price_update, job_id, game_list)
-    return {"job_id": job_id, "total": len(game_list), "state": "running"}
-
-
-async def _run_bulk_price_update(job_id: str, game_list: list) -> None:
-    eur_rate = await get_eur_rate()
-    success = 0
-    failed = 0
+    job_id = jobs.enqueue("bulk_price_update", {"games": game_list}, total=len(game_list))
+    return {"job_id": job_id, "total": len(game_list), "state": "queued"}
 
-    for i, game in enumerate(game_list):
-        jobs.update(job_id, progress=i + 1)
 
-        item_type = game.get("item_type") or "game"
-        is_pc_supported = item_type in ("game", "console", "controller", "accessory", "funko", "comic")
-        
-        if not is_pc_supported:
-            failed += 1
-            await asyncio.sleep(0.01)
-            continue
+def _bulk_price_workers() -> int:
+    try:
+        return max(1, int(_env_any("BULK_PRICE_WORKERS") or DEFAULT_BULK_PRICE_WORKERS))
+    except ValueError:
+        return DEFAULT_BULK_PRICE_WORKERS
 
-        catalog = _lookup_local_catalog_price(game["title"], game.get("platform_name") or "")
-        if not catalog:
-            catalog = _lookup_local_catalog_price(game["title"], "")
 
-        if catalog:
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id)
-                    VALUES (?, 'pricecharting', ?, ?, ?, 1.0, ?)
-                    """,
-                    (
-                        game["id"],
-                        catalog["loose_eur"],
-                        catalog["cib_eur"],
-                        catalog["new_eur"],
-                        catalog["pricecharting_id"] or None,
-                    ),
-                )
-                db.commit()
-            success += 1
-            await asyncio.sleep(0.1)
-            continue
+async def _run_bulk_price_update(job_id: str, payload: dict, checkpoint: dict) -> None:
+    """
+    Games are walked in order: local catalog matches are written straight away,
+    the rest go through a bounded queue to a small worker pool that looks them
+    up on PriceCharting (paced by the shared limiter). Every price goes through
+    one batched PriceWriter, which is flushed before each checkpoint so a resumed
+    run only skips games whose price is stored.
+    """
+    game_list = payload["games"]
+    # Progress is kept by position in game_list: everything before `next` is done, plus the
+    # ranges in `ahead`. Games are handed out in order and the remote queue is bounded, so only
+    # a few lookups are ever outstanding and the checkpoint stays a handful of ranges.
+    low = checkpoint.get("next", 0)
+    ahead = {pos for first, last in checkpoint.get("ahead", []) for pos in range(first, last + 1)}
+    success = checkpoint.get("success", 0)
+    failed = checkpoint.get("failed", 0)
+    done = low + len(ahead)
+    pending = [(pos, game_list[pos]) for pos in range(low, len(game_list)) if pos not in ahead]
+    pending_games = [game for _, game in pending]
 
-        pc = await fetch_pricecharting(game["title"], game["platform_name"] or "")
-        if pc:
-            with get_db() as db:
-                db.execute(
-                    """
-                    INSERT INTO price_history
-                        (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id)
-                    VALUES (?, 'pricecharting', ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        game["id"],
-                        _to_eur(pc["loose_usd"], eur_rate),
-                        _to_eur(pc["cib_usd"], eur_rate),
-                        _to_eur(pc["new_usd"], eur_rate),
-                        eur_rate,
-                        pc["pricecharting_id"],
-                    ),
-                )
-                db.commit()
-            success += 1
+    eur_rate = await get_eur_rate()
+    # Both are synchronous DB and matching passes over the whole batch; keep them off the loop.
+    catalog_matches = await asyncio.to_thread(resolve_catalog_prices, pending_games)
+    known_misses = await asyncio.to_thread(
+        pending_catalog_misses, [(g["title"], g["platform_name"]) for g in pending_games]
+    )
+    workers = _bulk_price_workers()
+    queue = asyncio.Queue(maxsize=2 * workers)
+    last_saved = done
+
+    def mark_done(pos: int) -> None:
+        nonlocal low, done
+        done += 1
+        ahead.add(pos)
+        while low in ahead:
+            ahead.discard(low)
+            low += 1
+
+    def ahead_ranges() -> list:
+        ranges = []
+        for pos in sorted(ahead):
+            if ranges and ranges[-1][1] == pos - 1:
+                ranges[-1][1] = pos
+            else:
+                ranges.append([pos, pos])
+        return ranges
+
+    async def save_checkpoint():
+        nonlocal last_saved
+        last_saved = done
+        # Snapshot the progress before flushing: every game it counts as done has its row in
+        # the batch being flushed, even if other workers finish more games while it is written.
+        state = {"next": low, "ahead": ahead_ranges(), "success": success, "failed": failed}
+        progress = done
+        await writer.aflush()
+        jobs.checkpoint(job_id, state, progress=progress, success=state["success"], failed=state["failed"])
+
+    async def report(pos: int) -> None:
+        mark_done(pos)
+        if done - last_saved >= CHECKPOINT_EVERY:
+            await save_checkpoint()
         else:
-            failed += 1
-
-        await asyncio.sleep(0.4)  # stay polite to PriceCharting.
+            jobs.update(job_id, progress=done, success=success, failed=failed)
+
+    async with PriceWriter() as writer:
+        async def produce():
+            nonlocal success, failed
+            for pos, game in pending:
+                item_type = game.get("item_type") or "game"
+                is_pc_supported = item_type in ("game", "console", "controller", "accessory", "funko", "comic")
+                catalog = catalog_matches.get(game["id"]) if is_pc_supported else None
+
+                if catalog:
+                    await writer.aadd(
+                        game["id"], "pricecharting",
+                        catalog["loose_eur"], catalog["cib_eur"], catalog["new_eur"],
+                        1.0, catalog["pricecharting_id"] or None,
+                    )
+                    success += 1
+                elif is_pc_supported and miss_key(game["title"], game["platform_name"]) not in known_misses:
+                    await queue.put((pos, game))
+                    continue
+                else:
+                    # Unsupported type, or PriceCharting had nothing for this title recently.
+                    failed += 1
+                await report(pos)
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def worker():
+            nonlocal success, failed
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                pos, game = item
+                try:
+                    pc = await fetch_pricecharting(game["title"], game["platform_name"] or "")
+                except Exception as e:
+                    logger.warning(f"Bulk price lookup failed for game {game['id']}: {e}")
+                    pc = None
+                if pc:
+                    await writer.aadd(
+                        game["id"], "pricecharting",
+                        _to_eur(pc["loose_usd"], eur_rate), _to_eur(pc["cib_usd"], eur_rate), _to_eur(pc["new_usd"], eur_rate),
+                        eur_rate, pc["pricecharting_id"],
+                    )
+                    success += 1
+                else:
+                    failed += 1
+                await report(pos)
+
+        # A TaskGroup cancels the rest if one side fails, so the producer never waits on a dead queue.
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(workers):
+                group.create_task(worker())
 
     finished_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
     set_app_meta("last_bulk_price_update_at", finished_at)
@@ -318,6 +349,88 @@ async def _run_bulk_price_update(job_id: str, game_list: list) -> None:
     jobs.finish(job_id, success=success, failed=failed)
 
 
+jobs.register("bulk_price_update", _run_bulk_price_update)
+
+
+JOB_EVENTS_IDLE_SECONDS = 15.0
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse(data: dict) -> str:
+    return f"event: job\ndata: {json.dumps(data)}\n\n"
+
+
+async def _job_events(request: Request, job_id: Optional[str]):
+    """
+    The current state of the job (or of every active job) first, then only the
+    fields that changed. Deltas come from the in-process pub/sub; a job run by
+    another worker process publishes there, so while the stream is idle the table
+    is read again and any difference is sent the same way.
+    """
+    known = {}
+
+    def diff(row: dict) -> Optional[dict]:
+        previous = known.get(row["id"], {})
+        changed = {key: value for key, value in row.items() if key == "id" or previous.get(key) != value}
+        current = {**previous, **row}
+        if current.get("state") in ("done", "error") and job_id is None:
+            known.pop(row["id"], None)
+        else:
+            known[row["id"]] = current
+        return changed if len(changed) > 1 else None
+
+    def reread() -> list:
+        if job_id is not None:
+            row = jobs.get(job_id)
+            return [row] if row else []
+        rows = jobs.list_active()
+        active = {row["id"] for row in rows}
+        for stale_id in [key for key in known if key not in active]:
+            row = jobs.get(stale_id)
+            if row:
+                rows.append(row)
+            else:
+                known.pop(stale_id, None)
+        return rows
+
+    with jobs.subscribe(job_id) as events:
+        for row in await asyncio.to_thread(reread):
+            yield _sse(diff(row) or row)
+        while job_id is None or known.get(job_id, {}).get("state") not in ("done", "error"):
+            # Checked every turn: a busy job keeps deltas coming, so the idle branch alone would
+            # keep a gone client's subscription alive until the job finishes.
+            if await request.is_disconnected():
+                return
+            delta = await events.get(timeout=JOB_EVENTS_IDLE_SECONDS)
+            if delta is None:
+                rows = await asyncio.to_thread(reread)
+                if job_id is not None and not rows:
+                    return
+                changes = [change for change in map(diff, rows) if change]
+                for change in changes:
+                    yield _sse(change)
+                if not changes:
+                    yield ": keep-alive\n\n"
+                continue
+            change = diff(delta)
+            if change:
+                yield _sse(change)
+
+
+@router.get("/api/jobs/events")
+async def stream_all_job_events(request: Request):
+    """Server-Sent Events for every job: active jobs first, then their changes."""
+    return StreamingResponse(_job_events(request, None), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@router.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-Sent Events for one job; the stream ends once the job is done or failed."""
+    if not jobs.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(_job_events(request, job_id), media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
 @router.get("/api/jobs/{job_id}")
 async def get_job_status(job_id: str):
     """Poll the status of a background job."""
@@ -329,7 +442,7 @@ async def get_job_status(job_id: str):
 
 @router.get("/api/jobs")
 async def list_active_jobs():
-    """Return all currently running background jobs."""
+    """Return all queued and running background jobs."""
     return jobs.list_active()
 
 
@@ -360,6 +473,7 @@ async def add_manual_price(game_id: int, entry: ManualPriceEntry):
             """,
             (game_id, entry.loose_price, entry.complete_price, entry.new_price),
         )
+        refresh_latest_prices(db, [game_id])
         db.commit()
     return {"ok": True}
 
@@ -397,8 +511,12 @@ async def apply_catalog_price(game_id: int, payload: CatalogPriceApply):
                 (loose, game_id),
             )
 
+        refresh_latest_prices(db, [game_id])
         db.commit()
 
+    # A hand-picked catalog entry becomes the game's match link for future refreshes.
+    save_catalog_links({game_id: {"catalog_id": item["id"], "match_score": 1.0}})
+
     return {
         "ok": True,
         "market_price": loose,
@@ -434,7 +552,6 @@ async def scrape_catalog(
                 "updated": 0,
                 "unchanged": 0,
                 "deduped_in_batch": 0,
-                "duplicates_removed": 0,
                 "platforms": [platform_hint] if platform_hint else [],
                 "query": query,
                 "targeted": True,
@@ -459,7 +576,6 @@ async def scrape_catalog(
             "updated": stats["updated"],
             "unchanged": stats["unchanged"],
             "deduped_in_batch": stats["deduped_in_batch"],
-            "duplicates_removed": stats["duplicates_removed"],
             "platforms": [resolved_platform],
             "query": query,
             "targeted": True,
@@ -488,24 +604,13 @@ async def scrape_catalog(
     total_updated = 0
     total_unchanged = 0
     total_deduped_in_batch = 0
-    total_duplicates_removed = 0
 
-    for label, slug in targets:
-        print(f"Starting catalog scrape for {label} ({slug})")
-        entries = await scrape_platform_catalog(slug, label)
-        stats = _upsert_catalog_entries(entries, eur_rate)
+    for _label, stats in await scrape_catalog_platforms(targets, eur_rate):
         total_scraped += stats["processed"]
         total_inserted += stats["inserted"]
         total_updated += stats["updated"]
         total_unchanged += stats["unchanged"]
         total_deduped_in_batch += stats["deduped_in_batch"]
-        total_duplicates_removed += stats["duplicates_removed"]
-        print(
-            f"Finished {label}: processed={stats['processed']} inserted={stats['inserted']} "
-            f"updated={stats['updated']} unchanged={stats['unchanged']}"
-        )
-        if len(targets) > 1:
-            await asyncio.sleep(2.0)  # pause between platforms when scraping all
 
     result = {
         "scraped": total_scraped,
@@ -513,7 +618,6 @@ async def scrape_catalog(
         "updated": total_updated,
         "unchanged": total_unchanged,
         "deduped_in_batch": total_deduped_in_batch,
-        "duplicates_removed": total_duplicates_removed,
         "platforms": [lbl for lbl, _ in targets],
     }
     finished_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
@@ -557,8 +661,13 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
     games = [dict_from_row(r) for r in rows]
     scanned = len(games)
     skipped_existing = 0
+    skipped_misses = 0
     failed = 0
     fetched_entries = []
+    catalog_matches = await asyncio.to_thread(match_catalog_batch, games)
+    known_misses = await asyncio.to_thread(
+        pending_catalog_misses, [(g["title"], g["platform_name"]) for g in games]
+    )
 
     for game in games:
         title = (game.get("title") or "").strip()
@@ -566,17 +675,19 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
         if not title:
             continue
 
-        existing = _lookup_local_catalog_price(title, platform_name)
-        if not existing:
-            existing = _lookup_local_catalog_price(title, "")
+        existing = catalog_matches.get(game["id"])
         if existing and float(existing.get("match_score") or 0) >= 0.9:
             skipped_existing += 1
             continue
 
+        if miss_key(title, platform_name) in known_misses:
+            skipped_misses += 1
+            continue
+
+        # Pacing comes from the shared PriceCharting limiter; cached lookups need none.
         scraped = await _fetch_pricecharting_scrape(title, platform_name)
         if not scraped:
             failed += 1
-            await asyncio.sleep(0.35)
             continue
 
         resolved_platform = (
@@ -595,7 +706,6 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
                 "page_url": scraped.get("page_url") or "",
             }
         )
-        await asyncio.sleep(0.5)
 
     eur_rate = await get_eur_rate()
     stats = _upsert_catalog_entries(fetched_entries, eur_rate)
@@ -612,6 +722,7 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
         "library": True,
         "scanned": scanned,
         "skipped_existing": skipped_existing,
+        "skipped_known_misses": skipped_misses,
         "failed": failed,
         "fetched": len(fetched_entries),
         "scraped": stats["processed"],
@@ -619,7 +730,6 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
         "updated": stats["updated"],
         "unchanged": stats["unchanged"],
         "deduped_in_batch": stats["deduped_in_batch"],
-        "duplicates_removed": stats["duplicates_removed"],
     }
 
 
@@ -627,41 +737,54 @@ async def enrich_catalog_from_library(limit: int = 120, _admin: None = Depends(r
 async def search_catalog(
     search: Optional[str] = None,
     platform: Optional[str] = None,
-    sort: str = "title",
+    sort: Optional[str] = None,
     order: str = "asc",
     page: int = 1,
     limit: int = 50,
 ):
     """Search and paginate the local price catalog."""
-    allowed_sorts = {"title", "platform", "loose_eur", "cib_eur", "new_eur"}
+    allowed_sorts = {"relevance", "title", "platform", "loose_eur", "cib_eur", "new_eur"}
     if sort not in allowed_sorts:
-        sort = "title"
+        sort = "relevance" if search else "title"
     order_dir = "DESC" if order.lower() == "desc" else "ASC"
 
+    phrase = fts_phrase(search)
+    use_fts = phrase is not None and table_exists("price_catalog_fts")
+    source = "price_catalog"
     conditions = []
     params = []
 
     if search:
-        conditions.append("title LIKE ?")
-        params.append(f"%{search}%")
+        if use_fts:
+            source += " JOIN price_catalog_fts ON price_catalog_fts.rowid = price_catalog.id"
+            conditions.append("price_catalog_fts MATCH ?")
+            params.append(phrase)
+        else:
+            conditions.append("price_catalog.title LIKE ?")
+            params.append(f"%{search}%")
     if platform:
-        conditions.append("platform = ?")
+        conditions.append("price_catalog.platform = ?")
         params.append(platform)
 
+    if sort == "relevance":
+        order_by = "bm25(price_catalog_fts), price_catalog.title ASC" if use_fts else "price_catalog.title ASC"
+    else:
+        order_by = f"price_catalog.{sort} {order_dir}"
+
     where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
     offset = (page - 1) * limit
 
     with get_db() as db:
         count_row = db.execute(
-            f"SELECT COUNT(*) as count FROM price_catalog {where}", tuple(params)
+            f"SELECT COUNT(*) as count FROM {source} {where}", tuple(params)
         ).fetchone()
         total = count_row["count"] if count_row else 0
 
         rows = db.execute(
             f"""
-            SELECT * FROM price_catalog
+            SELECT price_catalog.* FROM {source}
             {where}
-            ORDER BY {sort} {order_dir}
+            ORDER BY {order_by}
             LIMIT ? OFFSET ?
             """,
             tuple(params + [limit, offset]),
@@ -685,6 +808,62 @@ async def catalog_platforms():
     return [r["platform"] for r in rows]
 
 
+@router.get("/api/price-catalog/crawls")
+async def catalog_crawls():
+    """Per-platform crawl progress and resume checkpoints."""
+    return list_crawl_states()
+
+
+@router.get("/api/price-catalog/refresh-plan")
+async def catalog_refresh_plan():
+    """Platforms the next scheduled refresh would crawl, in priority order, with their page allowance."""
+    return await asyncio.to_thread(plan_catalog_refresh)
+
+
+@router.get("/api/price-catalog/misses")
+async def catalog_misses(limit: int = 100, offset: int = 0, _admin: None = Depends(require_admin_access)):
+    """Titles PriceCharting had no product for, with their miss count and next retry time."""
+    return list_catalog_misses(max(1, min(limit, 500)), max(0, offset))
+
+
+@router.delete("/api/price-catalog/misses")
+async def clear_misses(
+    title: Optional[str] = None,
+    platform: Optional[str] = None,
+    _admin: None = Depends(require_admin_access),
+):
+    """Forget one recorded miss (title + platform) or all of them, so bulk jobs retry right away."""
+    return {"cleared": clear_catalog_misses(title, platform)}
+
+
+@router.post("/api/price-catalog/dedupe")
+async def dedupe_catalog(_admin: None = Depends(require_admin_access)):
+    """Merge duplicate catalog rows in the background; poll /api/jobs/{job_id} for the result."""
+    job_id = jobs.enqueue("catalog_dedupe", total=1)
+    return {"job_id": job_id, "state": "queued"}
+
+
+async def _run_catalog_dedupe(job_id: str, payload: dict, checkpoint: dict) -> None:
+    result = await asyncio.to_thread(dedupe_price_catalog)
+    jobs.finish(job_id, success=1, failed=0, result=result)
+
+
+@router.post("/api/prices/history/compact")
+async def compact_history(_admin: None = Depends(require_admin_access)):
+    """Roll old price snapshots into daily / weekly rollups in the background; poll /api/jobs/{job_id}."""
+    job_id = jobs.enqueue("price_history_compact", total=1)
+    return {"job_id": job_id, "state": "queued"}
+
+
+async def _run_price_history_compact(job_id: str, payload: dict, checkpoint: dict) -> None:
+    result = await asyncio.to_thread(compact_price_history)
+    jobs.finish(job_id, success=1, failed=0, result=result)
+
+
+jobs.register("catalog_dedupe", _run_catalog_dedupe)
+jobs.register("price_history_compact", _run_price_history_compact)
+
+
 @router.delete("/api/price-catalog")
 async def clear_catalog(platform: Optional[str] = None, _admin: None = Depends(require_admin_access)):
     """Delete all (or one platform's) entries from the price catalog."""
@@ -694,4 +873,5 @@ async def clear_catalog(platform: Optional[str] = None, _admin: None = Depends(r
         else:
             db.execute("DELETE FROM price_catalog")
         db.commit()
+    invalidate_catalog_index()
     return {"ok": True}
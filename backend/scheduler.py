@@ -5,8 +5,12 @@ from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from .database import get_db, get_app_meta_many
-from .services.price.utils import PLATFORM_SLUGS, get_eur_rate
-from .services.price.catalog import scrape_platform_catalog, _upsert_catalog_entries, _lookup_local_catalog_price
+from .services.price.fx import get_eur_rate, refresh_fx_rates
+from .services.price.catalog import scrape_catalog_platforms, resolve_catalog_prices
+from .services.price.catalog_maintenance import dedupe_price_catalog
+from .services.price.freshness import plan_catalog_refresh
+from .services.price.history_retention import compact_price_history
+from .services.price.price_writer import PriceWriter
 
 
 logger = logging.getLogger("collectabase.scheduler")
@@ -17,62 +21,46 @@ async def scheduled_price_update():
     logger.info(f"[{datetime.now().isoformat()}] Starting scheduled_price_update")
     
     try:
-        # 1. Update Catalog for owned platforms
-        with get_db() as db:
-            rows = db.execute("SELECT DISTINCT p.name FROM games g JOIN platforms p ON g.platform_id = p.id WHERE p.name IS NOT NULL").fetchall()
-            owned_platforms = [r["name"] for r in rows]
-        
+        # 1. Refresh the stalest / most valuable owned platforms within this run's page budget
+        plan = await asyncio.to_thread(plan_catalog_refresh)
+        for item in plan:
+            logger.info(
+                f"Catalog refresh: {item['platform']} priority={item['priority']} pages={item['pages']} "
+                f"age={item['age_hours']}h owned={item['owned_games']} volatility={item['volatility']}"
+            )
+        targets = [(item["platform"], item["slug"]) for item in plan]
+        page_limits = {item["slug"]: item["pages"] for item in plan}
+
+        # Keep exchange rates current off the request path; get_eur_rate never waits on the network.
+        await refresh_fx_rates()
         eur_rate = await get_eur_rate()
-        for platform_name in owned_platforms:
-            slug = PLATFORM_SLUGS.get(platform_name)
-            if not slug:
-                for lbl, s in PLATFORM_SLUGS.items():
-                    if lbl.lower() == platform_name.lower():
-                        slug = s
-                        break
-            if not slug:
-                logger.warning(f"Could not find slug for platform {platform_name}")
-                continue
-                
-            logger.info(f"Scraping catalog for {platform_name}...")
-            entries = await scrape_platform_catalog(slug, platform_name)
-            stats = _upsert_catalog_entries(entries, eur_rate)
+        for platform_name, stats in await scrape_catalog_platforms(targets, eur_rate, page_limits):
             logger.info(f"Catalog stats for {platform_name}: {stats}")
-            await asyncio.sleep(2.0)
-            
+        await asyncio.to_thread(dedupe_price_catalog)
+
         # 2. Update owned games from catalog
         with get_db() as db:
             games = db.execute("SELECT g.id, g.title, p.name as platform_name FROM games g LEFT JOIN platforms p ON g.platform_id = p.id WHERE g.is_wishlist = 0").fetchall()
             games = [dict(r) for r in games]
         
         success = 0
-        for game in games:
-            catalog = _lookup_local_catalog_price(game["title"], game.get("platform_name") or "")
-            if not catalog:
-                catalog = _lookup_local_catalog_price(game["title"], "")
-                
-            if catalog:
-                with get_db() as db:
-                    db.execute(
-                        """
-                        INSERT INTO price_history
-                            (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id)
-                        VALUES (?, 'pricecharting', ?, ?, ?, 1.0, ?)
-                        """,
-                        (
-                            game["id"],
-                            catalog["loose_eur"],
-                            catalog["cib_eur"],
-                            catalog["new_eur"],
-                            catalog["pricecharting_id"] or None,
-                        ),
+        catalog_matches = await asyncio.to_thread(resolve_catalog_prices, games)
+        async with PriceWriter() as writer:
+            for game in games:
+                catalog = catalog_matches.get(game["id"])
+                if catalog:
+                    await writer.aadd(
+                        game["id"], "pricecharting",
+                        catalog["loose_eur"], catalog["cib_eur"], catalog["new_eur"],
+                        1.0, catalog["pricecharting_id"] or None,
+                        current_value=catalog["loose_eur"],
                     )
-                    if catalog["loose_eur"] is not None:
-                        db.execute("UPDATE games SET current_value = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (catalog["loose_eur"], game["id"]))
-                    db.commit()
-                success += 1
-                
+                    success += 1
+
         logger.info(f"scheduled_price_update finished. Updated {success} games.")
+
+        # 3. Roll snapshots past the raw retention window into daily / weekly rollups
+        await asyncio.to_thread(compact_price_history)
     except Exception as e:
         logger.error(f"Error in scheduled_price_update: {e}", exc_info=True)
 
@@ -0,0 +1,208 @@
+"""
+Application-scoped pooled HTTP clients.
+
+Providers used to open a fresh httpx.AsyncClient per call, paying a TCP+TLS
+handshake for every request. The registry keeps one keep-alive client per
+upstream host; pooled_client() hands callers a view that applies their
+timeout/headers/redirect defaults per request and never closes the pool.
+
+init_http_clients() creates the clients for the known upstream hosts in the app
+startup hook and close_http_clients() closes them on shutdown. Clients are kept
+per event loop, since connections belong to the loop that opened them; scripts
+and tests running their own loop call close_http_clients() before it ends. Pool sizes
+come from HTTP_POOL_MAX_CONNECTIONS / HTTP_POOL_MAX_KEEPALIVE /
+HTTP_POOL_KEEPALIVE_EXPIRY; HTTP_HTTP2=1 enables HTTP/2 when the h2 package is
+installed. Per-host request and connection counters come from httpcore's trace
+extension and are exposed by /api/settings/http-clients.
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger("collectabase.http")
+
+DEFAULT_TIMEOUT = 5.0  # httpx's own default
+
+# Hosts the price providers talk to; their clients are created up front on startup.
+UPSTREAM_HOSTS = ("www.pricecharting.com", "api.ebay.com", "api.rawg.io", "api.frankfurter.app")
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, "") or default))
+    except ValueError:
+        return default
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, "") or default))
+    except ValueError:
+        return default
+
+
+def _http2_enabled() -> bool:
+    wanted = os.getenv("HTTP_HTTP2", "").strip().lower() in {"1", "true", "yes", "on"}
+    return wanted and importlib.util.find_spec("h2") is not None
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "connections_opened", "tls_handshakes")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def as_dict(self) -> dict:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_requests": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else None,
+        }
+
+
+class HttpClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # event loop -> host -> client
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: Dict[str, _HostStats] = {}
+        self.configure()
+
+    def configure(self) -> None:
+        self.limits = httpx.Limits(
+            max_connections=_int_env("HTTP_POOL_MAX_CONNECTIONS", 20),
+            max_keepalive_connections=_int_env("HTTP_POOL_MAX_KEEPALIVE", 10),
+            keepalive_expiry=_float_env("HTTP_POOL_KEEPALIVE_EXPIRY", 30.0),
+        )
+        self.http2 = _http2_enabled()
+
+    def open(self, hosts: Iterable[str] = ()) -> None:
+        """Create the running loop's clients for `hosts`; other hosts get one on first use."""
+        for host in hosts:
+            self.client(host)
+
+    def client(self, host: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._pools.get(loop)
+            if clients is None:
+                clients = self._pools[loop] = {}
+            client = clients.get(host)
+            if client is None or client.is_closed:
+                client = clients[host] = httpx.AsyncClient(
+                    limits=self.limits, http2=self.http2, timeout=DEFAULT_TIMEOUT,
+                )
+            return client
+
+    def stats(self, host: str) -> _HostStats:
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = _HostStats()
+            return stats
+
+    async def aclose(self) -> None:
+        """Close the running loop's clients."""
+        with self._lock:
+            clients = self._pools.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Closing HTTP client failed: {e}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            hosts = {host: stats.as_dict() for host, stats in sorted(self._stats.items())}
+            open_clients = sorted({host for clients in self._pools.values() for host in clients})
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "open_clients": open_clients,
+            "hosts": hosts,
+        }
+
+
+class PooledClient:
+    """Per-caller view of the shared clients with the caller's request defaults."""
+
+    def __init__(self, registry: HttpClientRegistry, timeout, headers: Optional[dict], follow_redirects: bool):
+        self._registry = registry
+        self._timeout = timeout
+        self._headers = headers or {}
+        self._follow_redirects = follow_redirects
+
+    async def request(self, method: str, url, **kwargs) -> httpx.Response:
+        request_url = httpx.URL(url)
+        host = request_url.host
+        stats = self._registry.stats(host)
+
+        async def trace(event: str, info: dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+            elif event == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+
+        headers = {**self._headers, **(kwargs.pop("headers", None) or {})}
+        kwargs.setdefault("timeout", self._timeout)
+        kwargs.setdefault("follow_redirects", self._follow_redirects)
+        stats.requests += 1
+        try:
+            return await self._registry.client(host).request(
+                method, request_url, headers=headers, extensions={"trace": trace}, **kwargs
+            )
+        except Exception:
+            stats.errors += 1
+            raise
+
+    async def get(self, url, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+
+_REGISTRY = HttpClientRegistry()
+
+
+@asynccontextmanager
+async def pooled_client(timeout=DEFAULT_TIMEOUT, headers: Optional[dict] = None, follow_redirects: bool = False):
+    """Drop-in for `async with httpx.AsyncClient(...)` that reuses the pooled per-host clients."""
+    yield PooledClient(_REGISTRY, timeout, headers, follow_redirects)
+
+
+def init_http_clients() -> None:
+    """Create the pooled clients on the running loop; call from the app startup hook."""
+    _REGISTRY.configure()
+    _REGISTRY.open(UPSTREAM_HOSTS)
+    logger.info(
+        f"HTTP client pool: max_connections={_REGISTRY.limits.max_connections} "
+        f"keepalive={_REGISTRY.limits.max_keepalive_connections} http2={_REGISTRY.http2}"
+    )
+
+
+async def close_http_clients() -> None:
+    """Close the running loop's pooled clients."""
+    await _REGISTRY.aclose()
+
+
+def http_client_metrics() -> dict:
+    return _REGISTRY.metrics()
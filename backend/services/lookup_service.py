@@ -11,8 +11,7 @@ import xml.etree.ElementTree as ET
 from urllib.parse import quote
 from urllib.parse import urlparse
 
-import httpx
-
+from .http_client import pooled_client
 from .price.providers.ebay import get_ebay_token
 from ..database import get_app_meta_many
 
@@ -339,7 +338,7 @@ async def cache_remote_cover(url: Optional[str]) -> Optional[str]:
         uploads_dir = _uploads_dir()
         os.makedirs(uploads_dir, exist_ok=True)
 
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True, headers={"User-Agent": "Collectabase/1.0"}) as client:
+        async with pooled_client(timeout=15, follow_redirects=True, headers={"User-Agent": "Collectabase/1.0"}) as client:
             res = await client.get(url)
         if res.status_code >= 400:
             return url
@@ -368,7 +367,7 @@ async def lookup_igdb_title(title: str):
         return {"error": "IGDB credentials not configured", "results": []}
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with pooled_client() as client:
             now = time.time()
             token_valid = (
                 _igdb_token_cache.get("token")
@@ -441,7 +440,7 @@ async def lookup_igdb_title(title: str):
 
 async def lookup_gametdb_title(title: str):
     try:
-        async with httpx.AsyncClient(timeout=12) as client:
+        async with pooled_client(timeout=12) as client:
             response = await client.get(
                 "https://www.gametdb.com/api.php",
                 params={"xml": 1, "lang": "EN", "name": title, "region": "EN"},
@@ -485,7 +484,7 @@ async def lookup_rawg_title(title: str):
         return {"error": "RAWG key not configured", "results": []}
 
     try:
-        async with httpx.AsyncClient(timeout=12, headers={"User-Agent": "Collectabase/1.0"}) as client:
+        async with pooled_client(timeout=12, headers={"User-Agent": "Collectabase/1.0"}) as client:
             response = await client.get(
                 "https://api.rawg.io/api/games",
                 params={
@@ -594,7 +593,7 @@ async def lookup_upcitemdb_barcode(barcode: str):
         headers["Authorization"] = api_key
 
     try:
-        async with httpx.AsyncClient(timeout=12, headers=headers) as client:
+        async with pooled_client(timeout=12, headers=headers) as client:
             response = await client.get(endpoint, params={"upc": normalized})
         if response.status_code >= 400:
             return {"results": [], "error": f"upcitemdb_status_{response.status_code}"}
@@ -626,7 +625,7 @@ async def lookup_comicvine_title(title: str):
         return {"error": "ComicVine API key not configured", "results": []}
 
     try:
-        async with httpx.AsyncClient(timeout=15, headers={"User-Agent": "Collectabase/1.0"}) as client:
+        async with pooled_client(timeout=15, headers={"User-Agent": "Collectabase/1.0"}) as client:
             response = await client.get(
                 "https://comicvine.gamespot.com/api/search/",
                 params={
@@ -689,7 +688,7 @@ async def _lookup_ebay_search_title(title: str, category: str):
         headers = {"Authorization": f"Bearer {token}", "X-EBAY-C-MARKETPLACE-ID": "EBAY_DE"}
 
         async def _do_search(search_query):
-            async with httpx.AsyncClient(timeout=15) as client:
+            async with pooled_client(timeout=15) as client:
                 search_params = {**params, "q": search_query}
                 res = await client.get("https://api.ebay.com/buy/browse/v1/item_summary/search", params=search_params, headers=headers)
                 if res.status_code >= 400:
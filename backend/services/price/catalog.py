@@ -1,107 +1,193 @@
 import asyncio
 import logging
 import re
+from contextlib import aclosing
 from typing import Optional
 from urllib.parse import urljoin
 
-import httpx
-from bs4 import BeautifulSoup
-
 from ...database import dict_from_row, get_db
+from ..http_client import PooledClient, pooled_client
+from .catalog_index import (
+    catalog_candidate_ids_many,
+    catalog_partition_ids,
+    fetch_catalog_rows,
+    refresh_catalog_index,
+)
+from .crawl_state import finish_crawl, load_resumable_crawl, save_crawl_checkpoint, start_crawl
+from .pricecharting_parser import parse_catalog_page_async
+from .ratelimit import pricecharting_limiter
+from .scoring import (
+    _catalog_match_result,
+    _catalog_query,
+    _prepare_catalog_row,
+    get_catalog_scorer,
+)
 from .utils import (
     HEADERS,
     PLATFORM_SLUGS,
-    _catalog_match_score,
-    _clean_catalog_title,
-    _normalize_text,
-    _parse_usd_price,
-    _prices_differ,
+    _catalog_norm_fields,
+    _env_any,
     _to_eur,
 )
 
 logger = logging.getLogger("collectabase.catalog")
 
+# Bump when scoring changes so stored game_catalog_match links get re-matched.
+MATCHER_VERSION = 1
 
-def _lookup_local_catalog_price(title: str, platform_name: str):
-    norm_title = _normalize_text(title)
-    if not norm_title: return None
+DEFAULT_SCRAPE_CONCURRENCY = 3
 
-    norm_platform = _normalize_text(platform_name)
-    title_tokens = [t for t in _clean_catalog_title(norm_title, norm_platform).split() if len(t) >= 3]
+_UPSERT_STAT_KEYS = ("processed", "inserted", "updated", "unchanged", "deduped_in_batch")
+
+
+def _lookup_local_catalog_price(title: str, platform_name: str):
+    query = _catalog_query(title, platform_name)
+    if not query: return None
 
     try:
-        with get_db() as db:
-            rows = []
-            if norm_platform:
-                if title_tokens:
-                    sql = "SELECT * FROM price_catalog WHERE LOWER(platform) = LOWER(?)"
-                    params = [norm_platform]
-                    for token in title_tokens[:3]:
-                        sql += " AND LOWER(title) LIKE ?"
-                        params.append(f"%{token}%")
-                    sql += " ORDER BY scraped_at DESC LIMIT 2000"
-                    rows = db.execute(sql, params).fetchall()
-                if not rows:
-                    rows = db.execute("SELECT * FROM price_catalog WHERE LOWER(platform) = LOWER(?) ORDER BY scraped_at DESC LIMIT 3000", (norm_platform,)).fetchall()
-            if not rows:
-                if title_tokens:
-                    sql = "SELECT * FROM price_catalog WHERE 1=1"
-                    params = []
-                    for token in title_tokens[:3]:
-                        sql += " AND LOWER(title) LIKE ?"
-                        params.append(f"%{token}%")
-                    sql += " ORDER BY scraped_at DESC LIMIT 4000"
-                    rows = db.execute(sql, params).fetchall()
-                if not rows:
-                    rows = db.execute("SELECT * FROM price_catalog ORDER BY scraped_at DESC LIMIT 5000").fetchall()
+        return _match_platform_group(get_catalog_scorer(), query["norm_platform"], [query], {})[0]
     except Exception as e:
         logger.warning(f"Catalog price lookup failed for title={title!r} platform={platform_name!r}: {e}")
         return None
 
-    best = None
-    best_score = 0.0
-    for row in rows:
-        item = dict_from_row(row)
-        row_norm_title = _normalize_text(item.get("title"))
-        row_platform = _normalize_text(item.get("platform"))
-        query_clean = _clean_catalog_title(norm_title, norm_platform)
-        row_clean = _clean_catalog_title(row_norm_title, row_platform or norm_platform)
-
-        score = max(
-            _catalog_match_score(norm_title, row_norm_title),
-            _catalog_match_score(query_clean, row_norm_title),
-            _catalog_match_score(query_clean, row_clean),
+def _match_platform_group(scorer, norm_platform: str, queries: list, prepared: dict) -> list:
+    """Score queries sharing a platform with the given scorer; returns one match or None per query."""
+    if not scorer.uses_token_index:
+        def load_rows():
+            return [_prepare_catalog_row(row) for row in fetch_catalog_rows(ids)]
+
+        generation, ids = catalog_partition_ids(norm_platform)
+        model = scorer.fitted_partition((norm_platform, generation), load_rows)
+        return scorer.best_matches(queries, model)
+
+    candidate_lists = catalog_candidate_ids_many([(norm_platform, q["index_tokens"]) for q in queries])
+    missing = sorted({i for ids in candidate_lists for i in ids if i not in prepared})
+    for row in fetch_catalog_rows(missing):
+        prepared[row["id"]] = _prepare_catalog_row(row)
+
+    return [
+        scorer.best_matches([query], scorer.fit([prepared[i] for i in ids if i in prepared]))[0]
+        for query, ids in zip(queries, candidate_lists)
+    ]
+
+def match_catalog_batch(games: list) -> dict:
+    """
+    Match many games against the local catalog in one pass.
+
+    Games are dicts with id, title and platform_name. Games are grouped by platform so
+    each platform's candidate rows are loaded and normalized once; games that miss on
+    their own platform are retried together without a platform constraint.
+    Returns {game_id: match} for every game that matched.
+    """
+    queries = {}
+    for game in games:
+        query = _catalog_query(game.get("title") or "", game.get("platform_name") or "")
+        if query: queries[game["id"]] = query
+
+    scorer = get_catalog_scorer()
+    matches = {}
+    prepared = {}
+    pending = dict(queries)
+    for relaxed in (False, True):
+        if relaxed:
+            pending = {
+                game_id: _catalog_query(q["title"], "")
+                for game_id, q in pending.items()
+                if game_id not in matches and q["norm_platform"]
+            }
+        if not pending:
+            break
+
+        groups = {}
+        for game_id, query in pending.items():
+            groups.setdefault(query["norm_platform"], []).append(game_id)
+
+        try:
+            for norm_platform, game_ids in groups.items():
+                results = _match_platform_group(scorer, norm_platform, [pending[gid] for gid in game_ids], prepared)
+                for game_id, match in zip(game_ids, results):
+                    if match: matches[game_id] = match
+        except Exception as e:
+            logger.warning(f"Batch catalog match failed for {len(pending)} games: {e}")
+            break
+
+    return matches
+
+def _linked_catalog_matches(game_ids: list) -> dict:
+    """Current-version game_catalog_match links joined to their catalog rows."""
+    linked = {}
+    with get_db() as db:
+        for start in range(0, len(game_ids), 900):
+            chunk = game_ids[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows = db.execute(
+                f"""
+                SELECT m.game_id AS link_game_id, m.score AS link_score, c.*
+                FROM game_catalog_match m
+                JOIN price_catalog c ON c.id = m.catalog_id
+                WHERE m.game_id IN ({placeholders}) AND m.matcher_version = ?
+                """,
+                tuple(chunk) + (MATCHER_VERSION,),
+            ).fetchall()
+            for row in rows:
+                item = dict_from_row(row)
+                if item.get("loose_eur") is None: continue
+                linked[item["link_game_id"]] = _catalog_match_result(item, item.get("link_score"))
+    return linked
+
+def save_catalog_links(matches: dict) -> None:
+    """Persist {game_id: match} results as game_catalog_match links."""
+    rows = [
+        (game_id, match["catalog_id"], match.get("match_score"), MATCHER_VERSION)
+        for game_id, match in matches.items()
+        if match and match.get("catalog_id") is not None
+    ]
+    if not rows: return
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO game_catalog_match (game_id, catalog_id, score, matched_at, matcher_version)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+            ON CONFLICT(game_id) DO UPDATE SET
+                catalog_id = excluded.catalog_id, score = excluded.score,
+                matched_at = excluded.matched_at, matcher_version = excluded.matcher_version
+            """,
+            rows,
         )
+        db.commit()
 
-        if query_clean and row_clean:
-            q_tokens = set(query_clean.split())
-            r_tokens = set(row_clean.split())
-            if q_tokens and q_tokens.issubset(r_tokens): score = max(score, 0.92)
-            elif r_tokens and len(r_tokens) >= 2 and r_tokens.issubset(q_tokens): score = max(score, 0.88)
+def invalidate_catalog_link(db, game_id: int) -> None:
+    db.execute("DELETE FROM game_catalog_match WHERE game_id = ?", (game_id,))
 
-        if norm_platform and _normalize_text(item.get("platform")) == norm_platform: score += 0.10
-        if score > best_score:
-            best_score = score
-            best = item
+def resolve_catalog_prices(games: list) -> dict:
+    """
+    Resolve catalog prices for games, preferring stored match links.
 
-    if not best or best_score < 0.55: return None
-    loose_eur = best.get("loose_eur")
-    if loose_eur is None: return None
+    Linked games are answered with a primary-key join; unlinked games and links from an
+    older MATCHER_VERSION go through match_catalog_batch and new matches are stored.
+    """
+    game_ids = [g["id"] for g in games if g.get("id") is not None]
+    try:
+        resolved = _linked_catalog_matches(game_ids)
+    except Exception as e:
+        logger.warning(f"Reading catalog match links failed: {e}")
+        resolved = {}
 
-    return {
-        "pricecharting_id": (best.get("pricecharting_id") or ""),
-        "product_name": best.get("title") or title,
-        "platform": best.get("platform") or platform_name,
-        "loose_eur": loose_eur,
-        "cib_eur": best.get("cib_eur"),
-        "new_eur": best.get("new_eur"),
-        "match_score": round(best_score, 3),
-    }
+    unlinked = [g for g in games if g.get("id") not in resolved]
+    if unlinked:
+        matched = match_catalog_batch(unlinked)
+        try:
+            save_catalog_links(matched)
+        except Exception as e:
+            logger.warning(f"Saving catalog match links failed: {e}")
+        resolved.update(matched)
+    return resolved
 
-async def _fetch_with_retry(client: httpx.AsyncClient, url: str, params: Optional[dict] = None, data: Optional[dict] = None, method: str = "GET", attempts: int = 3):
+async def _fetch_with_retry(client: PooledClient, url: str, params: Optional[dict] = None, data: Optional[dict] = None, method: str = "GET", attempts: int = 3):
     response = None
     request_method = (method or "GET").upper()
     for attempt in range(1, attempts + 1):
+        await pricecharting_limiter().acquire()
         try:
             if request_method == "POST": response = await client.post(url, params=params, data=data)
             else: response = await client.get(url, params=params)
@@ -120,8 +206,16 @@ async def _fetch_with_retry(client: httpx.AsyncClient, url: str, params: Optiona
         return response
     return response
 
-async def scrape_platform_catalog(platform_slug: str, platform_label: str) -> list:
-    entries = []
+async def crawl_platform_catalog(platform_slug: str, platform_label: str, max_pages: Optional[int] = None):
+    """
+    Crawl a console listing, yielding one page of entries at a time.
+
+    The consumer stores each page before asking for the next one; only then is a
+    catalog_crawl_state checkpoint written, so a checkpoint never runs ahead of
+    durable data and memory stays bounded by one page. A crawl that stopped early
+    resumes from its last checkpoint; max_pages pauses the crawl after that many
+    pages so a later run picks it up there.
+    """
     base_url = f"https://www.pricecharting.com/console/{platform_slug}"
     previous_signature = None
     page_size_hint = None
@@ -129,90 +223,152 @@ async def scrape_platform_catalog(platform_slug: str, platform_label: str) -> li
     request_method = "GET"
     request_params = {"sort": "title", "order": "asc"}
     request_data = None
+    pages_done = entries_scraped = 0
+
+    resume = load_resumable_crawl(platform_slug)
+    if resume:
+        base_url, request_method = resume["next_url"], resume["next_method"]
+        if request_method == "GET": request_params, request_data = resume["next_params"], None
+        else: request_params, request_data = None, resume["next_params"]
+        seen_cursors = resume["seen_cursors"]
+        previous_signature = resume["last_signature"]
+        page_size_hint = resume["page_size_hint"]
+        pages_done, entries_scraped = resume["pages_done"], resume["entries_scraped"]
+        logger.info(f"Resuming catalog crawl for {platform_label} ({platform_slug}) after page {pages_done}")
+    start_crawl(platform_slug, platform_label, resumed=bool(resume))
+
+    status, error = "completed", None
+    first_page = pages_done + 1
+    try:
+        async with pooled_client(timeout=20, headers=HEADERS, follow_redirects=True) as client:
+            for page in range(first_page, 401):
+                res = await _fetch_with_retry(client, base_url, params=request_params, data=request_data, method=request_method, attempts=3)
+                if res is None or res.status_code >= 400:
+                    status = "failed"
+                    error = f"HTTP {res.status_code} on page {page}" if res is not None else f"Request failed on page {page}"
+                    break
+
+                parsed = await parse_catalog_page_async(res.text, platform_label)
+                if not parsed: break
+                page_entries, next_form = parsed
+
+                if not page_entries: break
+                signature = tuple((r["pricecharting_id"] or r["title"]).strip().lower() for r in page_entries)
+                if previous_signature and signature == previous_signature: break
+                previous_signature = signature
+
+                if page_size_hint is None: page_size_hint = len(page_entries)
+                yield page_entries
+                pages_done, entries_scraped = page, entries_scraped + len(page_entries)
+
+                if not next_form: break
+                next_payload = next_form["payload"]
+
+                cursor = next_payload.get("cursor", "")
+                if not cursor or cursor in seen_cursors: break
+                seen_cursors.add(cursor)
+
+                request_method = next_form["method"]
+                if request_method == "GET": request_params, request_data = next_payload, None
+                else: request_params, request_data = None, next_payload
+
+                if next_form["action"]: base_url = urljoin(base_url, next_form["action"])
+
+                if page_size_hint and len(page_entries) < max(10, page_size_hint): break
+
+                save_crawl_checkpoint(
+                    platform_slug,
+                    pages_done=pages_done,
+                    entries_scraped=entries_scraped,
+                    next_url=base_url,
+                    next_method=request_method,
+                    next_params=next_payload,
+                    seen_cursors=seen_cursors,
+                    last_signature=previous_signature,
+                    page_size_hint=page_size_hint,
+                )
+                if max_pages and page - first_page + 1 >= max_pages:
+                    status = "paused"
+                    break
+    except BaseException as e:
+        # Includes GeneratorExit when the consumer stops early or fails on a page.
+        finish_crawl(platform_slug, "interrupted", str(e) or type(e).__name__)
+        raise
 
-    async with httpx.AsyncClient(timeout=20, headers=HEADERS, follow_redirects=True) as client:
-        for page in range(1, 401):
-            res = await _fetch_with_retry(client, base_url, params=request_params, data=request_data, method=request_method, attempts=3)
-            if res is None or res.status_code >= 400: break
+    finish_crawl(platform_slug, status, error, pages_done, entries_scraped)
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            table = soup.select_one("table#games_table")
-            if not table: break
-            rows = table.select("tbody tr")
-            if not rows: break
+def _scrape_concurrency() -> int:
+    try:
+        value = int(_env_any("CATALOG_SCRAPE_CONCURRENCY") or DEFAULT_SCRAPE_CONCURRENCY)
+    except ValueError:
+        value = DEFAULT_SCRAPE_CONCURRENCY
+    return max(1, value)
+
+async def scrape_catalog_platforms(targets: list, eur_rate: float, page_limits: Optional[dict] = None) -> list:
+    """
+    Scrape and upsert (label, slug) targets with several crawls in flight at once.
+
+    Crawls share the pricecharting.com request budget, so concurrency shortens wall
+    time without raising the outbound request rate. Each page is upserted as it
+    arrives (serialized, SQLite has a single writer) so crawl checkpoints can
+    resume. page_limits maps a slug to the most pages its crawl may fetch this
+    run. Returns [(label, stats)] in target order; platforms that fail are logged
+    and left out.
+    """
+    semaphore = asyncio.Semaphore(_scrape_concurrency())
+    write_lock = asyncio.Lock()
+
+    async def run(label: str, slug: str):
+        stats = dict.fromkeys(_UPSERT_STAT_KEYS, 0)
+        async with semaphore:
+            logger.info(f"Starting catalog scrape for {label} ({slug})")
+            max_pages = (page_limits or {}).get(slug)
+            async with aclosing(crawl_platform_catalog(slug, label, max_pages=max_pages)) as pages:
+                async for page_entries in pages:
+                    async with write_lock:
+                        page_stats = await asyncio.to_thread(_upsert_catalog_entries, page_entries, eur_rate)
+                    for key in _UPSERT_STAT_KEYS:
+                        stats[key] += page_stats[key]
+        logger.info(
+            f"Finished {label}: processed={stats['processed']} inserted={stats['inserted']} "
+            f"updated={stats['updated']} unchanged={stats['unchanged']}"
+        )
+        return stats
+
+    outcomes = await asyncio.gather(*(run(label, slug) for label, slug in targets), return_exceptions=True)
+    results = []
+    for (label, _slug), outcome in zip(targets, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Catalog scrape failed for {label}: {outcome}")
+            continue
+        results.append((label, outcome))
+    return results
+
+_STAGE_COLUMNS = (
+    "pricecharting_id", "title", "platform", "loose_usd", "cib_usd", "new_usd",
+    "loose_eur", "cib_eur", "new_eur", "page_url", "norm_title", "clean_title", "norm_platform",
+)
+
+
+def _price_changed_sql(column: str) -> str:
+    """SQL twin of _prices_differ for one price column of price_catalog p vs catalog_stage."""
+    return (
+        f"((p.{column} IS NULL) <> (catalog_stage.{column} IS NULL) "
+        f"OR COALESCE(ABS(p.{column} - catalog_stage.{column}) >= 0.005, 0))"
+    )
 
-            page_entries = []
-            for row in rows:
-                title_cell = row.select_one("td.title a")
-                if not title_cell: continue
-                title = title_cell.get_text(strip=True)
-                href = title_cell.get("href", "")
-                if "pricecharting.com" in href:
-                    href = href.split("pricecharting.com")[1]
-                if not href.startswith("/"):
-                    href = "/" + href
-                pc_id_match = re.search(r"/game/[^/]+/(.+)(?:\?|$)", href)
-                pc_id = pc_id_match.group(1) if pc_id_match else ""
-                page_url = f"https://www.pricecharting.com{href}" if href else ""
-
-                def cell_price(*classes):
-                    for cls in classes:
-                        td = row.select_one(f"td.{cls}")
-                        if not td: continue
-                        span = td.select_one("span.price, span.js-price") or td
-                        parsed = _parse_usd_price(span.get_text(strip=True))
-                        if parsed is not None: return parsed
-                    return None
-
-                loose_usd = cell_price("used_price", "loose_price")
-                cib_usd = cell_price("cib_price", "complete_price")
-                new_usd = cell_price("new_price")
-
-                if title and (loose_usd is not None or cib_usd is not None):
-                    page_entries.append({
-                        "pricecharting_id": pc_id,
-                        "title": title,
-                        "platform": platform_label,
-                        "loose_usd": loose_usd,
-                        "cib_usd": cib_usd,
-                        "new_usd": new_usd,
-                        "page_url": page_url,
-                    })
-
-            if not page_entries: break
-            signature = tuple((r["pricecharting_id"] or r["title"]).strip().lower() for r in page_entries)
-            if previous_signature and signature == previous_signature: break
-            previous_signature = signature
-
-            if page_size_hint is None: page_size_hint = len(page_entries)
-            entries.extend(page_entries)
-
-            next_form = soup.select_one("form.next_page.js-next-page, form.next_page")
-            if not next_form: break
-            next_payload = {}
-            for inp in next_form.select("input[name]"):
-                name = (inp.get("name") or "").strip()
-                if not name: continue
-                next_payload[name] = (inp.get("value") or "").strip()
-
-            cursor = next_payload.get("cursor", "")
-            if not cursor or cursor in seen_cursors: break
-            seen_cursors.add(cursor)
-
-            request_method = (next_form.get("method") or "POST").upper()
-            if request_method == "GET": request_params, request_data = next_payload, None
-            else: request_params, request_data = None, next_payload
-
-            action = (next_form.get("action") or "").strip()
-            if action: base_url = urljoin(base_url, action)
-
-            if page_size_hint and len(page_entries) < max(10, page_size_hint): break
-            await asyncio.sleep(1.1)
-
-    return entries
 
 def _upsert_catalog_entries(entries: list, eur_rate: float):
-    if not entries: return {"processed": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deduped_in_batch": 0, "duplicates_removed": 0}
+    """
+    Upsert one batch of scraped entries with a handful of set-based statements.
+
+    The batch is loaded into a temp catalog_stage table and each entry is resolved
+    to an existing row: by (platform, pricecharting_id) first, then by
+    (platform, lower(title)) against the newest row; both lookups are indexed.
+    Inserts, price changes and touch-only refreshes are then applied as one
+    statement each. Duplicate rows are left to dedupe_price_catalog.
+    """
+    if not entries: return dict.fromkeys(_UPSERT_STAT_KEYS, 0)
 
     deduped_entries = []
     seen = set()
@@ -228,52 +384,120 @@ def _upsert_catalog_entries(entries: list, eur_rate: float):
         seen.add(key)
         deduped_entries.append(e)
 
-    inserted = updated = unchanged = duplicates_removed = 0
+    staged = []
+    for seq, e in enumerate(deduped_entries):
+        loose_usd, cib_usd, new_usd = e["loose_usd"], e["cib_usd"], e["new_usd"]
+        staged.append((
+            seq, (e.get("pricecharting_id") or "").strip(), e["title"], e["platform"],
+            loose_usd, cib_usd, new_usd,
+            _to_eur(loose_usd, eur_rate), _to_eur(cib_usd, eur_rate), _to_eur(new_usd, eur_rate),
+            e["page_url"], *_catalog_norm_fields(e["title"], e["platform"]),
+        ))
+
+    columns = ", ".join(_STAGE_COLUMNS)
+    stage_columns = ", ".join(f"catalog_stage.{c}" for c in _STAGE_COLUMNS)
     with get_db() as db:
-        for e in deduped_entries:
-            platform = e["platform"]
-            title = e["title"]
-            pc_id = (e.get("pricecharting_id") or "").strip()
-
-            existing_rows = []
-            if pc_id:
-                existing_rows = db.execute("SELECT id, loose_usd, cib_usd, new_usd FROM price_catalog WHERE platform = ? AND pricecharting_id = ? ORDER BY id DESC", (platform, pc_id)).fetchall()
-            if not existing_rows:
-                existing_rows = db.execute("SELECT id, loose_usd, cib_usd, new_usd FROM price_catalog WHERE platform = ? AND LOWER(title) = LOWER(?) ORDER BY id DESC", (platform, title)).fetchall()
-
-            keep = existing_rows[0] if existing_rows else None
-            if len(existing_rows) > 1:
-                dup_ids = [row["id"] for row in existing_rows[1:]]
-                db.executemany("DELETE FROM price_catalog WHERE id = ?", [(d,) for d in dup_ids])
-                duplicates_removed += len(dup_ids)
-
-            loose_usd, cib_usd, new_usd = e["loose_usd"], e["cib_usd"], e["new_usd"]
-            loose_eur, cib_eur, new_eur = _to_eur(loose_usd, eur_rate), _to_eur(cib_usd, eur_rate), _to_eur(new_usd, eur_rate)
-
-            if not keep:
-                db.execute(
-                    "INSERT INTO price_catalog (pricecharting_id, title, platform, loose_usd, cib_usd, new_usd, loose_eur, cib_eur, new_eur, page_url, scraped_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
-                    (pc_id, title, platform, loose_usd, cib_usd, new_usd, loose_eur, cib_eur, new_eur, e["page_url"]),
-                )
-                inserted += 1
-                continue
+        db.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS catalog_stage (
+                seq INTEGER PRIMARY KEY, pricecharting_id TEXT, title TEXT, platform TEXT,
+                loose_usd REAL, cib_usd REAL, new_usd REAL, loose_eur REAL, cib_eur REAL, new_eur REAL,
+                page_url TEXT, norm_title TEXT, clean_title TEXT, norm_platform TEXT,
+                target_id INTEGER, title_target INTEGER, prices_changed INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        db.execute("DELETE FROM catalog_stage")
+        db.executemany(f"INSERT INTO catalog_stage (seq, {columns}) VALUES (?, {', '.join('?' * len(_STAGE_COLUMNS))})", staged)
+
+        # Resolve targets: pricecharting_id first, then title for entries still unmatched.
+        # A title match already claimed by another entry of the batch becomes an insert.
+        db.execute(
+            """
+            UPDATE catalog_stage SET target_id = (
+                SELECT MAX(p.id) FROM price_catalog p
+                WHERE p.platform = catalog_stage.platform AND p.pricecharting_id = catalog_stage.pricecharting_id
+                  AND p.pricecharting_id <> ''
+            )
+            WHERE pricecharting_id <> ''
+            """
+        )
+        db.execute(
+            """
+            UPDATE catalog_stage SET title_target = (
+                SELECT MAX(p.id) FROM price_catalog p
+                WHERE p.platform = catalog_stage.platform AND lower(p.title) = lower(catalog_stage.title)
+            )
+            WHERE target_id IS NULL
+            """
+        )
+        db.execute(
+            """
+            UPDATE catalog_stage SET target_id = title_target
+            WHERE target_id IS NULL AND title_target IS NOT NULL
+              AND title_target NOT IN (SELECT target_id FROM catalog_stage WHERE target_id IS NOT NULL)
+              AND seq = (SELECT MIN(s2.seq) FROM catalog_stage s2 WHERE s2.title_target = catalog_stage.title_target)
+            """
+        )
 
-            prices_changed = _prices_differ(keep["loose_usd"], loose_usd) or _prices_differ(keep["cib_usd"], cib_usd) or _prices_differ(keep["new_usd"], new_usd)
-            if prices_changed:
-                db.execute(
-                    "UPDATE price_catalog SET pricecharting_id = ?, title = ?, platform = ?, loose_usd = ?, cib_usd = ?, new_usd = ?, loose_eur = ?, cib_eur = ?, new_eur = ?, page_url = ?, scraped_at = CURRENT_TIMESTAMP, changed_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (pc_id, title, platform, loose_usd, cib_usd, new_usd, loose_eur, cib_eur, new_eur, e["page_url"], keep["id"]),
-                )
-                updated += 1
-            else:
-                db.execute(
-                    "UPDATE price_catalog SET pricecharting_id = ?, title = ?, platform = ?, loose_eur = ?, cib_eur = ?, new_eur = ?, page_url = ?, scraped_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (pc_id, title, platform, loose_eur, cib_eur, new_eur, e["page_url"], keep["id"]),
-                )
-                unchanged += 1
+        db.execute(
+            f"""
+            UPDATE catalog_stage SET prices_changed = (
+                SELECT {' OR '.join(_price_changed_sql(c) for c in ("loose_usd", "cib_usd", "new_usd"))}
+                FROM price_catalog p WHERE p.id = catalog_stage.target_id
+            )
+            WHERE target_id IS NOT NULL
+            """
+        )
+        target_ids = [row["target_id"] for row in db.execute("SELECT target_id FROM catalog_stage WHERE target_id IS NOT NULL").fetchall()]
+        updated = db.execute("SELECT COUNT(*) FROM catalog_stage WHERE prices_changed = 1").fetchone()[0]
+
+        db.execute(
+            """
+            UPDATE price_catalog SET
+                pricecharting_id = s.pricecharting_id, loose_usd = s.loose_usd, cib_usd = s.cib_usd, new_usd = s.new_usd,
+                loose_eur = s.loose_eur, cib_eur = s.cib_eur, new_eur = s.new_eur, page_url = s.page_url,
+                norm_title = s.norm_title, clean_title = s.clean_title, norm_platform = s.norm_platform,
+                scraped_at = CURRENT_TIMESTAMP, changed_at = CURRENT_TIMESTAMP
+            FROM catalog_stage s WHERE price_catalog.id = s.target_id AND s.prices_changed = 1
+            """
+        )
+        db.execute(
+            """
+            UPDATE price_catalog SET
+                pricecharting_id = s.pricecharting_id, loose_eur = s.loose_eur, cib_eur = s.cib_eur, new_eur = s.new_eur,
+                page_url = s.page_url, norm_title = s.norm_title, clean_title = s.clean_title, norm_platform = s.norm_platform,
+                scraped_at = CURRENT_TIMESTAMP
+            FROM catalog_stage s WHERE price_catalog.id = s.target_id AND s.prices_changed = 0
+            """
+        )
+        # Kept apart so the title FTS trigger only fires for rows that were actually renamed.
+        db.execute(
+            """
+            UPDATE price_catalog SET title = s.title
+            FROM catalog_stage s WHERE price_catalog.id = s.target_id AND price_catalog.title <> s.title
+            """
+        )
+        inserted_ids = [row[0] for row in db.execute(
+            f"""
+            INSERT INTO price_catalog ({columns}, scraped_at, changed_at)
+            SELECT {stage_columns}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+            FROM catalog_stage WHERE target_id IS NULL ORDER BY seq
+            RETURNING id
+            """
+        ).fetchall()]
+        db.execute("DELETE FROM catalog_stage")
         db.commit()
 
-    return {"processed": len(deduped_entries), "inserted": inserted, "updated": updated, "unchanged": unchanged, "deduped_in_batch": deduped_in_batch, "duplicates_removed": duplicates_removed}
+    refresh_catalog_index(target_ids + inserted_ids)
+
+    return {
+        "processed": len(deduped_entries),
+        "inserted": len(inserted_ids),
+        "updated": updated,
+        "unchanged": len(target_ids) - updated,
+        "deduped_in_batch": deduped_in_batch,
+    }
 
 def _platform_label_from_slug(slug: str) -> Optional[str]:
     if not slug: return None
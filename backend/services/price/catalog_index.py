@@ -0,0 +1,257 @@
+"""
+Process-wide inverted token index over price_catalog titles.
+
+Catalog matching used to narrow candidates with LIKE '%token%' scans (and full
+table scans as a fallback) for every single game. The index maps normalized
+title tokens to price_catalog row ids, partitioned by normalized platform, so
+candidate retrieval becomes a set intersection.
+
+The index is built lazily on first use. _upsert_catalog_entries refreshes the
+rows it touched. Rows written behind our back (other processes, tests, CLI,
+manual SQL) bump price_catalog_version through triggers; each lookup reads that
+one row and only runs the COUNT/MAX(id) watermark check when it moved.
+"""
+import heapq
+import logging
+import threading
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+
+from ...database import get_db
+from .utils import _normalize_text
+
+logger = logging.getLogger("collectabase.catalog_index")
+
+MIN_TOKEN_LENGTH = 3
+# Only the leading query tokens are intersected, like the old LIKE filters.
+_INTERSECT_TOKENS = 3
+_TOKEN_CANDIDATE_LIMIT = 2000
+_FALLBACK_CANDIDATE_LIMIT = 3000
+_INDEX_COLUMNS = "id, title, platform, norm_title, norm_platform"
+# Keep IN (...) lists below SQLite's historic 999 variable limit.
+_SQL_CHUNK = 900
+
+
+def index_tokens(norm_title: str) -> set:
+    return {t for t in (norm_title or "").split() if len(t) >= MIN_TOKEN_LENGTH}
+
+
+class _Partition:
+    __slots__ = ("ids", "tokens", "generation")
+
+    def __init__(self):
+        self.ids = set()
+        self.tokens = defaultdict(set)
+        # The index-wide generation of this partition's last change.
+        self.generation = 0
+
+
+class CatalogTokenIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._max_id = 0
+        # price_catalog_version.generation as of the last consistency check
+        self._db_version = None
+        # Bumped on every change; the changed partition records the new value, so callers can
+        # cache derived data per (partition, generation) without losing it to other platforms' writes.
+        self._generation = 0
+        self._partitions: Dict[str, _Partition] = {}
+        # row id -> (partition key, norm_title, tokens), needed to unindex a row on refresh
+        self._rows: Dict[int, tuple] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built = False
+            self._generation += 1
+            self._max_id = 0
+            self._db_version = None
+            self._partitions = {}
+            self._rows = {}
+
+    def refresh(self, ids: Iterable[int]) -> None:
+        """Re-index the given row ids (inserted, updated or deleted)."""
+        ids = {int(i) for i in ids if i is not None}
+        if not ids:
+            return
+        with self._lock:
+            if not self._built:
+                return
+            found = set()
+            for row in _select_rows(_INDEX_COLUMNS, sorted(ids)):
+                found.add(row["id"])
+                # Price-only upserts leave the indexed fields alone; re-adding would bump the generation.
+                if self._rows.get(row["id"], (None, None))[:2] != _index_fields(row):
+                    self._add(row)
+            for row_id in ids - found:
+                self._remove(row_id)
+
+    def candidates(self, norm_platform: str, tokens: List[str]) -> List[int]:
+        """Return candidate row ids for a cleaned query, most recent first."""
+        return self.candidates_many([(norm_platform, tokens)])[0]
+
+    def candidates_many(self, queries: List[tuple]) -> List[List[int]]:
+        """Like candidates() for many (norm_platform, tokens) pairs, checking freshness once."""
+        with self._lock:
+            self._ensure_current()
+            results = []
+            for norm_platform, tokens in queries:
+                partition = self._partitions.get(norm_platform) if norm_platform else None
+                if partition and partition.ids:
+                    results.append(self._match([partition], tokens))
+                else:
+                    results.append(self._match(list(self._partitions.values()), tokens))
+            return results
+
+    def partition_ids(self, norm_platform: str) -> Tuple[int, List[int]]:
+        """
+        Return (generation, row ids) for a whole platform partition. An unknown or empty
+        platform gets the most recent rows across all platforms, bounded like the
+        reference path's fallback.
+        """
+        with self._lock:
+            self._ensure_current()
+            partition = self._partitions.get(norm_platform) if norm_platform else None
+            if partition and partition.ids:
+                return partition.generation, sorted(partition.ids)
+            return self._generation, sorted(heapq.nlargest(_FALLBACK_CANDIDATE_LIMIT, self._rows))
+
+    def _match(self, partitions: List[_Partition], tokens: List[str]) -> List[int]:
+        if tokens:
+            hits = set()
+            leading = tokens[:_INTERSECT_TOKENS]
+            for partition in partitions:
+                postings = [partition.tokens.get(t) for t in leading]
+                if all(postings):
+                    postings.sort(key=len)
+                    hits |= postings[0].intersection(*postings[1:])
+            if hits:
+                return heapq.nlargest(_TOKEN_CANDIDATE_LIMIT, hits)
+
+            # No row carries every leading token: rank rows by shared tokens.
+            shared = Counter()
+            for partition in partitions:
+                for token in tokens:
+                    shared.update(partition.tokens.get(token, ()))
+            if shared:
+                ranked = heapq.nlargest(_TOKEN_CANDIDATE_LIMIT, shared.items(), key=lambda kv: (kv[1], kv[0]))
+                return [row_id for row_id, _count in ranked]
+
+        return heapq.nlargest(_FALLBACK_CANDIDATE_LIMIT, chain.from_iterable(p.ids for p in partitions))
+
+    def _ensure_current(self) -> None:
+        with get_db() as db:
+            version = db.execute("SELECT generation FROM price_catalog_version WHERE id = 1").fetchone()
+            db_version = int(version["generation"]) if version else None
+            if self._built and db_version is not None and db_version == self._db_version:
+                return
+            row = db.execute("SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id FROM price_catalog").fetchone()
+        count, max_id = int(row["n"]), int(row["max_id"])
+        # Read before the check, so a write racing it bumps the version past this value and is seen next time.
+        self._db_version = db_version
+
+        if self._built and max_id > self._max_id:
+            for item in _select_rows_after(_INDEX_COLUMNS, self._max_id):
+                self._add(item)
+        if not self._built or count != len(self._rows) or max_id < self._max_id:
+            self._build()
+
+    def _build(self) -> None:
+        self._partitions = {}
+        self._rows = {}
+        self._max_id = 0
+        for item in _select_rows_after(_INDEX_COLUMNS, 0):
+            self._add(item)
+        self._built = True
+        logger.info(f"Catalog token index built: {len(self._rows)} rows in {len(self._partitions)} platforms")
+
+    def _add(self, row) -> None:
+        row_id = row["id"]
+        if row_id in self._rows:
+            self._remove(row_id)
+        key, norm_title = _index_fields(row)
+        tokens = index_tokens(norm_title)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition()
+        partition.ids.add(row_id)
+        self._generation += 1
+        partition.generation = self._generation
+        for token in tokens:
+            partition.tokens[token].add(row_id)
+        self._rows[row_id] = (key, norm_title, tokens)
+        self._max_id = max(self._max_id, row_id)
+
+    def _remove(self, row_id: int) -> None:
+        entry = self._rows.pop(row_id, None)
+        if not entry:
+            return
+        key, _norm_title, tokens = entry
+        self._generation += 1
+        partition = self._partitions.get(key)
+        if not partition:
+            return
+        partition.generation = self._generation
+        partition.ids.discard(row_id)
+        for token in tokens:
+            posting = partition.tokens.get(token)
+            if posting is None:
+                continue
+            posting.discard(row_id)
+            if not posting:
+                del partition.tokens[token]
+
+
+def _index_fields(row) -> tuple:
+    """(partition key, normalized title) the index stores for a price_catalog row."""
+    norm_title, key = row["norm_title"], row["norm_platform"]
+    if norm_title is None or key is None:
+        norm_title, key = _normalize_text(row["title"]), _normalize_text(row["platform"])
+    return key, norm_title
+
+
+def _select_rows_after(columns: str, min_id: int):
+    with get_db() as db:
+        return db.execute(f"SELECT {columns} FROM price_catalog WHERE id > ? ORDER BY id", (min_id,)).fetchall()
+
+
+def _select_rows(columns: str, ids: List[int]) -> list:
+    rows = []
+    with get_db() as db:
+        for start in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[start:start + _SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(db.execute(f"SELECT {columns} FROM price_catalog WHERE id IN ({placeholders})", tuple(chunk)).fetchall())
+    return rows
+
+
+_INDEX = CatalogTokenIndex()
+
+
+def catalog_candidate_ids(norm_platform: str, tokens: List[str]) -> List[int]:
+    return _INDEX.candidates(norm_platform, tokens)
+
+
+def catalog_candidate_ids_many(queries: List[tuple]) -> List[List[int]]:
+    return _INDEX.candidates_many(queries)
+
+
+def catalog_partition_ids(norm_platform: str) -> Tuple[int, List[int]]:
+    return _INDEX.partition_ids(norm_platform)
+
+
+def fetch_catalog_rows(ids: List[int]) -> list:
+    """Load full price_catalog rows for candidate ids, keeping the given order."""
+    if not ids:
+        return []
+    by_id = {row["id"]: row for row in _select_rows("*", list(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def refresh_catalog_index(ids: Iterable[int]) -> None:
+    _INDEX.refresh(ids)
+
+
+def invalidate_catalog_index() -> None:
+    _INDEX.invalidate()
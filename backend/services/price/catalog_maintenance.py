@@ -0,0 +1,97 @@
+"""
+Offline price_catalog maintenance.
+
+The scrape upsert no longer hunts for duplicates row by row; it relies on the
+unique (platform, pricecharting_id) index and matches titles against the newest
+row. Duplicates that still exist (rows from before the index, or the same title
+scraped with and without a PriceCharting id) are merged here in one pass:
+duplicates are found with a GROUP BY per key, the newest row of each group keeps
+its values and borrows any it lacks from the others, game_catalog_match links
+are moved to it and the rest of the group is deleted.
+"""
+import logging
+from datetime import datetime, timezone
+
+from ...database import dict_from_row, get_db, set_app_meta
+from .catalog_index import refresh_catalog_index
+
+logger = logging.getLogger("collectabase.catalog")
+
+# Columns a surviving row takes from its duplicates when it has no value itself.
+_MERGE_COLUMNS = (
+    "pricecharting_id", "loose_usd", "cib_usd", "new_usd", "loose_eur", "cib_eur", "new_eur", "page_url",
+)
+
+_DUPLICATE_GROUP_QUERIES = (
+    # Same PriceCharting product; the unique index prevents new ones.
+    """
+    SELECT group_concat(id) AS ids FROM price_catalog
+    WHERE pricecharting_id <> ''
+    GROUP BY platform, pricecharting_id HAVING COUNT(*) > 1
+    """,
+    # Same title, unless the rows are distinct PriceCharting products.
+    """
+    SELECT group_concat(id) AS ids FROM price_catalog
+    GROUP BY platform, lower(title)
+    HAVING COUNT(*) > 1 AND COUNT(DISTINCT NULLIF(pricecharting_id, '')) <= 1
+    """,
+)
+
+
+def _empty(value) -> bool:
+    return value is None or value == ""
+
+
+def _merge_group(db, ids: list) -> tuple:
+    placeholders = ",".join("?" * len(ids))
+    rows = [dict_from_row(r) for r in db.execute(
+        f"SELECT id, {', '.join(_MERGE_COLUMNS)} FROM price_catalog WHERE id IN ({placeholders}) ORDER BY id DESC",
+        ids,
+    ).fetchall()]
+    if len(rows) < 2:
+        return 0, 0, []
+
+    keep = max(rows, key=lambda r: (not _empty(r["pricecharting_id"]), r["id"]))
+    dups = [r for r in rows if r["id"] != keep["id"]]
+    fills = {}
+    for column in _MERGE_COLUMNS:
+        if _empty(keep[column]):
+            value = next((r[column] for r in dups if not _empty(r[column])), None)
+            if value is not None:
+                fills[column] = value
+    if fills:
+        assignments = ", ".join(f"{column} = ?" for column in fills)
+        db.execute(f"UPDATE price_catalog SET {assignments} WHERE id = ?", (*fills.values(), keep["id"]))
+
+    dup_ids = [r["id"] for r in dups]
+    dup_placeholders = ",".join("?" * len(dup_ids))
+    links = db.execute(
+        f"UPDATE game_catalog_match SET catalog_id = ? WHERE catalog_id IN ({dup_placeholders})",
+        (keep["id"], *dup_ids),
+    ).rowcount
+    db.execute(f"DELETE FROM price_catalog WHERE id IN ({dup_placeholders})", dup_ids)
+    return len(dup_ids), links, [keep["id"], *dup_ids]
+
+
+def dedupe_price_catalog() -> dict:
+    """Merge duplicate price_catalog rows; returns group, removed-row and rewritten-link counts."""
+    groups = removed = links_rewritten = 0
+    touched_ids = []
+    with get_db() as db:
+        for query in _DUPLICATE_GROUP_QUERIES:
+            for row in db.execute(query).fetchall():
+                ids = [int(i) for i in row["ids"].split(",")]
+                group_removed, group_links, group_ids = _merge_group(db, ids)
+                if group_removed:
+                    groups += 1
+                    removed += group_removed
+                    links_rewritten += group_links
+                    touched_ids.extend(group_ids)
+        db.commit()
+
+    if touched_ids:
+        refresh_catalog_index(touched_ids)
+    set_app_meta("last_catalog_dedupe_at", datetime.now(timezone.utc).replace(microsecond=0).isoformat())
+    set_app_meta("last_catalog_dedupe_removed", str(removed))
+    logger.info(f"Catalog dedupe: merged {groups} groups, removed {removed} rows, moved {links_rewritten} links")
+    return {"groups": groups, "removed": removed, "links_rewritten": links_rewritten}
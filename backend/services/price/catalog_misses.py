@@ -0,0 +1,105 @@
+"""
+Negative results for PriceCharting lookups.
+
+A title PriceCharting has no product for used to be searched again by every
+library enrichment and bulk price update. Misses are recorded per (normalized
+title, normalized platform) with an exponential retry backoff: the first miss is
+retried after CATALOG_MISS_RETRY_HOURS (default 24), each further miss doubles
+the wait up to MAX_RETRY_HOURS. Bulk jobs skip titles whose retry time has not
+come yet; single-item lookups still search and clear the miss when they find the
+product. Failed requests are not misses and are never recorded.
+"""
+from typing import Iterable, Optional
+
+from ...database import dict_from_row, get_db
+from .utils import _env_any, _normalize_text
+
+DEFAULT_RETRY_HOURS = 24
+MAX_RETRY_HOURS = 30 * 24
+
+
+def _retry_hours() -> int:
+    try:
+        return max(1, int(_env_any("CATALOG_MISS_RETRY_HOURS") or DEFAULT_RETRY_HOURS))
+    except ValueError:
+        return DEFAULT_RETRY_HOURS
+
+
+def miss_key(title: Optional[str], platform: Optional[str]) -> tuple:
+    return _normalize_text(title), _normalize_text(platform)
+
+
+def record_catalog_miss(title: str, platform: Optional[str]) -> None:
+    norm_title, norm_platform = miss_key(title, platform)
+    if not norm_title: return
+    base = _retry_hours()
+    with get_db() as db:
+        db.execute(
+            """
+            INSERT INTO catalog_miss
+                (norm_title, norm_platform, title, platform, miss_count, first_missed_at, last_missed_at, next_retry_at)
+            VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, datetime('now', ?))
+            ON CONFLICT(norm_title, norm_platform) DO UPDATE SET
+                title = excluded.title,
+                platform = excluded.platform,
+                miss_count = catalog_miss.miss_count + 1,
+                last_missed_at = CURRENT_TIMESTAMP,
+                next_retry_at = datetime('now', '+' || MIN(? * (1 << catalog_miss.miss_count), ?) || ' hours')
+            """,
+            (norm_title, norm_platform, title, platform or "", f"+{base} hours", base, MAX_RETRY_HOURS),
+        )
+        db.commit()
+
+
+def clear_catalog_miss(title: str, platform: Optional[str]) -> None:
+    key = miss_key(title, platform)
+    with get_db() as db:
+        # Most successful lookups were never misses; only write (and commit) when there is a row to drop.
+        if not db.execute("SELECT 1 FROM catalog_miss WHERE norm_title = ? AND norm_platform = ?", key).fetchone():
+            return
+        db.execute("DELETE FROM catalog_miss WHERE norm_title = ? AND norm_platform = ?", key)
+        db.commit()
+
+
+def pending_catalog_misses(pairs: Iterable[tuple]) -> set:
+    """Keys (see miss_key) among (title, platform) pairs whose next retry is still in the future."""
+    keys = {miss_key(title, platform) for title, platform in pairs}
+    if not keys:
+        return set()
+    with get_db() as db:
+        rows = db.execute(
+            "SELECT norm_title, norm_platform FROM catalog_miss WHERE next_retry_at > datetime('now')"
+        ).fetchall()
+    return {(row["norm_title"], row["norm_platform"]) for row in rows} & keys
+
+
+def list_catalog_misses(limit: int = 100, offset: int = 0) -> dict:
+    with get_db() as db:
+        total = db.execute("SELECT COUNT(*) FROM catalog_miss").fetchone()[0]
+        rows = db.execute(
+            """
+            SELECT title, platform, norm_title, norm_platform, miss_count, first_missed_at, last_missed_at, next_retry_at,
+                   next_retry_at > datetime('now') AS suppressed
+            FROM catalog_miss
+            ORDER BY last_missed_at DESC, norm_title
+            LIMIT ? OFFSET ?
+            """,
+            (limit, offset),
+        ).fetchall()
+    items = []
+    for row in rows:
+        item = dict_from_row(row)
+        item["suppressed"] = bool(item["suppressed"])
+        items.append(item)
+    return {"total": total, "items": items}
+
+
+def clear_catalog_misses(title: Optional[str] = None, platform: Optional[str] = None) -> int:
+    with get_db() as db:
+        if title:
+            norm_title, norm_platform = miss_key(title, platform)
+            cursor = db.execute("DELETE FROM catalog_miss WHERE norm_title = ? AND norm_platform = ?", (norm_title, norm_platform))
+        else:
+            cursor = db.execute("DELETE FROM catalog_miss")
+        db.commit()
+    return cursor.rowcount
@@ -0,0 +1,151 @@
+"""
+Per-platform catalog crawl checkpoints.
+
+crawl_platform_catalog writes a checkpoint after every page its consumer has
+stored: pages done, the next request (url, method, params) and the
+pagination guards (seen cursors, last page signature). A crawl that stopped on a
+failed request or a restart resumes from that checkpoint on its next run
+instead of starting again at page 1.
+"""
+import json
+from typing import Optional
+
+from ...database import dict_from_row, get_db
+
+# Crawls in these states stopped before the last page and can be resumed.
+# "paused" crawls used up the page allowance their run gave them.
+RESUMABLE_STATUSES = ("running", "failed", "interrupted", "paused")
+
+
+def load_resumable_crawl(platform_slug: str) -> Optional[dict]:
+    with get_db() as db:
+        row = db.execute("SELECT * FROM catalog_crawl_state WHERE platform_slug = ?", (platform_slug,)).fetchone()
+    if not row:
+        return None
+    state = dict_from_row(row)
+    if state["status"] not in RESUMABLE_STATUSES or not state.get("next_url"):
+        return None
+    return {
+        "pages_done": int(state.get("pages_done") or 0),
+        "entries_scraped": int(state.get("entries_scraped") or 0),
+        "next_url": state["next_url"],
+        "next_method": state.get("next_method") or "GET",
+        "next_params": json.loads(state.get("next_params") or "{}"),
+        "seen_cursors": set(json.loads(state.get("seen_cursors") or "[]")),
+        "last_signature": tuple(json.loads(state["last_signature"])) if state.get("last_signature") else None,
+        "page_size_hint": state.get("page_size_hint"),
+    }
+
+
+def start_crawl(platform_slug: str, platform_label: str, resumed: bool) -> None:
+    with get_db() as db:
+        if resumed:
+            db.execute(
+                """
+                UPDATE catalog_crawl_state
+                SET status = 'running', platform_label = ?, last_error = NULL, finished_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE platform_slug = ?
+                """,
+                (platform_label, platform_slug),
+            )
+        else:
+            db.execute(
+                """
+                INSERT INTO catalog_crawl_state (platform_slug, platform_label, status, pages_done, entries_scraped, started_at, updated_at)
+                VALUES (?, ?, 'running', 0, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                ON CONFLICT(platform_slug) DO UPDATE SET
+                    platform_label = excluded.platform_label, status = 'running', pages_done = 0, entries_scraped = 0,
+                    next_url = NULL, next_method = NULL, next_params = NULL, seen_cursors = NULL,
+                    last_signature = NULL, page_size_hint = NULL, last_error = NULL, finished_at = NULL,
+                    started_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                """,
+                (platform_slug, platform_label),
+            )
+        db.commit()
+
+
+def save_crawl_checkpoint(
+    platform_slug: str,
+    *,
+    pages_done: int,
+    entries_scraped: int,
+    next_url: str,
+    next_method: str,
+    next_params: Optional[dict],
+    seen_cursors: set,
+    last_signature: Optional[tuple],
+    page_size_hint: Optional[int],
+) -> None:
+    with get_db() as db:
+        db.execute(
+            """
+            UPDATE catalog_crawl_state
+            SET pages_done = ?, entries_scraped = ?, next_url = ?, next_method = ?, next_params = ?,
+                seen_cursors = ?, last_signature = ?, page_size_hint = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE platform_slug = ?
+            """,
+            (
+                pages_done,
+                entries_scraped,
+                next_url,
+                next_method,
+                json.dumps(next_params or {}),
+                json.dumps(sorted(seen_cursors)),
+                json.dumps(list(last_signature)) if last_signature else None,
+                page_size_hint,
+                platform_slug,
+            ),
+        )
+        db.commit()
+
+
+def finish_crawl(
+    platform_slug: str,
+    status: str,
+    error: Optional[str] = None,
+    pages_done: Optional[int] = None,
+    entries_scraped: Optional[int] = None,
+) -> None:
+    """Record how a crawl ended; completed crawls drop their resume point."""
+    with get_db() as db:
+        if status == "completed":
+            db.execute(
+                """
+                UPDATE catalog_crawl_state
+                SET status = 'completed', last_error = NULL, next_url = NULL, next_method = NULL, next_params = NULL,
+                    seen_cursors = NULL, pages_done = COALESCE(?, pages_done),
+                    entries_scraped = COALESCE(?, entries_scraped),
+                    finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE platform_slug = ?
+                """,
+                (pages_done, entries_scraped, platform_slug),
+            )
+        else:
+            # Progress stays at the last checkpoint so a resume doesn't skip pages.
+            db.execute(
+                "UPDATE catalog_crawl_state SET status = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP WHERE platform_slug = ?",
+                (status, error, platform_slug),
+            )
+        db.commit()
+
+
+def list_crawl_states() -> list:
+    with get_db() as db:
+        rows = db.execute("SELECT * FROM catalog_crawl_state ORDER BY updated_at DESC, platform_slug").fetchall()
+    states = []
+    for row in rows:
+        item = dict_from_row(row)
+        states.append({
+            "platform_slug": item["platform_slug"],
+            "platform_label": item["platform_label"],
+            "status": item["status"],
+            "pages_done": item["pages_done"],
+            "entries_scraped": item["entries_scraped"],
+            "resumable": item["status"] in RESUMABLE_STATUSES and bool(item.get("next_url")),
+            "last_error": item.get("last_error"),
+            "started_at": item.get("started_at"),
+            "updated_at": item.get("updated_at"),
+            "finished_at": item.get("finished_at"),
+        })
+    return states
@@ -0,0 +1,136 @@
+"""
+Freshness-driven catalog refresh planning.
+
+Instead of re-crawling every owned platform on each scheduler tick, each run
+spends a fixed page budget (CATALOG_REFRESH_PAGE_BUDGET, roughly one request per
+page) on the platforms that need it most. A platform's priority grows with the
+average age of its price_catalog.scraped_at, with how many owned games and how
+much owned value sit on it, and with how often its prices changed recently
+(price_catalog.changed_at). Platforms are popped off a max-heap until the budget
+is spent; a crawl cut short by its page allowance pauses at its checkpoint and
+continues on a later run.
+"""
+import heapq
+import math
+from typing import Optional
+
+from ...database import get_db
+from .crawl_state import list_crawl_states
+from .utils import PLATFORM_SLUGS, _env_any
+
+DEFAULT_PAGE_BUDGET = 150
+DEFAULT_MAX_PAGES_PER_PLATFORM = 40
+# Platforms refreshed more recently than this are left alone.
+DEFAULT_MIN_AGE_HOURS = 12.0
+# Age assumed for a platform that has no catalog rows yet.
+UNSCRAPED_AGE_HOURS = 24.0 * 90
+# Listing pages hold about this many games; used to size small platforms.
+ROWS_PER_PAGE = 50
+VOLATILITY_WINDOW_DAYS = 30
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return max(cast(0), cast(_env_any(name) or default))
+    except ValueError:
+        return default
+
+
+def platform_slug_for(platform_name: str) -> Optional[str]:
+    slug = PLATFORM_SLUGS.get(platform_name)
+    if slug: return slug
+    for label, candidate in PLATFORM_SLUGS.items():
+        if label.lower() == platform_name.lower():
+            return candidate
+    return None
+
+
+def refresh_priority(signal: dict) -> float:
+    """Staleness (hours) weighted by ownership and by how volatile the platform's prices are."""
+    importance = 1.0 + math.log1p(signal["owned_games"]) + math.log1p(signal["owned_value"]) / 2
+    return signal["age_hours"] * importance * (0.5 + signal["volatility"])
+
+
+def rank_refresh_targets(
+    signals: list,
+    budget: int,
+    max_pages: int,
+    min_age_hours: float = DEFAULT_MIN_AGE_HOURS,
+) -> list:
+    """
+    Hand out `budget` pages to platform signals, highest priority first.
+
+    Each platform gets at most `max_pages`, or fewer when its catalog is known to
+    be smaller. Returns the plan as dicts (signal fields plus priority and pages).
+    """
+    heap = []
+    for signal in signals:
+        if signal["age_hours"] < min_age_hours: continue
+        heapq.heappush(heap, (-refresh_priority(signal), signal["slug"], signal))
+
+    plan = []
+    remaining = budget
+    while heap and remaining > 0:
+        neg_priority, _slug, signal = heapq.heappop(heap)
+        needed = max_pages
+        if signal["catalog_rows"]:
+            needed = min(needed, math.ceil(signal["catalog_rows"] / ROWS_PER_PAGE) + 1 - signal["pages_done"])
+        pages = min(max(needed, 1), remaining)
+        remaining -= pages
+        plan.append({**signal, "priority": round(-neg_priority, 2), "pages": pages})
+    return plan
+
+
+def platform_refresh_signals() -> list:
+    """Freshness, ownership and volatility per platform that has games in the collection."""
+    with get_db() as db:
+        owned = db.execute(
+            """
+            SELECT p.name AS platform_name,
+                   SUM(CASE WHEN g.is_wishlist = 0 THEN 1 ELSE 0 END) AS owned_games,
+                   SUM(CASE WHEN g.is_wishlist = 0 THEN COALESCE(g.current_value, 0) * COALESCE(g.quantity, 1) ELSE 0 END) AS owned_value
+            FROM games g JOIN platforms p ON g.platform_id = p.id
+            WHERE p.name IS NOT NULL
+            GROUP BY p.name
+            """
+        ).fetchall()
+        catalog = db.execute(
+            f"""
+            SELECT lower(platform) AS platform_key, COUNT(*) AS catalog_rows,
+                   (julianday('now') - AVG(julianday(scraped_at))) * 24 AS age_hours,
+                   AVG(CASE WHEN changed_at >= datetime('now', '-{VOLATILITY_WINDOW_DAYS} days') THEN 1.0 ELSE 0.0 END) AS volatility
+            FROM price_catalog
+            GROUP BY lower(platform)
+            """
+        ).fetchall()
+    catalog_by_platform = {row["platform_key"]: row for row in catalog}
+    crawls = {state["platform_slug"]: state for state in list_crawl_states()}
+
+    signals = []
+    for row in owned:
+        name = row["platform_name"]
+        slug = platform_slug_for(name)
+        if not slug: continue
+        label = next((lbl for lbl, s in PLATFORM_SLUGS.items() if s == slug), name)
+        stats = catalog_by_platform.get(name.lower()) or catalog_by_platform.get(label.lower())
+        crawl = crawls.get(slug) or {}
+        signals.append({
+            "platform": name,
+            "slug": slug,
+            "owned_games": int(row["owned_games"] or 0),
+            "owned_value": round(float(row["owned_value"] or 0), 2),
+            "catalog_rows": int(stats["catalog_rows"]) if stats else 0,
+            "age_hours": round(float(stats["age_hours"]), 1) if stats and stats["age_hours"] is not None else UNSCRAPED_AGE_HOURS,
+            "volatility": round(float(stats["volatility"] or 0), 3) if stats else 0.0,
+            "pages_done": int(crawl.get("pages_done") or 0) if crawl.get("resumable") else 0,
+        })
+    return signals
+
+
+def plan_catalog_refresh(budget: Optional[int] = None, max_pages: Optional[int] = None) -> list:
+    if budget is None:
+        budget = _env_number("CATALOG_REFRESH_PAGE_BUDGET", DEFAULT_PAGE_BUDGET)
+    if max_pages is None:
+        max_pages = _env_number("CATALOG_REFRESH_MAX_PAGES", DEFAULT_MAX_PAGES_PER_PLATFORM)
+    min_age = _env_number("CATALOG_REFRESH_MIN_AGE_HOURS", DEFAULT_MIN_AGE_HOURS, float)
+    return rank_refresh_targets(platform_refresh_signals(), budget, max(1, max_pages), min_age)
@@ -0,0 +1,195 @@
+"""
+USD -> EUR exchange rates.
+
+get_eur_rate() used to call api.frankfurter.app on every price lookup, bulk job
+and scrape, and fell back to a hardcoded rate whenever that failed. Rates now
+come from an in-memory copy of the newest known daily rate; once it is older
+than FX_RATE_TTL seconds (default 6 hours) a refresh starts in the background
+and callers keep the last known good rate meanwhile. Refreshes are
+single-flight: concurrent callers share one request. Every daily rate fetched
+is kept in the fx_rates table, so stored USD prices can be converted with the
+rate of the day they were fetched (eur_rate_on) and a restart does not need
+the network. Only a database that has never stored a rate waits for a fetch,
+and the hardcoded rate is used only if that fails.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+from ...database import get_db
+from ..http_client import pooled_client
+from .utils import _env_any
+
+logger = logging.getLogger("collectabase.fx")
+
+FRANKFURTER_URL = "https://api.frankfurter.app"
+BASE, QUOTE = "USD", "EUR"
+FALLBACK_EUR_RATE = 0.92
+DEFAULT_TTL_SECONDS = 6 * 3600
+RETRY_AFTER_FAILURE_SECONDS = 300
+COLD_START_TIMEOUT = 5.0
+# Gaps up to this many days are filled from the time-series endpoint in one request.
+MAX_BACKFILL_DAYS = 366
+
+_state = {
+    "rate": None,
+    "rate_date": None,
+    "loaded_at": 0.0,
+    "retry_after": 0.0,
+    "last_refresh_at": None,
+    "last_error": None,
+    "refreshes": 0,
+}
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def fx_rate_ttl() -> int:
+    try:
+        return max(60, int(_env_any("FX_RATE_TTL") or DEFAULT_TTL_SECONDS))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def _latest_stored_rate() -> Optional[tuple]:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT rate_date, rate FROM fx_rates WHERE base = ? AND quote = ? ORDER BY rate_date DESC LIMIT 1",
+            (BASE, QUOTE),
+        ).fetchone()
+    return (row["rate_date"], float(row["rate"])) if row else None
+
+
+def _store_rates(rates: dict) -> None:
+    with get_db() as db:
+        db.executemany(
+            """
+            INSERT INTO fx_rates (base, quote, rate_date, rate, fetched_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(base, quote, rate_date) DO UPDATE SET rate = excluded.rate, fetched_at = excluded.fetched_at
+            """,
+            [(BASE, QUOTE, day, rate) for day, rate in rates.items()],
+        )
+        db.commit()
+
+
+async def _fetch_rates(last_date: Optional[str]) -> dict:
+    """{rate_date: rate} for the days since `last_date` (or just the latest day)."""
+    params = {"from": BASE, "to": QUOTE}
+    async with pooled_client(timeout=5) as client:
+        if last_date:
+            start = date.fromisoformat(last_date) + timedelta(days=1)
+            gap = (date.today() - start).days
+            if 0 < gap <= MAX_BACKFILL_DAYS:
+                res = await client.get(f"{FRANKFURTER_URL}/{start.isoformat()}..", params=params)
+                res.raise_for_status()
+                series = res.json().get("rates") or {}
+                rates = {day: float(values[QUOTE]) for day, values in series.items() if QUOTE in values}
+                if rates:
+                    return rates
+        res = await client.get(f"{FRANKFURTER_URL}/latest", params=params)
+        res.raise_for_status()
+        payload = res.json()
+        return {payload["date"]: float(payload["rates"][QUOTE])}
+
+
+async def _refresh() -> Optional[float]:
+    _state["refreshes"] += 1
+    try:
+        latest = _latest_stored_rate()
+        rates = await _fetch_rates(latest[0] if latest else None)
+        _store_rates(rates)
+    except Exception as e:
+        _state["last_error"] = str(e) or type(e).__name__
+        _state["retry_after"] = time.time() + RETRY_AFTER_FAILURE_SECONDS
+        logger.warning(f"EUR rate refresh failed, keeping rate {_state['rate']}: {e}")
+        return None
+    rate_date = max(rates)
+    _state.update(
+        rate=rates[rate_date], rate_date=rate_date, loaded_at=time.time(),
+        last_refresh_at=time.time(), last_error=None,
+    )
+    return _state["rate"]
+
+
+def _start_refresh() -> asyncio.Task:
+    global _refresh_task
+    loop = asyncio.get_running_loop()
+    task = _refresh_task
+    if task is None or task.done() or task.get_loop() is not loop:
+        task = _refresh_task = loop.create_task(_refresh())
+    return task
+
+
+async def refresh_fx_rates() -> Optional[float]:
+    """Fetch rates now (sharing a refresh already in flight); returns the new rate or None on failure."""
+    return await asyncio.shield(_start_refresh())
+
+
+def _load_stored_rate() -> bool:
+    stored = _latest_stored_rate()
+    if not stored:
+        return False
+    rate_date, rate = stored
+    # A stored rate from today or yesterday is as fresh as the API gets; older ones are refreshed soon.
+    age_days = (date.today() - date.fromisoformat(rate_date)).days
+    loaded_at = time.time() if age_days <= 1 else 0.0
+    _state.update(rate=rate, rate_date=rate_date, loaded_at=loaded_at)
+    return True
+
+
+async def get_eur_rate() -> float:
+    """Current USD -> EUR rate without waiting on the network (see module docstring)."""
+    now = time.time()
+    if _state["rate"] is None and not _load_stored_rate():
+        if now >= _state["retry_after"]:
+            try:
+                await asyncio.wait_for(refresh_fx_rates(), timeout=COLD_START_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        if _state["rate"] is None:
+            logger.warning(f"No EUR rate known yet, using {FALLBACK_EUR_RATE}")
+            return FALLBACK_EUR_RATE
+        return _state["rate"]
+
+    if now - _state["loaded_at"] > fx_rate_ttl() and now >= _state["retry_after"]:
+        _start_refresh()
+    return _state["rate"]
+
+
+def eur_rate_on(day: str) -> float:
+    """The USD -> EUR rate for `day` (a date or timestamp string): that day's rate, else the nearest stored one."""
+    day = str(day)[:10]
+    with get_db() as db:
+        row = db.execute(
+            """
+            SELECT rate FROM fx_rates WHERE base = ? AND quote = ? AND rate_date <= ?
+            ORDER BY rate_date DESC LIMIT 1
+            """,
+            (BASE, QUOTE, day),
+        ).fetchone() or db.execute(
+            "SELECT rate FROM fx_rates WHERE base = ? AND quote = ? ORDER BY rate_date ASC LIMIT 1",
+            (BASE, QUOTE),
+        ).fetchone()
+    if row:
+        return float(row["rate"])
+    return _state["rate"] if _state["rate"] is not None else FALLBACK_EUR_RATE
+
+
+def fx_rate_status() -> dict:
+    with get_db() as db:
+        stored_days = db.execute("SELECT COUNT(*) FROM fx_rates WHERE base = ? AND quote = ?", (BASE, QUOTE)).fetchone()[0]
+    loaded_at = _state["loaded_at"]
+    return {
+        "pair": f"{BASE}/{QUOTE}",
+        "rate": _state["rate"],
+        "rate_date": _state["rate_date"],
+        "ttl_seconds": fx_rate_ttl(),
+        "age_seconds": round(time.time() - loaded_at) if loaded_at else None,
+        "stored_days": stored_days,
+        "refreshes": _state["refreshes"],
+        "last_refresh_at": _state["last_refresh_at"],
+        "refresh_in_flight": _refresh_task is not None and not _refresh_task.done(),
+        "last_error": _state["last_error"],
+    }
@@ -0,0 +1,207 @@
+"""
+Tiered retention for price_history.
+
+Automatic snapshots are kept as they are for PRICE_HISTORY_RAW_DAYS (default
+30). Older ones are rolled up into one price_history_rollup row per game, source
+and day (min / max / last of each price), and daily rows older than
+PRICE_HISTORY_DAILY_DAYS (default 365) are rolled up again per ISO week. Manual
+snapshots and the newest snapshot of each game and source are never rolled up,
+since change-only writes compare against that row. Reads go through
+price_history_entries(), which merges the tiers newest first.
+"""
+import logging
+from datetime import datetime, timezone
+
+from ...database import dict_from_row, get_db, set_app_meta
+from .utils import _env_any
+
+logger = logging.getLogger("collectabase.price_history")
+
+DEFAULT_RAW_DAYS = 30
+DEFAULT_DAILY_DAYS = 365
+
+_ROLLUP_COLUMNS = (
+    "game_id, source, granularity, period_start, samples, "
+    "loose_min, loose_max, loose_last, complete_min, complete_max, complete_last, "
+    "new_min, new_max, new_last, eur_rate, pricecharting_id, first_fetched_at, last_fetched_at"
+)
+
+
+def _merge_min(column: str) -> str:
+    return f"{column} = MIN(COALESCE({column}, excluded.{column}), COALESCE(excluded.{column}, {column}))"
+
+
+def _merge_max(column: str) -> str:
+    return f"{column} = MAX(COALESCE({column}, excluded.{column}), COALESCE(excluded.{column}, {column}))"
+
+
+def _merge_last(column: str) -> str:
+    return f"{column} = CASE WHEN excluded.last_fetched_at >= last_fetched_at THEN excluded.{column} ELSE {column} END"
+
+
+# A period rolled up twice (a rerun after new late rows, or days joining an existing week) is merged, not replaced.
+_ROLLUP_MERGE = ",\n    ".join([
+    "samples = samples + excluded.samples",
+    *(_merge_min(f"{price}_min") for price in ("loose", "complete", "new")),
+    *(_merge_max(f"{price}_max") for price in ("loose", "complete", "new")),
+    *(_merge_last(column) for column in ("loose_last", "complete_last", "new_last", "eur_rate", "pricecharting_id")),
+    "first_fetched_at = MIN(first_fetched_at, excluded.first_fetched_at)",
+    "last_fetched_at = MAX(last_fetched_at, excluded.last_fetched_at)",
+])
+
+
+def _days_setting(name: str, default: int) -> int:
+    try:
+        return max(1, int(_env_any(name) or default))
+    except ValueError:
+        return default
+
+
+def _used_bytes(db) -> int:
+    page_size = db.execute("PRAGMA page_size").fetchone()[0]
+    page_count = db.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - free_pages) * page_size
+
+
+def _roll_up_raw(db, cutoff_days: int) -> tuple:
+    db.execute("DROP TABLE IF EXISTS temp.price_history_expiring")
+    db.execute(
+        """
+        CREATE TEMP TABLE price_history_expiring AS
+        SELECT * FROM (
+            SELECT id, game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id, fetched_at,
+                   ROW_NUMBER() OVER (PARTITION BY game_id, source ORDER BY fetched_at DESC, id DESC) AS newest
+            FROM price_history
+            WHERE source <> 'manual'
+        )
+        WHERE newest > 1 AND fetched_at < date('now', ?)
+        """,
+        (f"-{cutoff_days} days",),
+    )
+    written = db.execute(
+        f"""
+        INSERT INTO price_history_rollup ({_ROLLUP_COLUMNS})
+        SELECT game_id, source, 'day', day, COUNT(*),
+               MIN(loose_price), MAX(loose_price), MAX(CASE WHEN rn = 1 THEN loose_price END),
+               MIN(complete_price), MAX(complete_price), MAX(CASE WHEN rn = 1 THEN complete_price END),
+               MIN(new_price), MAX(new_price), MAX(CASE WHEN rn = 1 THEN new_price END),
+               MAX(CASE WHEN rn = 1 THEN eur_rate END), MAX(CASE WHEN rn = 1 THEN pricecharting_id END),
+               MIN(fetched_at), MAX(fetched_at)
+        FROM (
+            SELECT *, date(fetched_at) AS day,
+                   ROW_NUMBER() OVER (PARTITION BY game_id, source, date(fetched_at) ORDER BY fetched_at DESC, id DESC) AS rn
+            FROM price_history_expiring
+        )
+        WHERE true
+        GROUP BY game_id, source, day
+        ON CONFLICT(game_id, source, granularity, period_start) DO UPDATE SET
+            {_ROLLUP_MERGE}
+        """
+    ).rowcount
+    removed = db.execute("DELETE FROM price_history WHERE id IN (SELECT id FROM price_history_expiring)").rowcount
+    db.execute("DROP TABLE price_history_expiring")
+    return written, removed
+
+
+def _roll_up_daily(db, cutoff_days: int) -> tuple:
+    db.execute("DROP TABLE IF EXISTS temp.price_history_rollup_expiring")
+    db.execute(
+        """
+        CREATE TEMP TABLE price_history_rollup_expiring AS
+        SELECT *, date(period_start, '-6 days', 'weekday 1') AS week FROM price_history_rollup
+        WHERE granularity = 'day' AND period_start < date('now', ?)
+        """,
+        (f"-{cutoff_days} days",),
+    )
+    written = db.execute(
+        f"""
+        INSERT INTO price_history_rollup ({_ROLLUP_COLUMNS})
+        SELECT game_id, source, 'week', week, SUM(samples),
+               MIN(loose_min), MAX(loose_max), MAX(CASE WHEN rn = 1 THEN loose_last END),
+               MIN(complete_min), MAX(complete_max), MAX(CASE WHEN rn = 1 THEN complete_last END),
+               MIN(new_min), MAX(new_max), MAX(CASE WHEN rn = 1 THEN new_last END),
+               MAX(CASE WHEN rn = 1 THEN eur_rate END), MAX(CASE WHEN rn = 1 THEN pricecharting_id END),
+               MIN(first_fetched_at), MAX(last_fetched_at)
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY game_id, source, week ORDER BY period_start DESC) AS rn
+            FROM price_history_rollup_expiring
+        )
+        WHERE true
+        GROUP BY game_id, source, week
+        ON CONFLICT(game_id, source, granularity, period_start) DO UPDATE SET
+            {_ROLLUP_MERGE}
+        """
+    ).rowcount
+    removed = db.execute(
+        "DELETE FROM price_history_rollup WHERE id IN (SELECT id FROM price_history_rollup_expiring)"
+    ).rowcount
+    db.execute("DROP TABLE price_history_rollup_expiring")
+    return written, removed
+
+
+def compact_price_history() -> dict:
+    """Roll expired raw snapshots into daily rows and old daily rows into weekly rows."""
+    raw_days = _days_setting("PRICE_HISTORY_RAW_DAYS", DEFAULT_RAW_DAYS)
+    daily_days = max(raw_days, _days_setting("PRICE_HISTORY_DAILY_DAYS", DEFAULT_DAILY_DAYS))
+    with get_db() as db:
+        used_before = _used_bytes(db)
+        daily_written, raw_removed = _roll_up_raw(db, raw_days)
+        weekly_written, daily_removed = _roll_up_daily(db, daily_days)
+        db.commit()
+    with get_db() as db:
+        used_after = _used_bytes(db)
+
+    result = {
+        "raw_removed": raw_removed,
+        "daily_written": daily_written,
+        "daily_removed": daily_removed,
+        "weekly_written": weekly_written,
+        # Pages freed inside the database file; the file itself only shrinks on VACUUM.
+        "bytes_reclaimed": max(0, used_before - used_after),
+    }
+    set_app_meta("last_price_history_compact_at", datetime.now(timezone.utc).replace(microsecond=0).isoformat())
+    set_app_meta("last_price_history_compact_removed", str(raw_removed + daily_removed))
+    set_app_meta("last_price_history_compact_bytes", str(result["bytes_reclaimed"]))
+    logger.info(
+        f"Price history compaction: {raw_removed} snapshots into {daily_written} daily rows, "
+        f"{daily_removed} daily rows into {weekly_written} weekly rows, {result['bytes_reclaimed']} bytes reclaimed"
+    )
+    return result
+
+
+def _rollup_entry(row) -> dict:
+    item = dict_from_row(row)
+    return {
+        "id": None,
+        "game_id": item["game_id"],
+        "source": item["source"],
+        "loose_price": item["loose_last"],
+        "complete_price": item["complete_last"],
+        "new_price": item["new_last"],
+        "eur_rate": item["eur_rate"],
+        "pricecharting_id": item["pricecharting_id"],
+        "fetched_at": item["last_fetched_at"],
+        "last_confirmed_at": item["last_fetched_at"],
+        "tier": item["granularity"],
+        "period_start": item["period_start"],
+        "samples": item["samples"],
+        **{key: item[key] for key in ("loose_min", "loose_max", "complete_min", "complete_max", "new_min", "new_max")},
+    }
+
+
+def price_history_entries(game_id: int, limit: int = 20) -> list:
+    """The newest `limit` entries for a game across raw snapshots and daily / weekly rollups."""
+    with get_db() as db:
+        raw = db.execute(
+            "SELECT * FROM price_history WHERE game_id = ? ORDER BY fetched_at DESC, id DESC LIMIT ?",
+            (game_id, limit),
+        ).fetchall()
+        rollups = db.execute(
+            "SELECT * FROM price_history_rollup WHERE game_id = ? ORDER BY last_fetched_at DESC LIMIT ?",
+            (game_id, limit),
+        ).fetchall()
+    # Manual snapshots are never rolled up, so they can be older than rollup rows.
+    entries = [{**dict_from_row(row), "tier": "raw"} for row in raw] + [_rollup_entry(row) for row in rollups]
+    entries.sort(key=lambda entry: entry["fetched_at"] or "", reverse=True)
+    return entries[:limit]
@@ -0,0 +1,54 @@
+"""
+Materialized latest price per game and source.
+
+game_price_latest holds a copy of each (game_id, source)'s newest price_history
+row, so the collection grid and the game page get current prices with a primary
+key lookup instead of sorting the game's history. Every code path that inserts
+or deletes price_history rows calls refresh_latest_prices() with the same db
+handle before committing, so both tables change in one transaction.
+"""
+from typing import Iterable
+
+_CHUNK = 500
+
+
+def refresh_latest_prices(db, game_ids: Iterable[int]) -> None:
+    """Recompute game_price_latest for `game_ids` from price_history; the caller commits."""
+    ids = sorted({int(game_id) for game_id in game_ids})
+    for start in range(0, len(ids), _CHUNK):
+        chunk = ids[start:start + _CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        db.execute(
+            f"""
+            DELETE FROM game_price_latest
+            WHERE game_id IN ({placeholders}) AND NOT EXISTS (
+                SELECT 1 FROM price_history h
+                WHERE h.game_id = game_price_latest.game_id AND h.source = game_price_latest.source
+            )
+            """,
+            chunk,
+        )
+        db.execute(
+            f"""
+            INSERT INTO game_price_latest
+                (game_id, source, price_history_id, loose_price, complete_price, new_price,
+                 eur_rate, pricecharting_id, fetched_at, last_confirmed_at)
+            SELECT game_id, source, id, loose_price, complete_price, new_price,
+                   eur_rate, pricecharting_id, fetched_at, last_confirmed_at
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY game_id, source ORDER BY fetched_at DESC, id DESC) AS rn
+                FROM price_history WHERE game_id IN ({placeholders}) AND source IS NOT NULL
+            )
+            WHERE rn = 1
+            ON CONFLICT(game_id, source) DO UPDATE SET
+                price_history_id = excluded.price_history_id,
+                loose_price = excluded.loose_price,
+                complete_price = excluded.complete_price,
+                new_price = excluded.new_price,
+                eur_rate = excluded.eur_rate,
+                pricecharting_id = excluded.pricecharting_id,
+                fetched_at = excluded.fetched_at,
+                last_confirmed_at = excluded.last_confirmed_at
+            """,
+            chunk,
+        )
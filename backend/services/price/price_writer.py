@@ -0,0 +1,176 @@
+"""
+Batched price writes.
+
+Bulk jobs used to open a session and commit once per game. PriceWriter buffers
+price_history rows (and, when given, the games.current_value they imply) and
+writes them with executemany, committing every `batch_size` rows and once more
+on flush()/exit.
+
+In the default "changes" mode (PRICE_HISTORY_MODE) a snapshot is only inserted
+when its loose, CIB or new price moved by more than PRICE_HISTORY_EPSILON from
+the game's latest snapshot of the same source; otherwise that latest row just
+gets its last_confirmed_at bumped. "all" inserts every snapshot as before.
+
+Async callers use aadd()/aflush() and `async with`: the batch is taken on the
+loop and written by a worker thread, one batch at a time and in order, so the
+executemany and commit never block the event loop.
+"""
+import asyncio
+from typing import Optional
+
+from ...database import get_db
+from .latest_prices import refresh_latest_prices
+from .utils import _env_any
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_EPSILON = 0.01
+_LOOKUP_CHUNK = 500
+
+
+def _change_only_mode() -> bool:
+    return (_env_any("PRICE_HISTORY_MODE") or "changes").strip().lower() != "all"
+
+
+def _price_epsilon() -> float:
+    try:
+        return max(0.0, float(_env_any("PRICE_HISTORY_EPSILON") or DEFAULT_EPSILON))
+    except ValueError:
+        return DEFAULT_EPSILON
+
+
+def _price_moved(old: Optional[float], new: Optional[float], epsilon: float) -> bool:
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    # The small slack keeps float noise (9.21 - 9.20) from counting as a move past epsilon.
+    return abs(float(old) - float(new)) > epsilon + 1e-9
+
+
+def _latest_snapshots(db, game_ids: list) -> dict:
+    """{(game_id, source): (id, loose, cib, new)} for each game's newest snapshot per source."""
+    latest = {}
+    for start in range(0, len(game_ids), _LOOKUP_CHUNK):
+        chunk = game_ids[start:start + _LOOKUP_CHUNK]
+        rows = db.execute(
+            f"""
+            SELECT id, game_id, source, loose_price, complete_price, new_price FROM (
+                SELECT id, game_id, source, loose_price, complete_price, new_price,
+                       ROW_NUMBER() OVER (PARTITION BY game_id, source ORDER BY fetched_at DESC, id DESC) AS rn
+                FROM price_history WHERE game_id IN ({",".join("?" * len(chunk))})
+            ) WHERE rn = 1
+            """,
+            chunk,
+        ).fetchall()
+        for row in rows:
+            latest[(row["game_id"], row["source"])] = (row["id"], row["loose_price"], row["complete_price"], row["new_price"])
+    return latest
+
+
+class PriceWriter:
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, change_only: Optional[bool] = None):
+        self.batch_size = max(1, batch_size)
+        self.change_only = _change_only_mode() if change_only is None else change_only
+        self.epsilon = _price_epsilon()
+        self.rows_written = 0
+        self.rows_confirmed = 0
+        self.commits = 0
+        self._history = []
+        self._values = []
+        self._write_lock = asyncio.Lock()
+
+    def _append(
+        self,
+        game_id: int,
+        source: str,
+        loose_price: Optional[float],
+        complete_price: Optional[float],
+        new_price: Optional[float],
+        eur_rate: float = 1.0,
+        pricecharting_id: Optional[str] = None,
+        current_value: Optional[float] = None,
+    ) -> bool:
+        self._history.append((game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id))
+        if current_value is not None:
+            self._values.append((current_value, game_id))
+        return len(self._history) >= self.batch_size
+
+    def add(self, *args, **kwargs) -> None:
+        if self._append(*args, **kwargs):
+            self.flush()
+
+    async def aadd(self, *args, **kwargs) -> None:
+        if self._append(*args, **kwargs):
+            await self.aflush()
+
+    def _split_changes(self, db, history: list) -> tuple:
+        latest = _latest_snapshots(db, sorted({row[0] for row in history}))
+        inserts, confirms = [], []
+        for row in history:
+            key = (row[0], row[1])
+            previous = latest.get(key)
+            if previous and not any(_price_moved(old, new, self.epsilon) for old, new in zip(previous[1:], row[2:5])):
+                if previous[0] is not None:
+                    confirms.append((previous[0],))
+                continue
+            inserts.append(row)
+            # A repeat later in this batch compares against (and confirms) the row just queued.
+            latest[key] = (None, *row[2:5])
+        return inserts, confirms
+
+    def _take(self) -> tuple:
+        batch = (self._history, self._values)
+        self._history, self._values = [], []
+        return batch
+
+    def flush(self) -> None:
+        if self._history:
+            self._write(*self._take())
+
+    async def aflush(self) -> None:
+        if not self._history:
+            return
+        # The batch is taken before waiting, and the lock hands out turns in order, so batches land in add() order.
+        batch = self._take()
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, *batch)
+
+    def _write(self, history: list, values: list) -> None:
+        with get_db() as db:
+            inserts, confirms = self._split_changes(db, history) if self.change_only else (history, [])
+            if inserts:
+                db.executemany(
+                    """
+                    INSERT INTO price_history
+                        (game_id, source, loose_price, complete_price, new_price, eur_rate, pricecharting_id, last_confirmed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    """,
+                    inserts,
+                )
+            if confirms:
+                db.executemany("UPDATE price_history SET last_confirmed_at = CURRENT_TIMESTAMP WHERE id = ?", confirms)
+            if values:
+                db.executemany(
+                    """
+                    UPDATE games SET current_value = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND (current_value IS NULL OR current_value <> ?)
+                    """,
+                    [(value, game_id, value) for value, game_id in values],
+                )
+            refresh_latest_prices(db, {row[0] for row in history})
+            db.commit()
+        self.rows_written += len(inserts)
+        self.rows_confirmed += len(confirms)
+        self.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aflush()
+        return False
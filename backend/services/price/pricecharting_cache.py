@@ -0,0 +1,203 @@
+"""
+Response cache for PriceCharting search and product pages.
+
+Library enrichment, market-price lookups and targeted catalog scrapes keep asking
+PriceCharting the same search-products and /game/... questions. Successful GET
+responses are cached under the URL plus normalized query parameters, in two
+tiers: an in-process LRU (PRICECHARTING_CACHE_ENTRIES, default 256) in front of
+the http_response_cache table. Bodies are zlib-compressed in both tiers.
+
+Within PRICECHARTING_CACHE_TTL seconds (default 6 hours; 0 disables the cache) a
+repeat lookup is served without touching the network or the request budget.
+After that the stored ETag / Last-Modified is sent along and a 304 just renews
+the entry. Expired entries are kept for STALE_RETENTION_SECONDS so they can still
+be revalidated, then pruned. Only the LRU is checked on the event loop; reads
+and writes of the table run in a worker thread.
+"""
+import asyncio
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlencode
+
+from ...database import dict_from_row, get_db
+from .ratelimit import pricecharting_limiter
+from .utils import _env_any
+
+logger = logging.getLogger("collectabase.pricecharting")
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MEMORY_ENTRIES = 256
+STALE_RETENTION_SECONDS = 7 * 24 * 3600
+_PRUNE_EVERY = 200
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    text: str
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: float = 0.0
+    from_cache: bool = False
+
+
+_memory: "OrderedDict[str, tuple]" = OrderedDict()
+_stats = {"memory_hits": 0, "disk_hits": 0, "revalidated": 0, "misses": 0, "stored": 0}
+_stores_since_prune = 0
+
+
+def _int_setting(name: str, default: int) -> int:
+    try:
+        return max(0, int(_env_any(name) or default))
+    except ValueError:
+        return default
+
+
+def cache_ttl() -> int:
+    return _int_setting("PRICECHARTING_CACHE_TTL", DEFAULT_TTL_SECONDS)
+
+
+def _normalize_param(value) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def cache_key(url: str, params: Optional[dict] = None) -> str:
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted((k, _normalize_param(v)) for k, v in params.items()))}"
+
+
+def _remember(key: str, entry: tuple) -> None:
+    _memory[key] = entry
+    _memory.move_to_end(key)
+    limit = _int_setting("PRICECHARTING_CACHE_ENTRIES", DEFAULT_MEMORY_ENTRIES)
+    while len(_memory) > limit:
+        _memory.popitem(last=False)
+
+
+def _load_disk(key: str) -> Optional[tuple]:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT url, body, etag, last_modified, expires_at FROM http_response_cache WHERE cache_key = ?",
+            (key,),
+        ).fetchone()
+    if not row:
+        return None
+    item = dict_from_row(row)
+    return item["url"], item["body"], item["etag"], item["last_modified"], float(item["expires_at"])
+
+
+async def _load(key: str) -> Optional[tuple]:
+    entry = _memory.get(key)
+    if entry is not None:
+        _memory.move_to_end(key)
+        return entry, "memory"
+    entry = await asyncio.to_thread(_load_disk, key)
+    if entry is None:
+        return None
+    _remember(key, entry)
+    return entry, "disk"
+
+
+def _persist(key: str, entry: tuple, prune: bool) -> None:
+    url, body, etag, last_modified, expires_at = entry
+    with get_db() as db:
+        db.execute(
+            """
+            INSERT INTO http_response_cache (cache_key, url, body, etag, last_modified, fetched_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                url = excluded.url, body = excluded.body, etag = excluded.etag,
+                last_modified = excluded.last_modified, fetched_at = excluded.fetched_at,
+                expires_at = excluded.expires_at
+            """,
+            (key, url, body, etag, last_modified, time.time(), expires_at),
+        )
+        if prune:
+            db.execute("DELETE FROM http_response_cache WHERE expires_at < ?", (time.time() - STALE_RETENTION_SECONDS,))
+        db.commit()
+
+
+async def _store(key: str, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], expires_at: float) -> None:
+    global _stores_since_prune
+    entry = (url, body, etag, last_modified, expires_at)
+    _remember(key, entry)
+    _stores_since_prune += 1
+    prune = _stores_since_prune >= _PRUNE_EVERY
+    if prune:
+        _stores_since_prune = 0
+    await asyncio.to_thread(_persist, key, entry, prune)
+    _stats["stored"] += 1
+
+
+def _response(url: str, body: bytes, etag, last_modified, expires_at: float, from_cache: bool) -> CachedResponse:
+    return CachedResponse(
+        status_code=200, text=zlib.decompress(body).decode("utf-8"), url=url,
+        etag=etag, last_modified=last_modified, expires_at=expires_at, from_cache=from_cache,
+    )
+
+
+async def cached_pricecharting_get(client, url: str, params: Optional[dict] = None):
+    """
+    GET a PriceCharting search or product page through the cache.
+
+    Fresh entries return without a request; otherwise the request takes a slot from
+    the shared pricecharting.com limiter and is revalidated when validators exist.
+    Non-200 responses are returned as they are and never cached.
+    """
+    ttl = cache_ttl()
+    if ttl <= 0:
+        await pricecharting_limiter().acquire()
+        return await client.get(url, params=params)
+
+    key = cache_key(url, params)
+    cached = await _load(key)
+    now = time.time()
+    if cached:
+        (cached_url, body, etag, last_modified, expires_at), tier = cached
+        if expires_at > now:
+            _stats[f"{tier}_hits"] += 1
+            return _response(cached_url, body, etag, last_modified, expires_at, from_cache=True)
+
+    headers = {}
+    if cached:
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+
+    await pricecharting_limiter().acquire()
+    res = await client.get(url, params=params, headers=headers) if headers else await client.get(url, params=params)
+
+    if res.status_code == 304 and cached:
+        _stats["revalidated"] += 1
+        await _store(key, cached_url, body, etag, last_modified, now + ttl)
+        return _response(cached_url, body, etag, last_modified, now + ttl, from_cache=True)
+
+    _stats["misses"] += 1
+    if res.status_code != 200:
+        return res
+    response_headers = getattr(res, "headers", None) or {}
+    final_url = str(getattr(res, "url", "") or url)
+    await _store(
+        key, final_url, zlib.compress(res.text.encode("utf-8")),
+        response_headers.get("etag"), response_headers.get("last-modified"), now + ttl,
+    )
+    return res
+
+
+def pricecharting_cache_stats() -> dict:
+    with get_db() as db:
+        stored = db.execute("SELECT COUNT(*) FROM http_response_cache").fetchone()[0]
+    return {"ttl_seconds": cache_ttl(), "memory_entries": len(_memory), "disk_entries": stored, **_stats}
+
+
+def clear_pricecharting_cache() -> None:
+    _memory.clear()
+    with get_db() as db:
+        db.execute("DELETE FROM http_response_cache")
+        db.commit()
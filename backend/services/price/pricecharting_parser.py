@@ -0,0 +1,169 @@
+"""
+PriceCharting HTML parsing.
+
+Pages are parsed with a SoupStrainer so only the parts we read are turned into a
+tree: the games table and next-page form of a console listing, the /game/ links
+of a search page, and the title/price cells of a product page. lxml is used as
+the tree builder when installed, html.parser otherwise.
+
+The async wrappers run the parse in a worker thread so a scrape never blocks the
+event loop (and every API request with it) while a large page is parsed.
+"""
+import asyncio
+import importlib.util
+import re
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .utils import _parse_usd_price
+
+PARSER_FEATURES = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+_PRODUCT_PRICE_IDS = ("used_price", "complete_price", "new_price")
+
+
+def _classes(attrs: dict) -> set:
+    value = attrs.get("class") or ""
+    return set(value.split() if isinstance(value, str) else value)
+
+
+def _catalog_page_part(name: str, attrs: dict) -> bool:
+    if name == "table":
+        return attrs.get("id") == "games_table"
+    if name == "form":
+        return "next_page" in _classes(attrs)
+    return False
+
+
+def _product_page_part(name: str, attrs: dict) -> bool:
+    if name == "h1":
+        return attrs.get("id") == "product_name" or "chart_title" in _classes(attrs)
+    return attrs.get("id") in _PRODUCT_PRICE_IDS or bool(_classes(attrs) & set(_PRODUCT_PRICE_IDS))
+
+
+def _game_link(name: str, attrs: dict) -> bool:
+    return name == "a" and "/game/" in (attrs.get("href") or "")
+
+
+def _soup(html: str, part) -> BeautifulSoup:
+    return BeautifulSoup(html, PARSER_FEATURES, parse_only=SoupStrainer(part))
+
+
+def _strip_host(href: str) -> str:
+    if "pricecharting.com" in href:
+        href = href.split("pricecharting.com")[1]
+    return href
+
+
+def parse_catalog_page(html: str, platform_label: str) -> Optional[Tuple[list, Optional[dict]]]:
+    """
+    Parse one console listing page.
+
+    Returns None when the page has no games table or no rows, otherwise
+    (entries, next_form) where next_form is {"method", "action", "payload"} or None.
+    """
+    soup = _soup(html, _catalog_page_part)
+    table = soup.select_one("table#games_table")
+    if not table: return None
+    rows = table.select("tbody tr")
+    if not rows: return None
+
+    entries = []
+    for row in rows:
+        title_cell = row.select_one("td.title a")
+        if not title_cell: continue
+        title = title_cell.get_text(strip=True)
+        href = _strip_host(title_cell.get("href", ""))
+        if not href.startswith("/"):
+            href = "/" + href
+        pc_id_match = re.search(r"/game/[^/]+/(.+)(?:\?|$)", href)
+        pc_id = pc_id_match.group(1) if pc_id_match else ""
+        page_url = f"https://www.pricecharting.com{href}" if href else ""
+
+        def cell_price(*classes):
+            for cls in classes:
+                td = row.select_one(f"td.{cls}")
+                if not td: continue
+                span = td.select_one("span.price, span.js-price") or td
+                parsed = _parse_usd_price(span.get_text(strip=True))
+                if parsed is not None: return parsed
+            return None
+
+        loose_usd = cell_price("used_price", "loose_price")
+        cib_usd = cell_price("cib_price", "complete_price")
+        new_usd = cell_price("new_price")
+
+        if title and (loose_usd is not None or cib_usd is not None):
+            entries.append({
+                "pricecharting_id": pc_id,
+                "title": title,
+                "platform": platform_label,
+                "loose_usd": loose_usd,
+                "cib_usd": cib_usd,
+                "new_usd": new_usd,
+                "page_url": page_url,
+            })
+
+    next_form = None
+    form = soup.select_one("form.next_page.js-next-page, form.next_page")
+    if form:
+        payload = {}
+        for inp in form.select("input[name]"):
+            name = (inp.get("name") or "").strip()
+            if not name: continue
+            payload[name] = (inp.get("value") or "").strip()
+        next_form = {
+            "method": (form.get("method") or "POST").upper(),
+            "action": (form.get("action") or "").strip(),
+            "payload": payload,
+        }
+    return entries, next_form
+
+
+def parse_search_links(html: str) -> List[Tuple[str, str]]:
+    """(href without host, link text) for every /game/<platform>/<product> link on a search page."""
+    links = []
+    for a in _soup(html, _game_link).find_all("a"):
+        href = _strip_host(a.get("href", ""))
+        parts = href.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "game": continue
+        links.append((href, a.get_text(" ", strip=True)))
+    return links
+
+
+def parse_product_page(html: str) -> dict:
+    """Product name and loose/CIB/new USD prices from a product page."""
+    soup = _soup(html, _product_page_part)
+    product_name = None
+    h1 = soup.select_one("h1#product_name, h1.chart_title")
+    if h1 and h1.contents:
+        title_text = h1.contents[0] if getattr(h1.contents[0], "strip", None) else h1.get_text(strip=True)
+        if isinstance(title_text, str) and title_text.strip():
+            product_name = title_text.strip()
+
+    def get_price(element_id: str) -> Optional[float]:
+        el = soup.select_one(f"#{element_id} .price, #{element_id}, td.{element_id} .js-price, td.{element_id}")
+        if el:
+            span = el.select_one("span.price") or el.select_one(".price")
+            return _parse_usd_price((span or el).get_text(strip=True))
+        return None
+
+    return {
+        "product_name": product_name,
+        "loose_usd": get_price("used_price"),
+        "cib_usd": get_price("complete_price"),
+        "new_usd": get_price("new_price"),
+    }
+
+
+async def parse_catalog_page_async(html: str, platform_label: str):
+    return await asyncio.to_thread(parse_catalog_page, html, platform_label)
+
+
+async def parse_search_links_async(html: str) -> List[Tuple[str, str]]:
+    return await asyncio.to_thread(parse_search_links, html)
+
+
+async def parse_product_page_async(html: str) -> dict:
+    return await asyncio.to_thread(parse_product_page, html)
@@ -3,8 +3,7 @@ import re
 import time
 from typing import Optional, List, Tuple
 
-import httpx
-
+from ...http_client import pooled_client
 from ..utils import _env_any, _trim_outliers_and_median
 
 _EBAY_TOKEN_CACHE = {"token": None, "expires_at": 0.0}
@@ -105,7 +104,7 @@ async def get_ebay_token() -> Optional[str]:
     body = "grant_type=client_credentials&scope=https://api.ebay.com/oauth/api_scope"
 
     try:
-        async with httpx.AsyncClient(timeout=12) as client:
+        async with pooled_client(timeout=12) as client:
             res = await client.post("https://api.ebay.com/identity/v1/oauth2/token", headers=headers, content=body)
         if res.status_code >= 400:
             print(f"eBay token error ({res.status_code}): {res.text[:500]}")
@@ -148,7 +147,7 @@ async def fetch_ebay_market_price(title: str, platform_name: str, item_type: str
     headers = {"Authorization": f"Bearer {token}", "X-EBAY-C-MARKETPLACE-ID": "EBAY_DE"}
 
     try:
-        async with httpx.AsyncClient(timeout=12) as client:
+        async with pooled_client(timeout=12) as client:
             res = await client.get("https://api.ebay.com/buy/browse/v1/item_summary/search", params=params, headers=headers)
 
         if res.status_code >= 400:
@@ -1,17 +1,94 @@
+import asyncio
 import re
+import time
+from functools import partial
 from typing import Optional
 
-import httpx
-from bs4 import BeautifulSoup
-
+from ...http_client import pooled_client
+from ..catalog_misses import clear_catalog_miss, record_catalog_miss
+from ..pricecharting_cache import cached_pricecharting_get
+from ..pricecharting_parser import parse_product_page_async, parse_search_links_async
+from ..ratelimit import pricecharting_limiter
 from ..utils import (
     HEADERS,
     _catalog_match_score,
     _env_any,
     _normalize_text,
-    _parse_usd_price,
 )
 
+# Search variants are started this many seconds apart (PRICECHARTING_SEARCH_HEDGE_DELAY);
+# the next one starts at once when an earlier one finds nothing. 0 starts all at once.
+DEFAULT_SEARCH_HEDGE_DELAY = 1.0
+
+# Per-variant outcomes, keyed by "<query|title>:<search type>", to tune the attempt order.
+_search_variant_stats = {}
+
+
+def _search_hedge_delay() -> float:
+    try:
+        return max(0.0, float(_env_any("PRICECHARTING_SEARCH_HEDGE_DELAY") or DEFAULT_SEARCH_HEDGE_DELAY))
+    except ValueError:
+        return DEFAULT_SEARCH_HEDGE_DELAY
+
+
+def _record_variant(variant: str, outcome: str) -> None:
+    stats = _search_variant_stats.setdefault(
+        variant, {"attempts": 0, "hits": 0, "misses": 0, "errors": 0, "cancelled": 0, "selected": 0}
+    )
+    if outcome != "selected":
+        stats["attempts"] += 1
+    stats[outcome] += 1
+
+
+def search_variant_stats() -> dict:
+    """Hit rate per search variant; hits/misses/errors count finished searches only."""
+    result = {}
+    for variant, stats in sorted(_search_variant_stats.items()):
+        finished = stats["hits"] + stats["misses"] + stats["errors"]
+        result[variant] = {**stats, "hit_rate": round(stats["hits"] / finished, 3) if finished else None}
+    return result
+
+
+async def _first_in_priority(searches: list, hedge_delay: float):
+    """
+    Run search coroutine factories staggered by hedge_delay and return (index, result)
+    for the first truthy result in list order; an earlier search that is still
+    running always wins over a later one that already finished. Everything still
+    in flight is cancelled once the winner is known.
+    """
+    if not searches:
+        return None, None
+    tasks = []
+    last_launch = 0.0
+
+    def launch():
+        nonlocal last_launch
+        tasks.append(asyncio.create_task(searches[len(tasks)]()))
+        last_launch = time.monotonic()
+
+    try:
+        launch()
+        for index in range(len(searches)):
+            while not tasks[index].done():
+                timeout = None
+                if len(tasks) < len(searches):
+                    timeout = max(0.0, last_launch + hedge_delay - time.monotonic())
+                await asyncio.wait([t for t in tasks if not t.done()], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if len(tasks) < len(searches) and time.monotonic() >= last_launch + hedge_delay:
+                    launch()
+            result = None if tasks[index].exception() else tasks[index].result()
+            if result:
+                return index, result
+            if len(tasks) == index + 1 and len(tasks) < len(searches):
+                launch()
+        return None, None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 def _pricecharting_token() -> Optional[str]:
     return _env_any("PRICECHARTING_TOKEN", "PRICE_CHARTING_TOKEN")
 
@@ -20,7 +97,8 @@ async def _fetch_pricecharting_api(title: str, platform_name: str, token: str):
     params = {"t": token, "q": query}
 
     try:
-        async with httpx.AsyncClient(timeout=12, headers=HEADERS) as client:
+        await pricecharting_limiter().acquire()
+        async with pooled_client(timeout=12, headers=HEADERS) as client:
             res = await client.get("https://www.pricecharting.com/api/product", params=params)
 
         print(f"PriceCharting API ({res.status_code}) for '{query}': {res.text[:500]}")
@@ -59,45 +137,50 @@ async def _fetch_pricecharting_scrape(title: str, platform_name: str):
     attempts = []
     seen_attempts = set()
 
-    def add_attempt(q: str, search_type: Optional[str]):
+    def add_attempt(variant: str, q: str, search_type: Optional[str]):
         cleaned_q = (q or "").strip()
         if not cleaned_q: return
         key = (cleaned_q.lower(), (search_type or "").lower())
         if key in seen_attempts: return
         seen_attempts.add(key)
-        attempts.append((cleaned_q, search_type))
+        attempts.append((f"{variant}:{search_type or 'default'}", cleaned_q, search_type))
+
+    add_attempt("query", query, "prices")
+    add_attempt("query", query, "videogames")
+    add_attempt("title", title, "prices")
+    add_attempt("title", title, "videogames")
+    add_attempt("query", query, None)
+    add_attempt("title", title, None)
 
-    add_attempt(query, "prices")
-    add_attempt(query, "videogames")
-    add_attempt(title, "prices")
-    add_attempt(title, "videogames")
-    add_attempt(query, None)
-    add_attempt(title, None)
+    failed_searches = []
 
     try:
-        async with httpx.AsyncClient(timeout=15, headers=HEADERS, follow_redirects=True) as client:
-            product_link = None
-            selected_query = query
+        async with pooled_client(timeout=15, headers=HEADERS, follow_redirects=True) as client:
 
-            for attempt_query, search_type in attempts:
+            async def search(variant: str, attempt_query: str, search_type: Optional[str]):
                 params = {"q": attempt_query}
                 if search_type: params["type"] = search_type
-                search_res = await client.get(search_url, params=params)
-                print(f"PriceCharting scrape search ({search_res.status_code}) for '{attempt_query}' type='{search_type or 'default'}'")
-                if search_res.status_code >= 400: continue
+                try:
+                    search_res = await cached_pricecharting_get(client, search_url, params=params)
+                    print(f"PriceCharting scrape search ({search_res.status_code}) for '{attempt_query}' type='{search_type or 'default'}'")
+                    if search_res.status_code >= 400:
+                        _record_variant(variant, "errors")
+                        failed_searches.append(variant)
+                        return None
+                    links = await parse_search_links_async(search_res.text)
+                except asyncio.CancelledError:
+                    _record_variant(variant, "cancelled")
+                    raise
+                except Exception:
+                    _record_variant(variant, "errors")
+                    failed_searches.append(variant)
+                    raise
 
-                soup = BeautifulSoup(search_res.text, "html.parser")
                 best_link = None
                 best_score = -1.0
 
-                for a in soup.select("a[href*='/game/']"):
-                    href = a.get("href", "")
-                    if "pricecharting.com" in href:
-                        href = href.split("pricecharting.com")[1]
-                    parts = href.strip("/").split("/")
-                    if len(parts) < 3 or parts[0] != "game": continue
-
-                    text = _normalize_text(a.get_text(" ", strip=True))
+                for href, link_text in links:
+                    text = _normalize_text(link_text)
                     score = 0.0
                     if normalized_query and text:
                         score = max(
@@ -113,48 +196,45 @@ async def _fetch_pricecharting_scrape(title: str, platform_name: str):
                         best_score = score
                         best_link = href
 
-                if best_link:
-                    product_link = best_link
-                    selected_query = attempt_query
-                    break
+                _record_variant(variant, "hits" if best_link else "misses")
+                return best_link
+
+            searches = [partial(search, *attempt) for attempt in attempts]
+            winner, product_link = await _first_in_priority(searches, _search_hedge_delay())
+            selected_query = query
+            if winner is not None:
+                _record_variant(attempts[winner][0], "selected")
+                selected_query = attempts[winner][1]
 
             if not product_link:
                 print(f"PriceCharting scrape: no result found for '{query}'")
+                # Only a clean "nothing found" is a miss; failed searches may succeed next time.
+                if not failed_searches:
+                    await asyncio.to_thread(record_catalog_miss, title, platform_name)
                 return None
 
             product_url = f"https://www.pricecharting.com{product_link}"
             print(f"PriceCharting scrape: fetching {product_url}")
-            product_res = await client.get(product_url)
+            product_res = await cached_pricecharting_get(client, product_url)
             if product_res.status_code >= 400: return None
 
         pc_id_match = re.search(r"/game/[^/]+/([^?]+)", product_link)
         pc_id = pc_id_match.group(1) if pc_id_match else ""
 
-        product_soup = BeautifulSoup(product_res.text, "html.parser")
-        product_name = selected_query or query
-        h1 = product_soup.select_one("h1#product_name, h1.chart_title")
-        if h1:
-            title_text = h1.contents[0] if getattr(h1.contents[0], "strip", None) else h1.get_text(strip=True)
-            if isinstance(title_text, str) and title_text.strip():
-                product_name = title_text.strip()
-
-        def get_price(element_id: str) -> Optional[float]:
-            el = product_soup.select_one(f"#{element_id} .price, #{element_id}, td.{element_id} .js-price, td.{element_id}")
-            if el:
-                span = el.select_one("span.price") or el.select_one(".price")
-                text = (span or el).get_text(strip=True)
-                return _parse_usd_price(text)
+        product = await parse_product_page_async(product_res.text)
+        product_name = product["product_name"] or selected_query or query
+        loose_usd = product["loose_usd"]
+        if loose_usd is None:
+            await asyncio.to_thread(record_catalog_miss, title, platform_name)
             return None
 
-        loose_usd = get_price("used_price")
-        if loose_usd is None: return None
-
+        await asyncio.to_thread(clear_catalog_miss, title, platform_name)
         return {
             "pricecharting_id": pc_id,
             "product_name": product_name,
             "loose_usd": loose_usd,
-            "cib_usd": get_price("complete_price"),
-            "new_usd": get_price("new_price"),
+            "cib_usd": product["cib_usd"],
+            "new_usd": product["new_usd"],
             "page_url": product_url,
         }
     except Exception as e:
@@ -165,5 +245,8 @@ async def fetch_pricecharting(title: str, platform_name: str):
     scraped = await _fetch_pricecharting_scrape(title, platform_name)
     if scraped: return scraped
     token = _pricecharting_token()
-    if token: return await _fetch_pricecharting_api(title, platform_name, token)
+    if token:
+        found = await _fetch_pricecharting_api(title, platform_name, token)
+        if found: await asyncio.to_thread(clear_catalog_miss, title, platform_name)
+        return found
     return None
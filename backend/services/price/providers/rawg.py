@@ -1,7 +1,6 @@
 from typing import Optional
 
-import httpx
-
+from ...http_client import pooled_client
 from ..utils import _env_any
 
 def _rawg_key() -> Optional[str]:
@@ -15,7 +14,7 @@ async def fetch_rawg_reference(title: str, platform_name: str):
     query = " ".join(part for part in [title, platform_name] if part).strip()
     params = {"key": key, "search": query, "search_precise": "true", "page_size": "1"}
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
+        async with pooled_client(timeout=10) as client:
             res = await client.get("https://api.rawg.io/api/games", params=params)
         if res.status_code >= 400:
             print(f"RAWG search error ({res.status_code}): {res.text[:500]}")
@@ -41,7 +40,7 @@ async def fetch_rawg_reference(title: str, platform_name: str):
 
         if rawg_id and len(store_links) < 3:
             try:
-                async with httpx.AsyncClient(timeout=10) as client:
+                async with pooled_client(timeout=10) as client:
                     stores_res = await client.get(f"https://api.rawg.io/api/games/{rawg_id}/stores", params={"key": key})
                 if stores_res.status_code < 400:
                     for row in (stores_res.json().get("results") or []):
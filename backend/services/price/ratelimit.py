@@ -0,0 +1,87 @@
+"""
+Per-host outbound request budgets.
+
+Scrapers used to pace themselves with fixed sleeps, which only works while one
+crawl runs at a time. A shared limiter per host hands out evenly spaced request
+slots to every coroutine, so concurrent crawls together stay under one
+requests-per-second budget.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from .utils import _env_any
+
+PRICECHARTING_HOST = "www.pricecharting.com"
+# Serial scraping slept 1.1s between pages, i.e. at most ~0.9 requests/second.
+DEFAULT_PRICECHARTING_RPS = 0.9
+_CONFIG_TTL_SECONDS = 60.0
+
+
+class AsyncRateLimiter:
+    """Hands out request slots at most `rate` per second, shared by all callers."""
+
+    def __init__(self, rate: float):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.rate = rate
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self.rate = rate
+
+    async def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+            reserved_until = self._next_slot
+        delay = slot - now
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # A cancelled waiter (e.g. a hedged request that lost) hands its slot
+                # back unless someone has already queued behind it.
+                with self._lock:
+                    if self._next_slot == reserved_until:
+                        self._next_slot = slot
+                raise
+
+
+_LIMITERS: Dict[str, AsyncRateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+_config_checked_at: Dict[str, float] = {}
+
+
+def host_limiter(host: str, rate: float) -> AsyncRateLimiter:
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(host)
+        if limiter is None:
+            limiter = _LIMITERS[host] = AsyncRateLimiter(rate)
+        elif limiter.rate != rate:
+            limiter.set_rate(rate)
+        return limiter
+
+
+def _positive_float(value: Optional[str], default: float) -> float:
+    try:
+        parsed = float(value) if value else default
+    except ValueError:
+        return default
+    return parsed if parsed > 0 else default
+
+
+def pricecharting_rps() -> float:
+    return _positive_float(_env_any("PRICECHARTING_MAX_RPS"), DEFAULT_PRICECHARTING_RPS)
+
+
+def pricecharting_limiter() -> AsyncRateLimiter:
+    """The shared limiter for every pricecharting.com request; re-reads its setting once a minute."""
+    now = time.monotonic()
+    limiter = _LIMITERS.get(PRICECHARTING_HOST)
+    if limiter is not None and now - _config_checked_at.get(PRICECHARTING_HOST, 0.0) < _CONFIG_TTL_SECONDS:
+        return limiter
+    _config_checked_at[PRICECHARTING_HOST] = now
+    return host_limiter(PRICECHARTING_HOST, pricecharting_rps())
@@ -0,0 +1,278 @@
+"""
+Catalog match scorers.
+
+Every backend exposes the same two calls: fit(rows) turns prepared catalog rows into
+whatever the backend scores against, and best_matches(queries, fitted) returns one
+match (or None) per query.
+
+- "reference": the original pairwise difflib scorer. Candidates are narrowed by the
+  token index first, so it only ever sees a few hundred rows per query.
+- "tfidf": character n-gram TF-IDF vectors in a SciPy sparse matrix per platform
+  partition. A block of queries is scored against the whole partition in one matrix
+  product; the top cosine hits are re-scored with the reference scorer so match
+  scores and the 0.55 threshold mean the same thing for both backends.
+
+The backend is picked with CATALOG_MATCH_SCORER (env or Settings), default reference.
+numpy/scipy are optional; without them the tfidf backend falls back to reference.
+"""
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, List, Optional
+
+from ...database import dict_from_row
+from .catalog_index import MIN_TOKEN_LENGTH
+from .utils import (
+    _catalog_match_score,
+    _catalog_norm_fields,
+    _clean_catalog_title,
+    _env_any,
+    _normalize_text,
+)
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional, only needed by the tfidf backend
+    np = None
+    sparse = None
+
+logger = logging.getLogger("collectabase.catalog_scoring")
+
+MATCH_THRESHOLD = 0.55
+
+
+def _catalog_query(title: str, platform_name: str) -> Optional[dict]:
+    norm_title = _normalize_text(title)
+    if not norm_title: return None
+    norm_platform = _normalize_text(platform_name)
+    query_clean = _clean_catalog_title(norm_title, norm_platform)
+    return {
+        "title": title,
+        "platform_name": platform_name,
+        "norm_title": norm_title,
+        "norm_platform": norm_platform,
+        "clean": query_clean,
+        "clean_tokens": set(query_clean.split()),
+        "index_tokens": [t for t in query_clean.split() if len(t) >= MIN_TOKEN_LENGTH],
+    }
+
+def _prepare_catalog_row(row) -> dict:
+    """Wrap a catalog row with its normalized forms so it can be scored against many queries."""
+    item = dict_from_row(row)
+    if item.get("norm_title") is not None and item.get("clean_title") is not None and item.get("norm_platform") is not None:
+        norm_title, clean, norm_platform = item["norm_title"], item["clean_title"], item["norm_platform"]
+    else:
+        # Rows written outside _upsert_catalog_entries may lack the precomputed columns.
+        norm_title, clean, norm_platform = _catalog_norm_fields(item.get("title"), item.get("platform"))
+    return {
+        "item": item,
+        "norm_title": norm_title,
+        "norm_platform": norm_platform,
+        "clean": clean,
+        "clean_tokens": set(clean.split()),
+    }
+
+def _score_catalog_row(query: dict, row: dict) -> float:
+    norm_title, query_clean = query["norm_title"], query["clean"]
+    row_norm_title = row["norm_title"]
+    if row["norm_platform"]:
+        row_clean, r_tokens = row["clean"], row["clean_tokens"]
+    else:
+        row_clean = _clean_catalog_title(row_norm_title, query["norm_platform"])
+        r_tokens = set(row_clean.split())
+
+    score = max(
+        _catalog_match_score(norm_title, row_norm_title),
+        _catalog_match_score(query_clean, row_norm_title),
+        _catalog_match_score(query_clean, row_clean),
+    )
+
+    if query_clean and row_clean:
+        q_tokens = query["clean_tokens"]
+        if q_tokens and q_tokens.issubset(r_tokens): score = max(score, 0.92)
+        elif r_tokens and len(r_tokens) >= 2 and r_tokens.issubset(q_tokens): score = max(score, 0.88)
+
+    if query["norm_platform"] and row["norm_platform"] == query["norm_platform"]: score += 0.10
+    return score
+
+def _best_catalog_match(query: dict, rows: list) -> Optional[dict]:
+    best = None
+    best_score = 0.0
+    for row in rows:
+        score = _score_catalog_row(query, row)
+        if score > best_score:
+            best_score = score
+            best = row["item"]
+
+    if not best or best_score < MATCH_THRESHOLD: return None
+    loose_eur = best.get("loose_eur")
+    if loose_eur is None: return None
+
+    return _catalog_match_result(best, round(best_score, 3), query["title"], query["platform_name"])
+
+def _catalog_match_result(item: dict, score: Optional[float], title: str = "", platform_name: str = "") -> dict:
+    return {
+        "catalog_id": item.get("id"),
+        "pricecharting_id": (item.get("pricecharting_id") or ""),
+        "product_name": item.get("title") or title,
+        "platform": item.get("platform") or platform_name,
+        "loose_eur": item.get("loose_eur"),
+        "cib_eur": item.get("cib_eur"),
+        "new_eur": item.get("new_eur"),
+        "match_score": score,
+    }
+
+
+class ReferenceScorer:
+    """Pairwise scorer over token-index candidates; the behaviour every backend is measured against."""
+
+    name = "reference"
+    uses_token_index = True
+
+    def fit(self, rows: list) -> list:
+        return rows
+
+    def best_matches(self, queries: List[dict], fitted: list) -> List[Optional[dict]]:
+        return [_best_catalog_match(query, fitted) for query in queries]
+
+
+class _TfidfModel:
+    __slots__ = ("rows", "vocab", "idf", "matrix")
+
+    def __init__(self, rows, vocab, idf, matrix):
+        self.rows = rows
+        self.vocab = vocab
+        self.idf = idf
+        self.matrix = matrix
+
+
+class TfidfScorer:
+    """Character n-gram TF-IDF over a whole platform partition, re-ranked by the reference scorer."""
+
+    name = "tfidf"
+    uses_token_index = False
+
+    NGRAM = 3
+    # Cosine hits handed to the reference scorer per query.
+    TOP_K = 20
+    # Queries per sparse product; bounds the rows x queries result matrix.
+    QUERY_BLOCK = 64
+    CACHE_SIZE = 8
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[tuple, _TfidfModel]" = OrderedDict()
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None and sparse is not None
+
+    def _ngrams(self, text: str) -> Counter:
+        padded = f" {text} " if text else ""
+        n = self.NGRAM
+        return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    def fit(self, rows: list) -> _TfidfModel:
+        vocab = {}
+        indptr, indices, data = [0], [], []
+        for row in rows:
+            for gram, tf in self._ngrams(row["norm_title"]).items():
+                indices.append(vocab.setdefault(gram, len(vocab)))
+                data.append(1.0 + math.log(tf))
+            indptr.append(len(indices))
+
+        shape = (len(rows), len(vocab))
+        indices = np.asarray(indices, dtype=np.int32)
+        df = np.bincount(indices, minlength=len(vocab))
+        idf = (np.log((1.0 + len(rows)) / (1.0 + df)) + 1.0).astype(np.float32)
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32) * idf[indices], indices, np.asarray(indptr, dtype=np.int64)),
+            shape=shape,
+        )
+        return _TfidfModel(rows, vocab, idf, self._l2_normalize(matrix))
+
+    def fitted_partition(self, key: tuple, load_rows: Callable[[], list]) -> _TfidfModel:
+        """Return the cached model for key, fitting it from load_rows() on a miss."""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+        model = self.fit(load_rows())
+        with self._lock:
+            self._models[key] = model
+            while len(self._models) > self.CACHE_SIZE:
+                self._models.popitem(last=False)
+        return model
+
+    def best_matches(self, queries: List[dict], fitted: _TfidfModel) -> List[Optional[dict]]:
+        if not fitted.rows:
+            return [None] * len(queries)
+
+        results = []
+        for start in range(0, len(queries), self.QUERY_BLOCK):
+            block = queries[start:start + self.QUERY_BLOCK]
+            sims = (fitted.matrix @ self._vectorize(fitted, block).T).tocsc()
+            for col, query in enumerate(block):
+                lo, hi = sims.indptr[col], sims.indptr[col + 1]
+                hits, scores = sims.indices[lo:hi], sims.data[lo:hi]
+                if len(hits) > self.TOP_K:
+                    hits = hits[np.argpartition(-scores, self.TOP_K)[:self.TOP_K]]
+                # Rows are in ascending id order; score newest first so ties resolve like the reference.
+                rows = [fitted.rows[i] for i in sorted(hits.tolist(), reverse=True)]
+                results.append(_best_catalog_match(query, rows))
+        return results
+
+    def _vectorize(self, model: _TfidfModel, queries: List[dict]):
+        indptr, indices, data = [0], [], []
+        for query in queries:
+            for gram, tf in self._ngrams(query["norm_title"]).items():
+                col = model.vocab.get(gram)
+                if col is None: continue
+                indices.append(col)
+                data.append((1.0 + math.log(tf)) * model.idf[col])
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(queries), len(model.vocab)),
+        )
+        return self._l2_normalize(matrix)
+
+    @staticmethod
+    def _l2_normalize(matrix):
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+
+_SCORERS = {"reference": ReferenceScorer(), "tfidf": TfidfScorer()}
+_warned_unavailable = False
+# An unset env var falls through to app_meta, so the setting is cached rather than read on every match.
+_CONFIG_TTL_SECONDS = 60.0
+_configured = {"name": None, "checked_at": 0.0}
+
+
+def _configured_scorer_name() -> str:
+    now = time.monotonic()
+    if _configured["name"] is None or now - _configured["checked_at"] >= _CONFIG_TTL_SECONDS:
+        _configured.update(name=(_env_any("CATALOG_MATCH_SCORER") or "reference").lower(), checked_at=now)
+    return _configured["name"]
+
+
+def get_catalog_scorer():
+    """Return the configured scorer backend, falling back to reference; re-reads its setting once a minute."""
+    global _warned_unavailable
+    name = _configured_scorer_name()
+    scorer = _SCORERS.get(name)
+    if scorer is None:
+        logger.warning(f"Unknown CATALOG_MATCH_SCORER {name!r}, using reference")
+        return _SCORERS["reference"]
+    if isinstance(scorer, TfidfScorer) and not scorer.available():
+        if not _warned_unavailable:
+            logger.warning("CATALOG_MATCH_SCORER=tfidf needs numpy and scipy, using reference")
+            _warned_unavailable = True
+        return _SCORERS["reference"]
+    return scorer
@@ -4,8 +4,6 @@ import statistics
 from difflib import SequenceMatcher
 from typing import Optional
 
-import httpx
-
 from ...database import get_app_meta_many, get_db, dict_from_row
 
 PLATFORM_SLUGS = {
@@ -62,14 +60,6 @@ def _env_any(*names: str) -> Optional[str]:
             return value
     return None
 
-async def get_eur_rate() -> float:
-    try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            res = await client.get("https://api.frankfurter.app/latest?from=USD&to=EUR")
-            return res.json()["rates"]["EUR"]
-    except Exception:
-        return 0.92
-
 def _to_eur(usd_price: Optional[float], eur_rate: float):
     return round(usd_price * eur_rate, 2) if usd_price is not None else None
 
@@ -145,6 +135,12 @@ def _clean_catalog_title(value: Optional[str], platform_name: Optional[str] = No
         cleaned.append(token)
     return " ".join(cleaned).strip()
 
+def _catalog_norm_fields(title: Optional[str], platform: Optional[str]) -> tuple:
+    """(norm_title, clean_title, norm_platform) as persisted on price_catalog rows."""
+    norm_title = _normalize_text(title)
+    norm_platform = _normalize_text(platform)
+    return norm_title, _clean_catalog_title(norm_title, norm_platform), norm_platform
+
 def _catalog_match_score(query_title: str, row_title: str) -> float:
     if not query_title or not row_title:
         return 0.0
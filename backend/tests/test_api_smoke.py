@@ -3,7 +3,7 @@ import sqlite3
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi.testclient import TestClient
 
@@ -58,6 +58,41 @@ class ApiSmokeTest(unittest.TestCase):
             )
             con.commit()
 
+    def _wait_for_job(self, job_id: str, timeout: float = 10.0) -> dict:
+        import time
+
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.client.get(f"/api/jobs/{job_id}").json()
+            if job["state"] in ("done", "error") or time.monotonic() > deadline:
+                return job
+            time.sleep(0.05)
+
+    def _run_migration(self, revision_file: str, schema_sql: str) -> str:
+        """Run one migration's upgrade() against a scratch SQLite database built from `schema_sql`."""
+        import importlib.util
+
+        import sqlalchemy as sa
+        from alembic.migration import MigrationContext
+        from alembic.operations import Operations
+
+        path = Path(__file__).resolve().parents[1] / "alembic" / "versions" / revision_file
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        fd, db_path = tempfile.mkstemp(prefix="collectabase_migration_", suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, db_path)
+        with sqlite3.connect(db_path) as con:
+            con.executescript(schema_sql)
+        engine = sa.create_engine(f"sqlite:///{Path(db_path).as_posix()}")
+        with engine.begin() as conn:
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+        engine.dispose()
+        return db_path
+
     def _platform_by_name(self, preferred: str):
         platforms = self.client.get("/api/platforms").json()
         wanted = preferred.strip().lower()
@@ -312,6 +347,875 @@ class ApiSmokeTest(unittest.TestCase):
 
         self.client.delete(f"/api/games/{game_id}")
 
+    def test_price_catalog_search_matches_substring(self):
+        self._insert_price_catalog(title="UT Searchable Catalog Zorblax", platform="gamecube", loose_eur=5.0)
+
+        r = self.client.get("/api/price-catalog?search=orbla")
+        self.assertEqual(r.status_code, 200)
+        titles = [item["title"] for item in r.json()["items"]]
+        self.assertIn("UT Searchable Catalog Zorblax", titles)
+
+        r = self.client.get("/api/price-catalog?search=orbla&sort=loose_eur&order=desc")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["total"], 1)
+
+    def test_catalog_lookup_sees_upserted_entries(self):
+        from backend.services.price.catalog import _lookup_local_catalog_price, _upsert_catalog_entries
+
+        entry = {
+            "pricecharting_id": "ut-index-refresh",
+            "title": "UT Index Refresh Quest",
+            "platform": "nintendo switch",
+            "loose_usd": 10.0,
+            "cib_usd": None,
+            "new_usd": None,
+            "page_url": "",
+        }
+        _upsert_catalog_entries([entry], 1.0)
+        match = _lookup_local_catalog_price("UT Index Refresh Quest", "Nintendo Switch")
+        self.assertIsNotNone(match)
+        self.assertEqual(match["pricecharting_id"], "ut-index-refresh")
+
+        _upsert_catalog_entries([entry | {"title": "UT Index Renamed Saga"}], 1.0)
+        match = _lookup_local_catalog_price("UT Index Renamed Saga", "Nintendo Switch")
+        self.assertIsNotNone(match)
+        self.assertEqual(match["product_name"], "UT Index Renamed Saga")
+
+        # Price-only upserts and writes to other platforms keep this partition's generation.
+        from backend.services.price.catalog_index import catalog_partition_ids
+
+        generation, ids = catalog_partition_ids("nintendo switch")
+        _upsert_catalog_entries([entry | {"title": "UT Index Renamed Saga", "loose_usd": 12.0}], 1.0)
+        _upsert_catalog_entries([entry | {"pricecharting_id": "ut-index-other", "platform": "ut other platform"}], 1.0)
+        self.assertEqual(catalog_partition_ids("nintendo switch"), (generation, ids))
+
+        # Rows written outside the app are found through the version row; unchanged, no table scan runs.
+        from backend.services.price import catalog_index
+
+        self._insert_price_catalog(title="UT Index Outside Writer", platform="nintendo switch", loose_eur=3.0)
+        self.assertIsNotNone(_lookup_local_catalog_price("UT Index Outside Writer", "Nintendo Switch"))
+        statements = []
+        real_get_db = catalog_index.get_db
+
+        def spying_get_db():
+            ctx = real_get_db()
+            db = ctx.__enter__()
+            real_execute = db.execute
+            db.execute = lambda sql, *args: statements.append(sql) or real_execute(sql, *args)
+            return MagicMock(__enter__=lambda _self: db, __exit__=lambda _self, *exc: ctx.__exit__(*exc))
+
+        with patch.object(catalog_index, "get_db", new=spying_get_db):
+            catalog_index.catalog_candidate_ids("nintendo switch", ["outside"])
+        self.assertFalse(any("COUNT(*)" in sql for sql in statements))
+        self.assertTrue(any("price_catalog_version" in sql for sql in statements))
+
+    def test_upsert_keys_migration_keeps_matches_of_removed_duplicates(self):
+        db_path = self._run_migration(
+            "c9d0e1f2a3b4_add_price_catalog_upsert_keys.py",
+            """
+            CREATE TABLE price_catalog (id INTEGER PRIMARY KEY, pricecharting_id TEXT, title TEXT, platform TEXT);
+            CREATE TABLE game_catalog_match (game_id INTEGER PRIMARY KEY, catalog_id INTEGER NOT NULL, score REAL);
+            CREATE TRIGGER game_catalog_match_catalog_ad AFTER DELETE ON price_catalog BEGIN
+                DELETE FROM game_catalog_match WHERE catalog_id = old.id;
+            END;
+            INSERT INTO price_catalog VALUES (1, 'pc-1', 'Old', 'snes'), (2, 'pc-1', 'New', 'snes'),
+                (3, 'pc-1', 'Other', 'nes'), (4, '', 'No Id', 'snes'), (5, '', 'No Id', 'snes');
+            INSERT INTO game_catalog_match VALUES (10, 1, 0.9), (11, 3, 0.8), (12, 4, 0.7);
+            """,
+        )
+        with sqlite3.connect(db_path) as con:
+            catalog_ids = [r[0] for r in con.execute("SELECT id FROM price_catalog ORDER BY id")]
+            links = con.execute("SELECT game_id, catalog_id FROM game_catalog_match ORDER BY game_id").fetchall()
+        self.assertEqual(catalog_ids, [2, 3, 4, 5])
+        self.assertEqual(links, [(10, 2), (11, 3), (12, 4)])
+
+    def test_norm_columns_migration_backfills_rows(self):
+        from backend.services.price.utils import _catalog_norm_fields
+
+        titles = [("Super Mario Kart & Friends", "Super Nintendo"), ("PS5 Console 825GB Bundle", "PlayStation 5"), (None, "")]
+        db_path = self._run_migration(
+            "f6a7b8c9d0e1_add_price_catalog_norm_columns.py",
+            "CREATE TABLE price_catalog (id INTEGER PRIMARY KEY, title TEXT, platform TEXT);"
+            + "".join(f"INSERT INTO price_catalog (title, platform) VALUES ({t!r}, {p!r});" for t, p in titles[:2])
+            + "INSERT INTO price_catalog (title, platform) VALUES (NULL, '');",
+        )
+        with sqlite3.connect(db_path) as con:
+            rows = con.execute("SELECT norm_title, clean_title, norm_platform FROM price_catalog ORDER BY id").fetchall()
+            indexes = [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE '%norm%'")]
+        # The migration's frozen normalization still matches the app's.
+        self.assertEqual(rows, [_catalog_norm_fields(t, p) for t, p in titles])
+        self.assertEqual(rows[1], ("ps5 console 825gb bundle", "ps5", "playstation 5"))
+        self.assertEqual(indexes, [])
+
+    def test_catalog_upsert_writes_norm_columns(self):
+        from backend.services.price.catalog import _upsert_catalog_entries
+
+        entry = {
+            "pricecharting_id": "ut-norm-columns", "title": "UT Norm Columns: Deluxe Edition", "platform": "Nintendo Switch",
+            "loose_usd": 10.0, "cib_usd": None, "new_usd": None, "page_url": "",
+        }
+
+        def norm_columns():
+            with sqlite3.connect(self._db_path()) as con:
+                return con.execute(
+                    "SELECT norm_title, clean_title, norm_platform FROM price_catalog WHERE pricecharting_id = ?",
+                    (entry["pricecharting_id"],),
+                ).fetchone()
+
+        _upsert_catalog_entries([entry], 1.0)
+        self.assertEqual(norm_columns(), ("ut norm columns deluxe edition", "ut norm columns deluxe", "nintendo switch"))
+        _upsert_catalog_entries([entry | {"title": "UT Norm Columns II"}], 1.0)
+        self.assertEqual(norm_columns(), ("ut norm columns ii", "ut norm columns ii", "nintendo switch"))
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute("DELETE FROM price_catalog WHERE pricecharting_id = ?", (entry["pricecharting_id"],))
+
+    def test_catalog_upsert_applies_batch_set_based(self):
+        from backend.services.price.catalog import _upsert_catalog_entries
+
+        platform = "ut set platform"
+        self._insert_price_catalog(title="UT Set Based Kart", platform=platform, loose_eur=1.0)
+        self._insert_price_catalog(title="ut set based kart", platform=platform, loose_eur=2.0)
+
+        def entry(pc_id, title, loose_usd):
+            return {"pricecharting_id": pc_id, "title": title, "platform": platform,
+                    "loose_usd": loose_usd, "cib_usd": None, "new_usd": None, "page_url": ""}
+
+        batch = [entry("ut-set-kart", "UT Set Based Kart", 10.0), entry("ut-set-racer", "UT Set Based Racer", 20.0)]
+        stats = _upsert_catalog_entries(batch + [batch[1]], 1.0)
+        self.assertEqual(
+            (stats["processed"], stats["inserted"], stats["updated"], stats["unchanged"], stats["deduped_in_batch"]),
+            (2, 1, 1, 0, 1),
+        )
+
+        stats = _upsert_catalog_entries([batch[0], entry("ut-set-racer", "UT Set Based Racer", 25.0)], 1.0)
+        self.assertEqual((stats["inserted"], stats["updated"], stats["unchanged"]), (0, 1, 1))
+
+        with sqlite3.connect(self._db_path()) as con:
+            rows = con.execute(
+                "SELECT pricecharting_id, loose_usd FROM price_catalog WHERE platform = ? ORDER BY pricecharting_id", (platform,)
+            ).fetchall()
+            # The older title duplicate is left for the dedupe job.
+            self.assertEqual(rows, [("", None), ("ut-set-kart", 10.0), ("ut-set-racer", 25.0)])
+            with self.assertRaises(sqlite3.IntegrityError):
+                con.execute("INSERT INTO price_catalog (pricecharting_id, title, platform) VALUES ('ut-set-kart', 'x', ?)", (platform,))
+
+    def test_catalog_dedupe_job_merges_duplicates(self):
+        platform = "ut dedupe platform"
+        self._insert_price_catalog(title="UT Dedupe Odyssey", platform=platform, loose_eur=11.0)
+        self._insert_price_catalog(title="ut dedupe odyssey", platform=platform, loose_eur=12.0)
+        self._insert_price_catalog(title="UT Dedupe Variant", platform=platform, loose_eur=13.0)
+        self._insert_price_catalog(title="UT Dedupe Variant", platform=platform, loose_eur=14.0)
+        with sqlite3.connect(self._db_path()) as con:
+            ids = [r[0] for r in con.execute("SELECT id FROM price_catalog WHERE platform = ? ORDER BY id", (platform,))]
+            # Two distinct PriceCharting products sharing a title are not merged.
+            con.execute("UPDATE price_catalog SET pricecharting_id = 'ut-variant-' || id WHERE id IN (?, ?)", (ids[2], ids[3]))
+            con.execute("INSERT INTO game_catalog_match (game_id, catalog_id, score) VALUES (?, ?, 1.0)", (987654, ids[0]))
+
+        r = self.client.post("/api/price-catalog/dedupe")
+        self.assertEqual(r.status_code, 200)
+        job = self._wait_for_job(r.json()["job_id"])
+        self.assertEqual((job["state"], job["success"]), ("done", 1))
+        self.assertEqual((job["result"]["removed"], job["result"]["links_rewritten"]), (1, 1))
+
+        with sqlite3.connect(self._db_path()) as con:
+            remaining = [r[0] for r in con.execute("SELECT id FROM price_catalog WHERE platform = ? ORDER BY id", (platform,))]
+            link = con.execute("SELECT catalog_id FROM game_catalog_match WHERE game_id = 987654").fetchone()[0]
+            con.execute("DELETE FROM game_catalog_match WHERE game_id = 987654")
+        self.assertEqual(remaining, ids[1:])
+        self.assertEqual(link, ids[1])
+
+    def test_match_catalog_batch_matches_single_lookups(self):
+        from backend.services.price.catalog import _lookup_local_catalog_price, match_catalog_batch
+
+        self._insert_price_catalog(title="UT Batch Dragon Legend", platform="sega saturn", loose_eur=40.0)
+        self._insert_price_catalog(title="Qorvex Orphan Speedster", platform="sega dreamcast", loose_eur=12.0)
+
+        games = [
+            {"id": -1, "title": "UT Batch Dragon Legend", "platform_name": "Sega Saturn"},
+            # Wrong platform on purpose: only the platform-less retry can find it.
+            {"id": -2, "title": "Qorvex Orphan Speedster", "platform_name": "Sega Saturn"},
+            {"id": -3, "title": "Zzyzx Wombat Fjord", "platform_name": "Sega Saturn"},
+        ]
+        matches = match_catalog_batch(games)
+
+        self.assertAlmostEqual(matches[-1]["loose_eur"], 40.0)
+        self.assertAlmostEqual(matches[-2]["loose_eur"], 12.0)
+        self.assertNotIn(-3, matches)
+        single = _lookup_local_catalog_price("UT Batch Dragon Legend", "Sega Saturn")
+        self.assertEqual(single, matches[-1])
+
+    def test_catalog_match_link_is_stored_and_invalidated(self):
+        ps5 = self._platform_by_name("playstation 5")
+        payload = {
+            "title": "UT Linked Catalog Voyage",
+            "platform_id": ps5["id"],
+            "item_type": "game",
+            "is_wishlist": False,
+        }
+        created = self.client.post("/api/games", json=payload)
+        self.assertEqual(created.status_code, 200)
+        game_id = created.json()["id"]
+        self._insert_price_catalog(title="UT Linked Catalog Voyage", platform=ps5["name"].lower(), loose_eur=55.0)
+
+        r = self.client.post(f"/api/games/{game_id}/fetch-market-price")
+        self.assertEqual(r.json().get("source"), "pricecharting")
+
+        def link_count():
+            with sqlite3.connect(self._db_path()) as con:
+                return con.execute("SELECT COUNT(*) FROM game_catalog_match WHERE game_id = ?", (game_id,)).fetchone()[0]
+
+        self.assertEqual(link_count(), 1)
+        r = self.client.put(f"/api/games/{game_id}", json=payload | {"title": "UT Linked Catalog Voyage II"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(link_count(), 0)
+
+        self.client.delete(f"/api/games/{game_id}")
+
+    def test_catalog_scrape_runs_platforms_concurrently(self):
+        import asyncio
+        from backend.services.price.catalog import scrape_catalog_platforms
+
+        running = {"now": 0, "peak": 0}
+
+        async def fake_crawl(slug, label, max_pages=None):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.05)
+            running["now"] -= 1
+            yield []
+
+        targets = [("ut platform a", "ut-a"), ("ut platform b", "ut-b"), ("ut platform c", "ut-c")]
+        with (
+            patch.dict(os.environ, {"CATALOG_SCRAPE_CONCURRENCY": "2"}),
+            patch("backend.services.price.catalog.crawl_platform_catalog", new=fake_crawl),
+        ):
+            results = asyncio.run(scrape_catalog_platforms(targets, 0.92))
+
+        self.assertEqual([label for label, _stats in results], [label for label, _slug in targets])
+        self.assertEqual(running["peak"], 2)
+
+    def test_catalog_crawl_resumes_from_checkpoint(self):
+        import asyncio
+        from types import SimpleNamespace
+        from backend.services.price import catalog
+
+        def listing(titles, cursor=None):
+            rows = "".join(
+                f'<tr><td class="title"><a href="/game/ut-resume/{t.lower().replace(" ", "-")}">{t}</a></td>'
+                f'<td class="used_price"><span class="js-price">$5.00</span></td></tr>'
+                for t in titles
+            )
+            form = f'<form class="next_page" method="post"><input name="cursor" value="{cursor}"></form>' if cursor else ""
+            return f'<table id="games_table"><tbody>{rows}</tbody></table>{form}'
+
+        first_page = listing([f"UT Resume Game {i}" for i in range(10)], cursor="c2")
+        last_page = listing(["UT Resume Final A", "UT Resume Final B"])
+        requests, responses = [], []
+
+        async def fake_fetch(client, url, params=None, data=None, method="GET", attempts=3):
+            requests.append((method, params, data))
+            html = responses.pop(0)
+            return SimpleNamespace(status_code=200, text=html) if html else None
+
+        written = []
+
+        async def consume():
+            async for page_entries in catalog.crawl_platform_catalog("ut-resume", "ut resume"):
+                # Each page is handed over before the next one is requested.
+                self.assertEqual(responses, [] if len(page_entries) < 10 else [None])
+                written.extend(e["title"] for e in page_entries)
+
+        with patch("backend.services.price.catalog._fetch_with_retry", new=fake_fetch):
+            responses[:] = [first_page, None]
+            asyncio.run(consume())
+            state = self.client.get("/api/price-catalog/crawls").json()
+            state = next(s for s in state if s["platform_slug"] == "ut-resume")
+            self.assertEqual((state["status"], state["pages_done"], state["resumable"]), ("failed", 1, True))
+
+            requests.clear()
+            responses[:] = [last_page]
+            asyncio.run(consume())
+
+        self.assertEqual(requests, [("POST", None, {"cursor": "c2"})])
+        self.assertEqual(len(written), 12)
+        state = next(s for s in self.client.get("/api/price-catalog/crawls").json() if s["platform_slug"] == "ut-resume")
+        self.assertEqual((state["status"], state["pages_done"], state["resumable"]), ("completed", 2, False))
+
+    def test_catalog_refresh_plan_spends_budget_by_priority(self):
+        from backend.services.price.freshness import rank_refresh_targets
+
+        def signal(slug, age_hours, owned_games=0, owned_value=0.0, volatility=0.0, catalog_rows=0):
+            return {"platform": slug, "slug": slug, "owned_games": owned_games, "owned_value": owned_value,
+                    "catalog_rows": catalog_rows, "age_hours": age_hours, "volatility": volatility, "pages_done": 0}
+
+        signals = [
+            signal("ut-fresh", 2, owned_games=50, owned_value=900.0, volatility=0.9),
+            signal("ut-stale-unowned", 96),
+            signal("ut-stale-valuable", 96, owned_games=40, owned_value=1200.0, volatility=0.4),
+            signal("ut-small", 200, owned_games=3, catalog_rows=60),
+        ]
+        plan = rank_refresh_targets(signals, budget=25, max_pages=20, min_age_hours=12)
+
+        self.assertEqual([p["slug"] for p in plan], ["ut-stale-valuable", "ut-small", "ut-stale-unowned"])
+        self.assertEqual([p["pages"] for p in plan], [20, 3, 2])
+
+        r = self.client.get("/api/price-catalog/refresh-plan")
+        self.assertEqual(r.status_code, 200)
+        self.assertIsInstance(r.json(), list)
+
+    def test_pricecharting_search_takes_first_hit_in_priority_order(self):
+        import asyncio
+        from contextlib import asynccontextmanager
+        from types import SimpleNamespace
+        from backend.services.price import pricecharting_cache
+        from backend.services.price.providers import pricecharting
+        from backend.services.price.ratelimit import AsyncRateLimiter
+
+        # query:prices is slow and finds nothing, query:videogames and title:prices both hit.
+        search_pages = {
+            ("UT Hedge Game UT Hedge", "prices"): (0.2, ""),
+            ("UT Hedge Game UT Hedge", "videogames"): (0.1, '<a href="/game/ut-hedge/ut-hedge-game">UT Hedge Game</a>'),
+            ("UT Hedge Game", "prices"): (0.0, '<a href="/game/ut-hedge/ut-hedge-other">UT Hedge Game Other</a>'),
+        }
+        product_page = '<h1 id="product_name">UT Hedge Game</h1><table><tr><td id="used_price"><span class="price">$12.00</span></td></tr></table>'
+
+        class FakeClient:
+            async def get(self, url, params=None):
+                if params is None:
+                    return SimpleNamespace(status_code=200, text=product_page, url=url)
+                delay, html = search_pages.get((params["q"], params.get("type")), (0.0, ""))
+                await asyncio.sleep(delay)
+                return SimpleNamespace(status_code=200, text=html)
+
+        @asynccontextmanager
+        async def fake_pooled_client(**kwargs):
+            yield FakeClient()
+
+        limiter = AsyncRateLimiter(1000.0)
+        with (
+            patch.dict(os.environ, {"PRICECHARTING_SEARCH_HEDGE_DELAY": "0.02", "PRICECHARTING_CACHE_TTL": "0"}),
+            patch.object(pricecharting, "pooled_client", new=fake_pooled_client),
+            patch.object(pricecharting_cache, "pricecharting_limiter", new=lambda: limiter),
+            patch.dict(pricecharting._search_variant_stats, clear=True),
+        ):
+            result = asyncio.run(pricecharting._fetch_pricecharting_scrape("UT Hedge Game", "UT Hedge"))
+            stats = pricecharting.search_variant_stats()
+
+        self.assertEqual(result["pricecharting_id"], "ut-hedge-game")
+        self.assertEqual(result["loose_usd"], 12.0)
+        self.assertEqual(stats["query:prices"]["misses"], 1)
+        self.assertEqual(stats["query:videogames"]["selected"], 1)
+        self.assertEqual(stats["title:prices"]["hits"], 1)
+        self.assertEqual(stats["title:prices"]["selected"], 0)
+        self.assertEqual(self.client.get("/api/settings/pricecharting-search").status_code, 200)
+
+    def test_pricecharting_cache_serves_repeats_and_revalidates(self):
+        import asyncio
+        from types import SimpleNamespace
+        from backend.services.price import pricecharting_cache
+        from backend.services.price.ratelimit import AsyncRateLimiter
+
+        calls = []
+
+        class FakeClient:
+            async def get(self, url, params=None, headers=None):
+                calls.append(headers or {})
+                if (headers or {}).get("If-None-Match") == '"v1"':
+                    return SimpleNamespace(status_code=304, text="", headers={}, url=url)
+                return SimpleNamespace(status_code=200, text="<a>UT cached page</a>", headers={"etag": '"v1"'}, url=url)
+
+        url = "https://www.pricecharting.com/search-products"
+        limiter = AsyncRateLimiter(1000.0)
+        with patch.object(pricecharting_cache, "pricecharting_limiter", new=lambda: limiter):
+            first = asyncio.run(pricecharting_cache.cached_pricecharting_get(FakeClient(), url, {"q": "UT  Cached Query"}))
+            again = asyncio.run(pricecharting_cache.cached_pricecharting_get(FakeClient(), url, {"q": "ut cached query"}))
+            self.assertEqual(len(calls), 1)
+            self.assertTrue(again.from_cache)
+            self.assertEqual(again.text, first.text)
+
+            # Expire the entry and drop the memory tier: the disk copy is revalidated with its ETag.
+            key = pricecharting_cache.cache_key(url, {"q": "ut cached query"})
+            pricecharting_cache._memory.pop(key, None)
+            with sqlite3.connect(self._db_path()) as con:
+                con.execute("UPDATE http_response_cache SET expires_at = 0 WHERE cache_key = ?", (key,))
+            revalidated = asyncio.run(pricecharting_cache.cached_pricecharting_get(FakeClient(), url, {"q": "ut cached query"}))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1].get("If-None-Match"), '"v1"')
+        self.assertEqual((revalidated.status_code, revalidated.text), (200, "<a>UT cached page</a>"))
+        self.assertEqual(self.client.get("/api/settings/pricecharting-cache").json()["revalidated"], 1)
+
+    def test_catalog_misses_back_off_and_can_be_cleared(self):
+        from backend.services.price.catalog_misses import miss_key, pending_catalog_misses, record_catalog_miss
+
+        record_catalog_miss("UT Missing Cartridge", "UT Console")
+        record_catalog_miss("ut missing  cartridge", "UT Console")
+        pending = pending_catalog_misses([("UT Missing Cartridge", "UT Console"), ("UT Found Game", "UT Console")])
+        self.assertEqual(pending, {miss_key("UT Missing Cartridge", "UT Console")})
+
+        with sqlite3.connect(self._db_path()) as con:
+            count, hours = con.execute(
+                "SELECT miss_count, ROUND((julianday(next_retry_at) - julianday(last_missed_at)) * 24) FROM catalog_miss WHERE title = ?",
+                ("ut missing  cartridge",),
+            ).fetchone()
+        self.assertEqual((count, hours), (2, 48))
+
+        listed = self.client.get("/api/price-catalog/misses").json()
+        self.assertIn("ut missing  cartridge", [item["title"] for item in listed["items"]])
+
+        r = self.client.delete("/api/price-catalog/misses", params={"title": "UT Missing Cartridge", "platform": "UT Console"})
+        self.assertEqual(r.json()["cleared"], 1)
+        self.assertEqual(pending_catalog_misses([("UT Missing Cartridge", "UT Console")]), set())
+
+        # A successful lookup for a title that never missed does not write.
+        from backend.services.price import catalog_misses
+
+        with patch.object(catalog_misses, "get_db") as fake_db:
+            db = fake_db.return_value.__enter__.return_value
+            db.execute.return_value.fetchone.return_value = None
+            catalog_misses.clear_catalog_miss("UT Found Game", "UT Console")
+        self.assertEqual(db.execute.call_count, 1)
+        db.commit.assert_not_called()
+
+    def test_bulk_price_update_pipeline(self):
+        import asyncio
+        import json
+        import time
+        from backend import jobs, price_tracker
+        from backend.services.price.price_writer import PriceWriter
+
+        games = [
+            {"id": 9100001 + i, "title": f"UT Bulk Game {i}", "platform_name": "UT Bulk", "item_type": "game"}
+            for i in range(6)
+        ]
+        games.append({"id": 9100007, "title": "UT Bulk Figure", "platform_name": "", "item_type": "figure"})
+        local = {games[0]["id"]: {"loose_eur": 5.0, "cib_eur": None, "new_eur": None, "pricecharting_id": "ut-bulk-0"}}
+        running = {"now": 0, "peak": 0}
+
+        async def fake_fetch(title, platform_name):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.02)
+            running["now"] -= 1
+            if title.endswith("5"):
+                return None
+            return {"loose_usd": 10.0, "cib_usd": None, "new_usd": None, "pricecharting_id": title.lower()}
+
+        async def fake_rate():
+            return 0.5
+
+        with (
+            patch.dict(os.environ, {"BULK_PRICE_WORKERS": "2"}),
+            patch.object(price_tracker, "resolve_catalog_prices", new=lambda rows: local),
+            patch.object(price_tracker, "pending_catalog_misses", new=lambda pairs: set()),
+            patch.object(price_tracker, "fetch_pricecharting", new=fake_fetch),
+            patch.object(price_tracker, "get_eur_rate", new=fake_rate),
+            patch.object(jobs, "update", wraps=jobs.update) as progress,
+        ):
+            job = self._wait_for_job(jobs.enqueue("bulk_price_update", {"games": games}, total=len(games)))
+
+        self.assertEqual((job["state"], job["success"], job["failed"]), ("done", 5, 2))
+        self.assertEqual(running["peak"], 2)
+        # Catalog-resolved games report progress as the producer handles them, not only remote lookups.
+        self.assertEqual(progress.call_args_list[0].kwargs, {"progress": 1, "success": 1, "failed": 0})
+        self.assertEqual(progress.call_count, len(games))
+        with sqlite3.connect(self._db_path()) as con:
+            prices = dict(con.execute(
+                "SELECT game_id, loose_price FROM price_history WHERE game_id BETWEEN 9100001 AND 9100007"
+            ).fetchall())
+            con.execute("DELETE FROM price_history WHERE game_id BETWEEN 9100001 AND 9100007")
+        self.assertEqual(prices, {9100001: 5.0, 9100002: 5.0, 9100003: 5.0, 9100004: 5.0, 9100005: 5.0})
+
+        # A resumed run skips everything before the cursor and inside the saved ranges.
+        fetched = []
+
+        async def recording_fetch(title, platform_name):
+            fetched.append(title)
+            return None
+
+        resumed_id = "ut-bulk-resumed"
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute(
+                """
+                INSERT INTO jobs (id, name, state, total, payload, checkpoint, attempts, max_attempts,
+                                  lease_owner, lease_expires_at, run_after, created_at, started_at)
+                VALUES (?, 'bulk_price_update', 'running', ?, ?, ?, 1, 3, 'gone:1', ?, 0, '2026-01-01T00:00:00', '2026-01-01T00:00:00')
+                """,
+                (
+                    resumed_id, len(games), json.dumps({"games": games}),
+                    json.dumps({"next": 2, "ahead": [[3, 4]], "success": 2, "failed": 1}), time.time() - 1,
+                ),
+            )
+            con.commit()
+        with (
+            patch.object(price_tracker, "resolve_catalog_prices", new=lambda rows: {}),
+            patch.object(price_tracker, "pending_catalog_misses", new=lambda pairs: set()),
+            patch.object(price_tracker, "fetch_pricecharting", new=recording_fetch),
+            patch.object(price_tracker, "get_eur_rate", new=fake_rate),
+        ):
+            jobs._wake()
+            job = self._wait_for_job(resumed_id)
+        self.assertEqual(sorted(fetched), ["UT Bulk Game 2", "UT Bulk Game 5"])
+        self.assertEqual((job["state"], job["success"], job["failed"]), ("done", 2, 4))
+
+        writer = PriceWriter(batch_size=2, change_only=False)
+        with patch("backend.services.price.price_writer.get_db") as fake_db:
+            with writer:
+                for game_id in (1, 2, 3):
+                    writer.add(game_id, "pricecharting", 1.0, None, None)
+        self.assertEqual((writer.rows_written, writer.commits), (3, 2))
+        self.assertEqual(fake_db.call_count, 2)
+
+        # The async path writes the same batches from a worker thread, off the event loop.
+        import threading
+
+        writer = PriceWriter(batch_size=2, change_only=False)
+        threads = []
+
+        async def add_async():
+            async with writer:
+                for game_id in (1, 2, 3):
+                    await writer.aadd(game_id, "pricecharting", 1.0, None, None)
+
+        with patch("backend.services.price.price_writer.get_db", side_effect=lambda: threads.append(threading.get_ident()) or MagicMock()):
+            asyncio.run(add_async())
+        self.assertEqual((writer.rows_written, writer.commits), (3, 2))
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_price_writer_records_changes_only(self):
+        from backend.services.price.price_writer import PriceWriter
+
+        game_id = 9100101
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute(
+                """
+                INSERT INTO price_history (game_id, source, loose_price, complete_price, new_price, fetched_at, last_confirmed_at)
+                VALUES (?, 'pricecharting', 10.0, 20.0, NULL, '2026-01-01 00:00:00', '2026-01-01 00:00:00')
+                """,
+                (game_id,),
+            )
+            con.commit()
+
+        with patch.dict(os.environ, {"PRICE_HISTORY_MODE": "changes", "PRICE_HISTORY_EPSILON": "0.05"}):
+            with PriceWriter() as writer:
+                writer.add(game_id, "pricecharting", 10.04, 20.0, None)
+                writer.add(game_id, "pricecharting", 10.0, 20.0, None)
+            self.assertEqual((writer.rows_written, writer.rows_confirmed), (0, 2))
+
+            with PriceWriter() as writer:
+                writer.add(game_id, "pricecharting", 10.5, 20.0, None)
+                writer.add(game_id, "pricecharting", 10.5, 20.0, None)
+                writer.add(game_id, "pricecharting", 10.5, 20.0, 30.0)
+            self.assertEqual((writer.rows_written, writer.rows_confirmed), (2, 0))
+
+        with sqlite3.connect(self._db_path()) as con:
+            rows = con.execute(
+                "SELECT loose_price, new_price, last_confirmed_at FROM price_history WHERE game_id = ? ORDER BY id",
+                (game_id,),
+            ).fetchall()
+            con.execute("DELETE FROM price_history WHERE game_id = ?", (game_id,))
+        self.assertEqual([(r[0], r[1]) for r in rows], [(10.0, None), (10.5, None), (10.5, 30.0)])
+        self.assertNotEqual(rows[0][2], "2026-01-01 00:00:00")
+
+    def test_price_history_compaction_tiers(self):
+        from backend.services.price.history_retention import compact_price_history
+
+        game_id = 9100201
+        # Two days of the same (Monday-based) week past the daily window, one day past the raw window, one recent.
+        snapshots = [
+            ("-400 days", "weekday 1", "+1 hours", 5.0),
+            ("-400 days", "weekday 1", "+2 hours", 7.0),
+            ("-400 days", "weekday 2", "+1 hours", 6.0),
+            ("-100 days", "+0 days", "+1 hours", 8.0),
+            ("-100 days", "+0 days", "+2 hours", 9.0),
+            ("-2 days", "+0 days", "+1 hours", 10.0),
+        ]
+        with sqlite3.connect(self._db_path()) as con:
+            for day, weekday, hour, loose in snapshots:
+                con.execute(
+                    """
+                    INSERT INTO price_history (game_id, source, loose_price, fetched_at)
+                    VALUES (?, 'pricecharting', ?, datetime(date('now', ?, ?), ?))
+                    """,
+                    (game_id, loose, day, weekday, hour),
+                )
+            con.execute(
+                "INSERT INTO price_history (game_id, source, loose_price, fetched_at) VALUES (?, 'manual', 4.0, datetime('now', '-500 days'))",
+                (game_id,),
+            )
+            con.commit()
+
+        with patch.dict(os.environ, {"PRICE_HISTORY_RAW_DAYS": "30", "PRICE_HISTORY_DAILY_DAYS": "365"}):
+            result = compact_price_history()
+            again = compact_price_history()
+        self.assertEqual(result["raw_removed"], 5)
+        self.assertEqual((result["daily_written"], result["daily_removed"], result["weekly_written"]), (3, 2, 1))
+        self.assertEqual((again["raw_removed"], again["daily_removed"]), (0, 0))
+
+        history = self.client.get(f"/api/games/{game_id}/price-history").json()
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute("DELETE FROM price_history WHERE game_id = ?", (game_id,))
+            con.execute("DELETE FROM price_history_rollup WHERE game_id = ?", (game_id,))
+        self.assertEqual([entry["tier"] for entry in history], ["raw", "day", "week", "raw"])
+        self.assertEqual(history[0]["loose_price"], 10.0)
+        self.assertEqual((history[1]["loose_min"], history[1]["loose_max"], history[1]["loose_price"]), (8.0, 9.0, 9.0))
+        self.assertEqual(history[1]["samples"], 2)
+        self.assertEqual(history[2]["samples"], 3)
+        self.assertEqual(history[3]["source"], "manual")
+
+    def test_latest_price_table_follows_history_writes(self):
+        from backend.services.price.price_writer import PriceWriter
+
+        platforms = self.client.get("/api/platforms").json()
+        payload = {"title": "UT Latest Price Game", "platform_id": platforms[0]["id"], "item_type": "game", "is_wishlist": False}
+        game_id = self.client.post("/api/games", json=payload).json()["id"]
+        with sqlite3.connect(self._db_path()) as con:
+            # Game ids are reused, and history of deleted games is left behind by earlier tests.
+            con.execute("DELETE FROM price_history WHERE game_id = ?", (game_id,))
+            con.execute("DELETE FROM game_price_latest WHERE game_id = ?", (game_id,))
+
+        r = self.client.post(f"/api/games/{game_id}/price-manual", json={"loose_price": 12.0})
+        self.assertEqual(r.status_code, 200)
+        with PriceWriter(change_only=False) as writer:
+            writer.add(game_id, "pricecharting", 15.0, 25.0, None)
+
+        game = self.client.get(f"/api/games/{game_id}").json()
+        self.assertEqual((game["market_source"], game["market_loose_price"]), ("pricecharting", 15.0))
+        self.assertEqual(
+            {p["source"]: p["loose_price"] for p in game["latest_prices"]},
+            {"manual": 12.0, "pricecharting": 15.0},
+        )
+        listed = next(g for g in self.client.get("/api/games").json() if g["id"] == game_id)
+        self.assertEqual(listed["market_complete_price"], 25.0)
+
+        entry = next(e for e in self.client.get(f"/api/games/{game_id}/price-history").json() if e["source"] == "pricecharting")
+        self.client.delete(f"/api/games/{game_id}/price-history/{entry['id']}")
+        game = self.client.get(f"/api/games/{game_id}").json()
+        self.assertEqual((game["market_source"], game["market_loose_price"]), ("manual", 12.0))
+        self.assertEqual([p["source"] for p in game["latest_prices"]], ["manual"])
+
+        self.client.delete(f"/api/games/{game_id}")
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute("DELETE FROM price_history WHERE game_id = ?", (game_id,))
+            con.execute("DELETE FROM game_price_latest WHERE game_id = ?", (game_id,))
+
+    def test_fx_rates_are_cached_persisted_and_single_flight(self):
+        import asyncio
+        from backend.services.price import fx
+
+        calls = []
+
+        async def fake_fetch(last_date):
+            calls.append(last_date)
+            await asyncio.sleep(0.02)
+            if len(calls) > 1:
+                raise RuntimeError("upstream down")
+            return {"2026-01-05": 0.9, "2026-01-06": 0.95}
+
+        async def scenario():
+            cold = await asyncio.gather(*(fx.get_eur_rate() for _ in range(5)))
+            fx._state["loaded_at"] = 0.0
+            stale = await fx.get_eur_rate()
+            await fx._refresh_task
+            return cold, stale, await fx.get_eur_rate()
+
+        saved_state = dict(fx._state)
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute("DELETE FROM fx_rates")
+        fx._state.update(rate=None, rate_date=None, loaded_at=0.0, retry_after=0.0)
+        try:
+            with patch.object(fx, "_fetch_rates", new=fake_fetch):
+                cold, stale, after_failure = asyncio.run(scenario())
+            self.assertEqual(cold, [0.95] * 5)
+            self.assertEqual(calls, [None, "2026-01-06"])
+            self.assertEqual((stale, after_failure), (0.95, 0.95))
+            self.assertEqual(fx._state["last_error"], "upstream down")
+            self.assertEqual((fx.eur_rate_on("2026-01-05 12:00:00"), fx.eur_rate_on("2027-01-01")), (0.9, 0.95))
+
+            fx._state.update(rate=None, loaded_at=0.0)
+            self.assertEqual(asyncio.run(fx.get_eur_rate()), 0.95)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(self.client.get("/api/settings/fx-rate", params={"day": "2026-01-05"}).json()["day_rate"], 0.9)
+        finally:
+            fx._state.update(saved_state)
+            with sqlite3.connect(self._db_path()) as con:
+                con.execute("DELETE FROM fx_rates")
+
+    def test_durable_jobs_retry_and_resume_from_checkpoint(self):
+        import json
+        import time
+        from backend import jobs
+
+        seen = []
+
+        async def flaky(job_id, payload, checkpoint):
+            seen.append(dict(checkpoint))
+            start = checkpoint.get("next", 0)
+            for i in range(start, payload["count"]):
+                jobs.checkpoint(job_id, {"next": i + 1}, progress=i + 1, success=i + 1)
+                if i == 1 and len(seen) == 1:
+                    raise RuntimeError("transient")
+            jobs.finish(job_id, success=payload["count"], failed=0)
+
+        jobs.register("ut_flaky", flaky)
+        with patch.object(jobs, "RETRY_BASE_SECONDS", 0):
+            job_id = jobs.enqueue("ut_flaky", {"count": 4}, total=4)
+            job = self._wait_for_job(job_id)
+        self.assertEqual((job["state"], job["success"], job["attempts"]), ("done", 4, 2))
+        self.assertEqual(seen, [{}, {"next": 2}])
+        self.assertNotIn(job_id, [j["id"] for j in self.client.get("/api/jobs").json()])
+
+        # A job left running by a process that died is claimed again once its lease runs out.
+        seen.clear()
+        orphan_id = "ut-orphaned-job"
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute(
+                """
+                INSERT INTO jobs (id, name, state, total, payload, checkpoint, attempts, max_attempts,
+                                  lease_owner, lease_expires_at, run_after, created_at, started_at)
+                VALUES (?, 'ut_flaky', 'running', 4, ?, ?, 1, 3, 'gone:1', ?, 0, '2026-01-01T00:00:00', '2026-01-01T00:00:00')
+                """,
+                (orphan_id, json.dumps({"count": 4}), json.dumps({"next": 3}), time.time() - 1),
+            )
+            con.commit()
+        seen.append({})  # not the first run, so the handler does not raise
+        jobs._wake()
+        job = self._wait_for_job(orphan_id)
+        self.assertEqual((job["state"], job["attempts"]), ("done", 2))
+        self.assertEqual(seen[-1], {"next": 3})
+
+        # Only the run holding the current claim may finish a job, and a process never re-claims its own job.
+        stale_id = "ut-stale-claim"
+        with sqlite3.connect(self._db_path()) as con:
+            con.execute(
+                """
+                INSERT INTO jobs (id, name, state, total, payload, attempts, max_attempts,
+                                  lease_owner, lease_expires_at, run_after, created_at)
+                VALUES (?, 'ut_flaky', 'running', 4, '{}', 1, 3, 'current-claim', ?, 0, '2026-01-01T00:00:00')
+                """,
+                (stale_id, time.time() + 60),
+            )
+            con.commit()
+        token = jobs._current_lease.set("previous-claim")
+        try:
+            jobs.finish(stale_id, success=9, failed=0)
+            jobs.fail(stale_id, message="stale")
+        finally:
+            jobs._current_lease.reset(token)
+        self.assertEqual((jobs.get(stale_id)["state"], jobs.get(stale_id)["success"]), ("running", 0))
+        with patch.dict(jobs._running, {stale_id: None}):
+            with sqlite3.connect(self._db_path()) as con:
+                con.execute("UPDATE jobs SET lease_expires_at = ? WHERE id = ?", (time.time() - 1, stale_id))
+                con.commit()
+            self.assertIsNone(jobs._claim())
+            with sqlite3.connect(self._db_path()) as con:
+                con.execute("DELETE FROM jobs WHERE id = ?", (stale_id,))
+                con.commit()
+
+        with self.assertRaises(ValueError):
+            jobs.enqueue("ut_unregistered")
+
+    def test_job_events_stream_progress_deltas(self):
+        import asyncio
+        import json
+        import time
+        from backend import jobs
+
+        async def streamed(job_id, payload, checkpoint):
+            deadline = time.monotonic() + 5
+            while not any(s.job_id == job_id for s in list(jobs._subscribers)) and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            for i in range(1, 4):
+                jobs.update(job_id, progress=i, success=i - 1, failed=1 if i == 3 else 0)
+            jobs.finish(job_id, success=2, failed=1)
+
+        jobs.register("ut_streamed", streamed)
+        job_id = jobs.enqueue("ut_streamed", total=3)
+        with self.client.stream("GET", f"/api/jobs/{job_id}/events") as r:
+            self.assertEqual(r.status_code, 200)
+            self.assertTrue(r.headers["content-type"].startswith("text/event-stream"))
+            events = [json.loads(line[len("data: "):]) for line in r.iter_lines() if line.startswith("data: ")]
+
+        # The stream may open before or after the worker claims the job.
+        self.assertIn(events[0]["state"], ("queued", "running"))
+        self.assertEqual(events[0]["total"], 3)
+        self.assertTrue(all(event["id"] == job_id for event in events))
+        # Deltas carry only changed fields; replaying them gives the final state.
+        final = {}
+        for event in events:
+            final.update(event)
+        self.assertEqual((final["state"], final["progress"], final["success"], final["failed"]), ("done", 3, 2, 1))
+        self.assertNotIn("name", events[-1])
+        self.assertEqual(self.client.get("/api/jobs/missing/events").status_code, 404)
+
+        async def slow_listener():
+            with jobs.subscribe() as events:
+                for i in range(1, 101):
+                    jobs._publish({"id": "ut-a", "progress": i})
+                coalesced = dict(events.pending)
+                for n in range(jobs.SUBSCRIBER_BUFFER + 5):
+                    jobs._publish({"id": f"ut-many-{n}", "progress": 1})
+                first = await events.get(timeout=1)
+                return coalesced, first, len(events.pending), events.dropped
+
+        coalesced, first, pending, dropped = asyncio.run(slow_listener())
+        # 100 updates to one job coalesce into one delta; past the buffer the stalest job is dropped.
+        self.assertEqual(coalesced, {"ut-a": {"id": "ut-a", "progress": 100}})
+        self.assertEqual(first, {"id": "ut-many-5", "progress": 1})
+        self.assertEqual((pending, dropped), (jobs.SUBSCRIBER_BUFFER - 1, 6))
+        self.assertFalse(any(s.loop.is_closed() for s in jobs._subscribers))
+
+    def test_pricecharting_catalog_page_parser(self):
+        from backend.services.price.pricecharting_parser import parse_catalog_page
+
+        html = """
+        <html><body><div class="nav"><a href="/game/nav/link">Nav</a></div>
+        <table id="games_table"><tbody>
+          <tr><td class="title"><a href="https://www.pricecharting.com/game/playstation-5/returnal">Returnal</a></td>
+              <td class="used_price"><span class="js-price">$19.50</span></td><td class="cib_price"></td></tr>
+          <tr><td class="title"><a href="/game/playstation-5/no-price">No Price</a></td><td class="used_price"></td></tr>
+        </tbody></table>
+        <form class="next_page js-next-page" method="post" action="/console/playstation-5">
+          <input type="hidden" name="cursor" value="50">
+        </form></body></html>
+        """
+        entries, next_form = parse_catalog_page(html, "playstation 5")
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["pricecharting_id"], "returnal")
+        self.assertEqual(entries[0]["loose_usd"], 19.5)
+        self.assertIsNone(entries[0]["cib_usd"])
+        self.assertEqual(next_form, {"method": "POST", "action": "/console/playstation-5", "payload": {"cursor": "50"}})
+        self.assertIsNone(parse_catalog_page("<html><body><p>blocked</p></body></html>", "playstation 5"))
+
+    def test_http_client_metrics(self):
+        r = self.client.get("/api/settings/http-clients")
+        self.assertEqual(r.status_code, 200)
+        body = r.json()
+        self.assertIn("hosts", body)
+        self.assertGreaterEqual(body["max_connections"], 1)
+
+        # Each event loop gets its own clients, and aclose() closes only that loop's.
+        import asyncio
+        from backend.services.http_client import HttpClientRegistry
+
+        registry = HttpClientRegistry()
+
+        async def open_and_close():
+            registry.open(["example.invalid"])
+            client = registry.client("example.invalid")
+            self.assertIs(registry.client("example.invalid"), client)
+            self.assertIn("example.invalid", registry.metrics()["open_clients"])
+            await registry.aclose()
+            return client
+
+        first = asyncio.run(open_and_close())
+        second = asyncio.run(open_and_close())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertTrue(second.is_closed)
+        self.assertEqual(registry.metrics()["open_clients"], [])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+import importlib.util
+import unittest
+
+
+CATALOG_FIXTURE = [
+    ("Super Mario Odyssey", "Nintendo Switch", 32.0),
+    ("Super Mario Party", "Nintendo Switch", 38.0),
+    ("Super Mario 3D World + Bowser's Fury", "Nintendo Switch", 41.0),
+    ("Mario Kart 8 Deluxe", "Nintendo Switch", 40.0),
+    ("The Legend of Zelda: Breath of the Wild", "Nintendo Switch", 45.0),
+    ("The Legend of Zelda: Tears of the Kingdom", "Nintendo Switch", 52.0),
+    ("The Legend of Zelda: Link's Awakening", "Nintendo Switch", 35.0),
+    ("Pokemon Sword", "Nintendo Switch", 36.0),
+    ("Pokemon Shield", "Nintendo Switch", 37.0),
+    ("Metroid Dread", "Nintendo Switch", 39.0),
+    ("Halo 5 Guardians", "Xbox One", 8.0),
+    ("Halo: The Master Chief Collection", "Xbox One", 15.0),
+    ("Forza Horizon 4", "Xbox One", 14.0),
+    ("Forza Horizon 5", "Xbox One", 22.0),
+    ("Gears of War 4", "Xbox One", 7.0),
+    ("Gears 5", "Xbox One", 9.0),
+    ("FIFA 21", "Xbox One", 3.0),
+    ("FIFA 22", "Xbox One", 4.0),
+    ("Demon's Souls", "PlayStation 5", 35.0),
+    ("Ratchet & Clank: Rift Apart", "PlayStation 5", 30.0),
+    ("Marvel's Spider-Man: Miles Morales", "PlayStation 5", 24.0),
+    ("Marvel's Spider-Man 2", "PlayStation 5", 48.0),
+    ("Returnal", "PlayStation 5", 25.0),
+    ("Gran Turismo 7", "PlayStation 5", 33.0),
+    ("Horizon Forbidden West", "PlayStation 5", 28.0),
+    ("FIFA 22", "PlayStation 5", 5.0),
+]
+
+QUERY_FIXTURE = [
+    ("Super Mario Odyssey", "Nintendo Switch"),
+    ("Mario Kart 8", "Nintendo Switch"),
+    ("Zelda Breath of the Wild", "Nintendo Switch"),
+    ("Legend of Zelda Tears of the Kingdom", "Nintendo Switch"),
+    ("Pokemon Shield", "Nintendo Switch"),
+    ("Halo Master Chief Collection", "Xbox One"),
+    ("Forza Horizon 5", "Xbox One"),
+    ("Gears of War 4", "Xbox One"),
+    ("FIFA 22", "Xbox One"),
+    ("FIFA 22", "PlayStation 5"),
+    ("Spider-Man Miles Morales", "PlayStation 5"),
+    ("Ratchet and Clank Rift Apart", "PlayStation 5"),
+    ("Demons Souls", "PlayStation 5"),
+    ("Horizon Forbidden West", ""),
+    ("Completely Unknown Title", "PlayStation 5"),
+]
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+@unittest.skipUnless(_has_module("numpy") and _has_module("scipy"), "tfidf scorer needs numpy and scipy")
+class CatalogScorerRegressionTest(unittest.TestCase):
+    def test_backends_agree_on_top_match(self):
+        # Imported here so collecting this module doesn't bind the database before ApiSmokeTest sets DATABASE_URL.
+        from backend.services.price.scoring import (
+            ReferenceScorer,
+            TfidfScorer,
+            _catalog_query,
+            _prepare_catalog_row,
+        )
+
+        rows = [
+            _prepare_catalog_row({"id": i, "title": title, "platform": platform, "loose_eur": price})
+            for i, (title, platform, price) in enumerate(CATALOG_FIXTURE, start=1)
+        ]
+        queries = [_catalog_query(title, platform) for title, platform in QUERY_FIXTURE]
+
+        reference, tfidf = ReferenceScorer(), TfidfScorer()
+        expected = reference.best_matches(queries, reference.fit(rows))
+        actual = tfidf.best_matches(queries, tfidf.fit(rows))
+
+        self.assertGreater(sum(1 for m in expected if m), len(QUERY_FIXTURE) // 2)
+        for (title, platform), want, got in zip(QUERY_FIXTURE, expected, actual):
+            with self.subTest(title=title, platform=platform):
+                self.assertEqual(want and want["catalog_id"], got and got["catalog_id"])
+                self.assertEqual(want and want["match_score"], got and got["match_score"])
+
+
+if __name__ == "__main__":
+    unittest.main()
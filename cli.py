@@ -5,6 +5,8 @@ from rich.console import Console
 from rich.table import Table
 from rich.prompt import Prompt
 
+from backend.database import fts_phrase
+
 # Initialize Rich console
 console = Console()
 
@@ -20,11 +22,29 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+def has_table(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
 def search_games(query=""):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    if query:
+    # Same quoting and minimum length as the API search, so both return the same matches.
+    phrase = fts_phrase(query)
+    if phrase and has_table(conn, "games_fts"):
+        # Trigram FTS phrase == substring match on title/publisher/developer, ranked by bm25.
+        cursor.execute("""
+            SELECT g.id, g.title, p.name as platform_name, g.current_value, g.item_type
+            FROM games g
+            LEFT JOIN platforms p ON g.platform_id = p.id
+            LEFT JOIN (
+                SELECT rowid, bm25(games_fts) AS rank FROM games_fts WHERE games_fts MATCH ?
+            ) f ON f.rowid = g.id
+            WHERE f.rowid IS NOT NULL OR p.name LIKE ?
+            ORDER BY f.rank IS NULL, f.rank, g.title ASC
+        """, (phrase, f"%{query}%"))
+    elif query:
         cursor.execute("""
             SELECT g.id, g.title, p.name as platform_name, g.current_value, g.item_type
             FROM games g
@@ -57,6 +57,31 @@ export const settingsApi = {
   bulkEnrich: (limit) => apiPost(`/api/enrich/all?limit=${limit}`)
 }
 
+function followJob(id, onUpdate = () => {}) {
+  // Resolves with the job's final state; onUpdate gets the merged state after every event.
+  return new Promise((resolve, reject) => {
+    const job = { id }
+    const source = new EventSource(`/api/jobs/${id}/events`)
+    source.addEventListener('job', (event) => {
+      Object.assign(job, JSON.parse(event.data))
+      onUpdate({ ...job })
+      if (job.state === 'done' || job.state === 'error') {
+        source.close()
+        resolve({ ...job })
+      }
+    })
+    source.onerror = () => {
+      // A dropped connection is retried by EventSource itself; CLOSED means the job is gone.
+      if (source.readyState === EventSource.CLOSED) reject(new Error(`Job ${id} not found`))
+    }
+  })
+}
+
+export const jobsApi = {
+  get: (id) => apiGet(`/api/jobs/${id}`),
+  follow: followJob
+}
+
 export const priceCatalogApi = {
   search: (params = '') => apiGet(`/api/price-catalog${params}`),
   platforms: () => apiGet('/api/price-catalog/platforms'),